@@ -0,0 +1,84 @@
+"""
+Weather app - Gunicorn configuration
+Production serving mode
+
+Used by `./manage.sh start-prod`. Pre-forks WEB_CONCURRENCY workers with
+GUNICORN_THREADS threads each from an app preloaded in the master. The
+master makes no upstream calls: everything it did would be inherited by
+each forked worker. Instead one worker, elected with a lock file, warms the
+weather cache for the default location as it starts, and one (also elected
+by lock file) runs the pre-warm scheduler. Workers share fetched data
+through the host cache tier (HOST_CACHE_PATH), or across nodes through
+REDIS_URL when it is set.
+
+`./manage.sh reload` sends HUP for a graceful worker restart. Because the
+app is preloaded, the new workers are forked from the code the master
+loaded at startup: HUP picks up configuration, not application changes.
+Use `./manage.sh restart` after changing the code.
+"""
+
+import fcntl
+import multiprocessing
+import os
+import threading
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv not installed, that's ok
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Workers share cached weather through this SQLite file, in the app's own data directory
+os.environ.setdefault('HOST_CACHE_PATH', os.path.join(DATA_DIR, 'host_cache.sqlite'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = 1000
+max_requests_jitter = 100
+
+pidfile = 'weather_app.pid'
+accesslog = 'weather_app.log'
+errorlog = 'weather_app.log'
+
+# Lock file held by the worker that warmed the cache, for as long as it runs
+_warm_up_lock = None
+
+def warm_up_once(server, app):
+    """Warm the cache in this worker unless another live worker already has"""
+    global _warm_up_lock
+    
+    os.makedirs(DATA_DIR, exist_ok=True)
+    lock_file = open(os.path.join(DATA_DIR, 'warmup.lock'), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return
+    _warm_up_lock = lock_file
+    
+    from weather_app import warm_up
+    try:
+        warm_up(app)
+    except Exception as e:
+        server.log.warning(f"Cache warm-up failed: {e}")
+
+def post_fork(server, worker):
+    """Warm the cache and start the pre-warm scheduler, each in one elected worker"""
+    # Never in the master: a thread holding a lock across fork() would leave
+    # that lock held forever in the child. Every worker waits on the
+    # scheduler's lock file, so another takes over when the holder is
+    # recycled or reloaded.
+    app = server.app.wsgi()
+    threading.Thread(target=warm_up_once, args=(server, app), name='warm-up', daemon=True).start()
+    app.extensions['weather'].warm_set.start(lock_path=os.path.join(DATA_DIR, 'warmset.lock'))
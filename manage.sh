@@ -15,6 +15,8 @@ show_help() {
     echo "Commands:"
     echo "  setup     - Set up development environment"
     echo "  start     - Start $SERVICE_NAME"
+    echo "  start-prod - Start $SERVICE_NAME under gunicorn (pre-forked workers)"
+    echo "  reload    - Gracefully reload gunicorn workers (restart for code changes)"
     echo "  stop      - Stop $SERVICE_NAME" 
     echo "  restart   - Restart $SERVICE_NAME"
     echo "  status    - Check $SERVICE_NAME status"
@@ -83,6 +85,53 @@ start_service() {
     fi
 }
 
+start_production() {
+    echo "🚀 Starting $SERVICE_NAME (production, gunicorn)..."
+    
+    # Check if already running
+    if [ -f "${SERVICE_NAME}.pid" ]; then
+        PID=$(cat "${SERVICE_NAME}.pid")
+        if ps -p $PID > /dev/null 2>&1; then
+            echo "⚠️  $SERVICE_NAME is already running (PID: $PID)"
+            echo "🌐 Access at: http://localhost:5000"
+            return 0
+        else
+            echo "🧹 Removing stale PID file"
+            rm -f "${SERVICE_NAME}.pid"
+        fi
+    fi
+    
+    # gunicorn.conf.py sets workers, threads, preload, pidfile and warm-up
+    .venv/bin/gunicorn -c gunicorn.conf.py --daemon 'weather_app:create_app()'
+    
+    # Wait for the master to write its PID file
+    for _ in 1 2 3 4 5 6 7 8 9 10; do
+        [ -f "${SERVICE_NAME}.pid" ] && break
+        sleep 1
+    done
+    
+    if [ -f "${SERVICE_NAME}.pid" ] && ps -p $(cat "${SERVICE_NAME}.pid") > /dev/null 2>&1; then
+        echo "✅ $SERVICE_NAME started successfully (PID: $(cat "${SERVICE_NAME}.pid"))"
+        echo "🌐 Access at: http://localhost:5000"
+    else
+        echo "❌ Failed to start $SERVICE_NAME (see ${SERVICE_NAME}.log)"
+        exit 1
+    fi
+}
+
+reload_service() {
+    echo "🔄 Reloading $SERVICE_NAME..."
+    
+    if [ -f "${SERVICE_NAME}.pid" ] && ps -p $(cat "${SERVICE_NAME}.pid") > /dev/null 2>&1; then
+        # HUP: gunicorn re-reads its config and replaces workers gracefully; with
+        # preload_app the new workers still run the code loaded at start-up
+        kill -HUP $(cat "${SERVICE_NAME}.pid")
+        echo "✅ $SERVICE_NAME workers reloading"
+    else
+        echo "⚠️  $SERVICE_NAME is not running"
+    fi
+}
+
 stop_service() {
     echo "🛑 Stopping $SERVICE_NAME..."
     
@@ -148,6 +197,12 @@ case "${1:-help}" in
     start)
         start_service
         ;;
+    start-prod)
+        start_production
+        ;;
+    reload)
+        reload_service
+        ;;
     stop)
         stop_service
         ;;
@@ -0,0 +1,188 @@
+"""
+Weather app - Forecast Accuracy Module
+Scores stored daily forecasts against what was later observed
+
+Every fresh forecast is snapshotted per target date and lead time (days
+between issue and target), and every fresh current observation updates that
+day's observed high, low and whether it rained. Days use the location's own
+calendar (the payload's utc_offset), the same as get_forecast, so the two
+sides join on the date string; payloads without an offset fall back to the
+server's calendar. Scoring is one grouped SQL aggregate over the joined
+rows, so thousands of location-days are rescored in milliseconds.
+"""
+
+import math
+import os
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules.history_store import to_epoch
+from modules.sqlite_store import SQLiteStore
+from modules.timeline import day_date, local_day
+
+DEFAULT_ACCURACY_DB = Path(__file__).resolve().parent.parent / "data" / "accuracy.sqlite"
+
+# Observed days with fewer samples than this are too sparse to score highs/lows
+MIN_SAMPLES = 6
+
+def local_date(epoch: int, offset: Optional[int]) -> date:
+    """
+    Get the calendar date of a time at a location
+
+    Args:
+        epoch: Epoch seconds
+        offset: Location's UTC offset in seconds, or None for the server's
+
+    Returns:
+        date: Local date
+    """
+    if offset is None:
+        return datetime.fromtimestamp(epoch).date()
+    return day_date(local_day(epoch, offset))
+
+class AccuracyTracker(SQLiteStore):
+    """
+    SQLite-backed forecast snapshots, observed daily extremes and scoring
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(str(path or os.getenv("ACCURACY_DB", DEFAULT_ACCURACY_DB)))
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS forecasts ("
+            "cell TEXT, target TEXT, lead_days INTEGER, issued INTEGER, "
+            "temp_high REAL, temp_low REAL, rain_chance REAL, "
+            "PRIMARY KEY (cell, target, lead_days)) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS observed ("
+            "cell TEXT, target TEXT, samples INTEGER, temp_high REAL, temp_low REAL, "
+            "rained INTEGER, PRIMARY KEY (cell, target)) WITHOUT ROWID"
+        )
+
+    def snapshot(self, cell: str, forecast: Dict[str, Any]) -> int:
+        """
+        Store a forecast's daily highs, lows and rain chances
+
+        The first forecast issued for each (target date, lead time) is kept,
+        so later refreshes on the same day do not overwrite it.
+
+        Args:
+            cell: Grid cell
+            forecast: Dict from WeatherAPI.get_forecast
+
+        Returns:
+            int: Number of new (target, lead) rows stored
+        """
+        issued = forecast.get("timestamp") or datetime.now()
+        issued_date = local_date(to_epoch(issued), forecast.get("utc_offset"))
+        rows = []
+        for day in forecast["forecasts"]:
+            target = day["date"] if isinstance(day["date"], date) else date.fromisoformat(str(day["date"]))
+            lead_days = (target - issued_date).days
+            if lead_days < 0:
+                continue
+            rows.append((cell, target.isoformat(), lead_days, to_epoch(issued),
+                         day["temp_high"], day["temp_low"], day.get("rain_chance", 0)))
+
+        connection = self._connect()
+        before = connection.total_changes
+        connection.executemany("INSERT OR IGNORE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return connection.total_changes - before
+
+    def observe(self, cell: str, observation: Dict[str, Any]) -> None:
+        """
+        Fold a current observation into its day's observed extremes
+
+        Args:
+            cell: Grid cell
+            observation: Dict from WeatherAPI.get_current_weather
+        """
+        observed = observation.get("observed_at") or observation["timestamp"]
+        target = local_date(to_epoch(observed), observation.get("utc_offset")).isoformat()
+        temperature = float(observation["temperature"])
+        rained = 1 if (observation.get("rain_1h") or 0) > 0 else 0
+        self._connect().execute(
+            "INSERT INTO observed VALUES (?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT (cell, target) DO UPDATE SET samples = samples + 1, "
+            "temp_high = MAX(temp_high, excluded.temp_high), "
+            "temp_low = MIN(temp_low, excluded.temp_low), "
+            "rained = MAX(rained, excluded.rained)",
+            (cell, target, temperature, temperature, rained)
+        )
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        """
+        WeatherAPI refresh listener: snapshot forecasts, fold in observations
+
+        Args:
+            kind: Refreshed endpoint ("current", "forecast", ...)
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+        """
+        if "error" in data:
+            return
+        try:
+            if kind == "forecast":
+                self.snapshot(cell, data)
+            elif kind == "current":
+                self.observe(cell, data)
+        except (sqlite3.Error, KeyError, TypeError, ValueError) as e:
+            print(f"Warning: could not record {kind} accuracy data for {cell}: {e}")
+
+    def score(self, cell: Optional[str] = None, per_cell: bool = False,
+              min_samples: int = MIN_SAMPLES) -> List[Dict[str, Any]]:
+        """
+        Compute forecast error statistics over completed observed days
+
+        Args:
+            cell: Only score this grid cell (default: every cell)
+            per_cell: Group by cell and lead time instead of lead time only
+            min_samples: Skip observed days with fewer samples
+
+        Returns:
+            List of score rows: lead_days, days, temp_high/temp_low error
+            (mae, bias, rmse in °F, bias = forecast - observed) and rain
+            (Brier score, observed rain frequency, mean forecast chance)
+        """
+        group = "f.cell, f.lead_days" if per_cell else "f.lead_days"
+        where = ["o.samples >= ?", "f.target < ?"]
+        params: List[Any] = [min_samples, date.today().isoformat()]
+        if cell is not None:
+            where.append("f.cell = ?")
+            params.append(cell)
+
+        rows = self._connect().execute(
+            f"SELECT {group}, COUNT(*), "
+            "AVG(ABS(f.temp_high - o.temp_high)), AVG(f.temp_high - o.temp_high), "
+            "AVG((f.temp_high - o.temp_high) * (f.temp_high - o.temp_high)), "
+            "AVG(ABS(f.temp_low - o.temp_low)), AVG(f.temp_low - o.temp_low), "
+            "AVG((f.temp_low - o.temp_low) * (f.temp_low - o.temp_low)), "
+            "AVG((f.rain_chance / 100.0 - o.rained) * (f.rain_chance / 100.0 - o.rained)), "
+            "AVG(o.rained), AVG(f.rain_chance) "
+            "FROM forecasts f JOIN observed o ON o.cell = f.cell AND o.target = f.target "
+            f"WHERE {' AND '.join(where)} GROUP BY {group} ORDER BY {group}",
+            params
+        ).fetchall()
+
+        scores = []
+        for row in rows:
+            row_cell = row[0] if per_cell else None
+            lead_days, days, high_mae, high_bias, high_mse, low_mae, low_bias, low_mse, \
+                brier, rain_rate, chance = row[1:] if per_cell else row
+            entry = {
+                "lead_days": lead_days,
+                "days": days,
+                "temp_high": {"mae": round(high_mae, 2), "bias": round(high_bias, 2),
+                              "rmse": round(math.sqrt(high_mse), 2)},
+                "temp_low": {"mae": round(low_mae, 2), "bias": round(low_bias, 2),
+                             "rmse": round(math.sqrt(low_mse), 2)},
+                "rain": {"brier": round(brier, 3), "observed_rate": round(rain_rate, 3),
+                         "mean_chance": round(chance, 1)}
+            }
+            if row_cell is not None:
+                entry = dict({"cell": row_cell}, **entry)
+            scores.append(entry)
+        return scores
@@ -0,0 +1,213 @@
+"""
+Weather app - Admission Module
+Per-route concurrency caps with bounded, deadline-limited queues
+
+Each route gets a gate: up to `limit` requests run at once, up to `queue`
+more wait for a slot, and a waiting request gives up once its deadline
+(arrival + timeout) passes. Requests that find the queue full or time out
+are shed, so a slow upstream costs a fast 503 (or a stale cached answer)
+instead of an ever-growing pile of blocked threads.
+
+Limits come from ADMISSION_CONCURRENCY / ADMISSION_QUEUE / ADMISSION_TIMEOUT,
+with per-route overrides in ADMISSION_LIMITS ("/api/weather=32:64,/=8").
+Queued requests hold a worker thread too, so a limit at or above the
+worker's thread count never sheds anything; ADMISSION_CONCURRENCY defaults
+to half of GUNICORN_THREADS, leaving the rest for queued and exempt requests.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+class Gate:
+    """
+    Concurrency limit and wait queue for one route
+    """
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "deadline": 0}
+        self.stale = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: float) -> Optional[str]:
+        """
+        Take a slot, waiting in the queue until the deadline if needed
+
+        Args:
+            deadline: time.monotonic() value after which to give up
+
+        Returns:
+            None if admitted, else the shed reason ("queue_full" or "deadline")
+        """
+        with self._condition:
+            if self.active < self.limit and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return None
+            if self.waiting >= self.queue:
+                self.shed["queue_full"] += 1
+                return "queue_full"
+
+            self.waiting += 1
+            self.queued += 1
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed["deadline"] += 1
+                        return "deadline"
+                    self._condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            return None
+
+    def release(self) -> None:
+        """Free a slot and wake one waiting request"""
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def served_stale(self) -> None:
+        """Count a shed request that was answered from a stale cache entry"""
+        with self._condition:
+            self.stale += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the gate's limits, load and counters
+
+        Returns:
+            Dict with limit, queue, active, waiting, admitted, queued, shed
+            (by reason), stale responses served and shed_rate
+        """
+        with self._condition:
+            shed = sum(self.shed.values())
+            total = self.admitted + shed
+            return {
+                "limit": self.limit,
+                "queue": self.queue,
+                "active": self.active,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "shed": dict(self.shed),
+                "stale": self.stale,
+                "shed_rate": round(shed / total, 4) if total else 0.0
+            }
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, Optional[int]]]:
+    """
+    Parse per-route overrides like "/api/weather=32:64,/=8"
+
+    Args:
+        spec: Comma-separated route=limit[:queue] pairs
+
+    Returns:
+        Dict of route to (limit, queue or None for the default)
+    """
+    limits: Dict[str, Tuple[int, Optional[int]]] = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        route, value = item.strip().split("=", 1)
+        limit, _, queue = value.partition(":")
+        limits[route] = (int(limit), int(queue) if queue else None)
+    return limits
+
+class AdmissionController:
+    """
+    Gates for every route, created on first use
+    """
+
+    def __init__(self, limit: Optional[int] = None, queue: Optional[int] = None,
+                 timeout: Optional[float] = None, retry_after: Optional[int] = None,
+                 overrides: Optional[Dict[str, Tuple[int, Optional[int]]]] = None):
+        self.limit = limit or int(os.getenv("ADMISSION_CONCURRENCY",
+                                            max(1, int(os.getenv("GUNICORN_THREADS", 4)) // 2)))
+        self.queue = queue if queue is not None else int(os.getenv("ADMISSION_QUEUE", 32))
+        self.timeout = timeout if timeout is not None else float(os.getenv("ADMISSION_TIMEOUT", 2.0))
+        self.retry_after = retry_after or int(os.getenv("ADMISSION_RETRY_AFTER", 1))
+        self.overrides = overrides if overrides is not None else parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+        self.gates: Dict[str, Gate] = {}
+        self._lock = threading.Lock()
+
+    def gate(self, route: str) -> Gate:
+        """
+        Get the gate for a route
+
+        Args:
+            route: URL rule, e.g. "/api/weather"
+
+        Returns:
+            Gate: The route's gate
+        """
+        gate = self.gates.get(route)
+        if gate is None:
+            with self._lock:
+                gate = self.gates.get(route)
+                if gate is None:
+                    limit, queue = self.overrides.get(route, (self.limit, None))
+                    gate = Gate(limit, self.queue if queue is None else queue)
+                    self.gates[route] = gate
+        return gate
+
+    def admit(self, route: str) -> Optional[str]:
+        """
+        Admit a request to a route or decide to shed it
+
+        Args:
+            route: URL rule
+
+        Returns:
+            None if admitted (release() must follow), else the shed reason
+        """
+        return self.gate(route).acquire(time.monotonic() + self.timeout)
+
+    def release(self, route: str) -> None:
+        """
+        Mark an admitted request as finished
+
+        Args:
+            route: URL rule
+        """
+        self.gate(route).release()
+
+    def served_stale(self, route: str) -> None:
+        """
+        Count a shed request that was answered from a stale cache entry
+
+        Args:
+            route: URL rule
+        """
+        self.gate(route).served_stale()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get per-route gate stats and overall shed totals
+
+        Returns:
+            Dict with "routes" (per-route stats) and "totals"
+        """
+        routes = {route: gate.stats() for route, gate in sorted(self.gates.items())}
+        admitted = sum(entry["admitted"] for entry in routes.values())
+        shed = sum(sum(entry["shed"].values()) for entry in routes.values())
+        return {
+            "routes": routes,
+            "totals": {
+                "admitted": admitted,
+                "shed": shed,
+                "stale": sum(entry["stale"] for entry in routes.values()),
+                "shed_rate": round(shed / (admitted + shed), 4) if admitted + shed else 0.0
+            },
+            "timeout": self.timeout,
+            "retry_after": self.retry_after
+        }
@@ -0,0 +1,434 @@
+"""
+Weather app - Alerts Module
+Threshold alerts evaluated incrementally as cells refresh
+
+Subscribers register rules against a location's grid cell, e.g. "forecast
+rain_chance > 70" or "current wind_speed > 30" (canonical units: °F, mph).
+Rules live in SQLite indexed by (cell, source), and the engine is a
+WeatherAPI refresh listener: when a cell's current or forecast data is
+fetched, only that cell's rules for that endpoint are evaluated, so the
+cost follows the refresh rate rather than the number of subscriptions.
+
+Each triggering condition has an event key (the forecast day, or the
+observation for drops), and a notification is sent only the first time a
+(rule, event) pair is recorded, which holds across worker processes. A
+"current" threshold re-arms once its condition clears. Notifications go to
+the rule's sink: "log", a registered sink name, or a webhook URL, delivered
+on a background thread so refreshes never wait on a subscriber.
+
+Webhooks are off unless ALERT_WEBHOOK_HOSTS lists the hosts they may
+target, and a host that resolves to a loopback, private, link-local or
+otherwise non-public address is refused, both when the rule is added and
+before every delivery. Each rule gets a random token, returned only when it
+is created, that is needed to remove it.
+"""
+
+import hmac
+import ipaddress
+import json
+import operator
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from modules.sqlite_store import SQLiteStore
+
+DEFAULT_ALERTS_DB = Path(__file__).resolve().parent.parent / "data" / "alerts.sqlite"
+
+# Fields a rule may watch, per refreshed endpoint
+ALERT_FIELDS = {
+    "current": ("temperature", "feels_like", "humidity", "pressure", "wind_speed", "visibility", "rain_1h"),
+    "forecast": ("temp_high", "temp_low", "humidity", "wind_speed", "rain_chance")
+}
+
+# "drop" fires when the value falls by at least the threshold: between
+# consecutive observations (current) or consecutive days (forecast)
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "drop": None}
+
+# Forecast days a rule looks ahead
+FORECAST_HORIZON = 3
+
+# Notifications older than this are forgotten (and may fire again)
+FIRED_RETENTION = 7 * 86400
+
+def webhook_error(url: str, hosts: List[str], allow_private: bool = False) -> Optional[str]:
+    """
+    Check a webhook URL against the host allowlist and where its host resolves
+
+    Args:
+        url: Webhook URL
+        hosts: Hosts webhooks may target (empty: webhooks are disabled)
+        allow_private: Accept non-public addresses (local test receivers)
+
+    Returns:
+        Why the URL is refused, or None if it may be called
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return f"Unknown sink {url!r}"
+    if not hosts:
+        return "Webhook sinks are disabled (set ALERT_WEBHOOK_HOSTS)"
+    if parsed.hostname not in hosts:
+        return f"Webhook host {parsed.hostname} is not allowed"
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or None)}
+    except (socket.gaierror, UnicodeError, ValueError) as e:
+        return f"Webhook host {parsed.hostname} does not resolve: {e}"
+    if allow_private:
+        return None
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        if (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved
+                or ip.is_multicast or ip.is_unspecified):
+            return f"Webhook host {parsed.hostname} resolves to non-public address {ip}"
+    return None
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+class LogSink:
+    """Prints notifications to the server log"""
+
+    def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Deliver a notification
+
+        Args:
+            notification: Alert payload
+        """
+        rule = notification["rule"]
+        print(f"🔔 Alert {rule['id']} ({notification['cell']}): {rule['source']} {rule['field']} "
+              f"{rule['op']} {rule['threshold']} -> {notification['value']} [{notification['event']}]")
+
+class WebhookSink:
+    """POSTs notifications as JSON to a URL, retrying failed deliveries"""
+
+    def __init__(self, url: str, timeout: float = 5, attempts: int = 3,
+                 hosts: Optional[List[str]] = None, allow_private: bool = False):
+        self.url = url
+        self.timeout = timeout
+        self.attempts = attempts
+        self.hosts = hosts or []
+        self.allow_private = allow_private
+
+    def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Deliver a notification
+
+        Args:
+            notification: Alert payload
+
+        Raises:
+            IOError: If the URL is refused or every attempt failed
+        """
+        import requests  # deferred: only needed once an alert fires
+
+        # Checked again on every delivery: the host may resolve elsewhere by now
+        refused = webhook_error(self.url, self.hosts, self.allow_private)
+        if refused:
+            raise IOError(f"Webhook {self.url} refused: {refused}")
+        body = json.dumps(notification, default=_json_default)
+        error = "no attempts"
+        for attempt in range(self.attempts):
+            if attempt:
+                time.sleep(0.5 * 2 ** (attempt - 1))
+            try:
+                response = requests.post(self.url, data=body, timeout=self.timeout, allow_redirects=False,
+                                         headers={"Content-Type": "application/json"})
+            except requests.RequestException as e:
+                error = str(e)
+                continue
+            if response.status_code < 400:
+                return
+            error = f"HTTP {response.status_code}"
+            if response.status_code < 500:
+                break  # The subscriber rejected it; retrying will not help
+        raise IOError(f"Webhook {self.url} failed: {error}")
+
+class AlertEngine(SQLiteStore):
+    """
+    SQLite-backed alert rules evaluated per refreshed cell
+    """
+
+    row_factory = sqlite3.Row
+
+    def __init__(self, path: Optional[str] = None, sinks: Optional[Dict[str, Any]] = None,
+                 background: bool = True, webhook_hosts: Optional[List[str]] = None,
+                 allow_private: bool = False):
+        super().__init__(str(path or os.getenv("ALERTS_DB", DEFAULT_ALERTS_DB)))
+        self.sinks: Dict[str, Any] = {"log": LogSink()}
+        self.sinks.update(sinks or {})
+        self.background = background
+        if webhook_hosts is None:
+            webhook_hosts = [host.strip() for host in os.getenv("ALERT_WEBHOOK_HOSTS", "").split(",") if host.strip()]
+        self.webhook_hosts = webhook_hosts
+        self.allow_private = allow_private
+        self.counters = {"evaluated": 0, "fired": 0, "duplicates": 0, "delivered": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._executor: Optional[Any] = None
+        self._executor_pid = 0
+        self._purged = 0.0
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rules ("
+            "id INTEGER PRIMARY KEY, cell TEXT, source TEXT, field TEXT, op TEXT, "
+            "threshold REAL, sink TEXT, label TEXT, created INTEGER, last_value REAL, token TEXT)"
+        )
+        if "token" not in {row[1] for row in connection.execute("PRAGMA table_info(rules)")}:
+            connection.execute("ALTER TABLE rules ADD COLUMN token TEXT")
+        connection.execute("CREATE INDEX IF NOT EXISTS rules_cell ON rules (cell, source)")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS fired ("
+            "rule_id INTEGER, event TEXT, fired_at INTEGER, payload TEXT, "
+            "PRIMARY KEY (rule_id, event)) WITHOUT ROWID"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS fired_at ON fired (fired_at)")
+
+    def _pool(self) -> Any:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Two delivery threads, so one slow webhook does not hold up every other sink
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="alerts")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def add_rule(self, cell: str, source: str, field: str, op: str, threshold: float,
+                 sink: str = "log", label: str = "") -> Dict[str, Any]:
+        """
+        Subscribe a cell to an alert
+
+        Args:
+            cell: Grid cell to watch
+            source: "current" or "forecast"
+            field: Field of that payload (see ALERT_FIELDS)
+            op: One of OPERATORS
+            threshold: Value in canonical units (°F, mph, %, hPa, mm)
+            sink: "log", a registered sink name, or an http(s) webhook URL
+            label: Free-form subscriber label
+
+        Returns:
+            Dict with the stored rule and its removal token, or an error
+        """
+        if field not in ALERT_FIELDS.get(source, ()):
+            return {"error": f"Unknown field {field!r} for source {source!r}"}
+        if op not in OPERATORS:
+            return {"error": f"Unknown operator {op!r} (use {', '.join(OPERATORS)})"}
+        if sink not in self.sinks:
+            refused = webhook_error(sink, self.webhook_hosts, self.allow_private)
+            if refused:
+                return {"error": refused}
+
+        token = secrets.token_urlsafe(16)
+        cursor = self._connect().execute(
+            "INSERT INTO rules (cell, source, field, op, threshold, sink, label, created, token) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (cell, source, field, op, float(threshold), sink, label, int(time.time()), token)
+        )
+        return {**self.get_rule(cursor.lastrowid), "token": token}
+
+    def get_rule(self, rule_id: int) -> Dict[str, Any]:
+        """
+        Get a rule by id
+
+        Returns:
+            Dict with the rule, or an error
+        """
+        row = self._connect().execute(
+            "SELECT id, cell, source, field, op, threshold, sink, label, created FROM rules WHERE id = ?",
+            (rule_id,)
+        ).fetchone()
+        return dict(row) if row else {"error": f"No alert rule {rule_id}"}
+
+    def remove_rule(self, rule_id: int, token: str) -> bool:
+        """
+        Unsubscribe a rule
+
+        Args:
+            rule_id: Rule id
+            token: The token returned when the rule was added
+
+        Returns:
+            bool: True if the rule existed and the token matched
+        """
+        connection = self._connect()
+        row = connection.execute("SELECT token FROM rules WHERE id = ?", (rule_id,)).fetchone()
+        if row is None or not row["token"] or not hmac.compare_digest(row["token"].encode(), token.encode()):
+            return False
+        connection.execute("DELETE FROM fired WHERE rule_id = ?", (rule_id,))
+        return connection.execute("DELETE FROM rules WHERE id = ?", (rule_id,)).rowcount > 0
+
+    def rules_for(self, cell: str) -> List[Dict[str, Any]]:
+        """
+        Get a cell's rules
+
+        Returns:
+            List of rule dicts, oldest first
+        """
+        rows = self._connect().execute(
+            "SELECT id, cell, source, field, op, threshold, sink, label, created FROM rules "
+            "WHERE cell = ? ORDER BY id", (cell,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def recent(self, cell: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the latest notifications, newest first
+
+        Args:
+            cell: Only this cell's notifications (default: all)
+            limit: Maximum number returned
+
+        Returns:
+            List of notification payloads
+        """
+        query = "SELECT fired.payload FROM fired JOIN rules ON rules.id = fired.rule_id"
+        args: Tuple[Any, ...] = ()
+        if cell is not None:
+            query += " WHERE rules.cell = ?"
+            args = (cell,)
+        rows = self._connect().execute(query + " ORDER BY fired_at DESC LIMIT ?", args + (limit,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _events(self, rule: sqlite3.Row, data: Dict[str, Any]) -> List[Tuple[str, float]]:
+        # (event key, triggering value) pairs for one rule against fresh data
+        field, op, threshold = rule["field"], rule["op"], rule["threshold"]
+        if rule["source"] == "forecast":
+            days = [day for day in data.get("forecasts", [])[:FORECAST_HORIZON] if day.get(field) is not None]
+            if op == "drop":
+                return [(str(after["date"]), before[field] - after[field])
+                        for before, after in zip(days, days[1:])
+                        if before[field] - after[field] >= threshold]
+            return [(str(day["date"]), day[field]) for day in days if OPERATORS[op](day[field], threshold)]
+
+        value = data.get(field)
+        if value is None:
+            return []
+        if op == "drop":
+            previous = rule["last_value"]
+            if previous is None or previous - value < threshold:
+                return []
+            return [(f"drop:{data.get('observed_at', '')}", previous - value)]
+        return [("active", value)] if OPERATORS[op](value, threshold) else []
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> int:
+        """
+        WeatherAPI refresh listener: evaluate the cell's rules for this endpoint
+
+        Args:
+            kind: Refreshed endpoint ("current" or "forecast")
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+
+        Returns:
+            int: Number of new notifications sent
+        """
+        if "error" in data or kind not in ALERT_FIELDS:
+            return 0
+        connection = self._connect()
+        rules = connection.execute(
+            "SELECT id, cell, source, field, op, threshold, sink, label, last_value FROM rules "
+            "WHERE cell = ? AND source = ?", (cell, kind)
+        ).fetchall()
+        if not rules:
+            return 0
+
+        now = int(time.time())
+        notifications = []
+        for rule in rules:
+            self.counters["evaluated"] += 1
+            events = self._events(rule, data)
+            if kind == "current":
+                if rule["op"] == "drop":
+                    connection.execute("UPDATE rules SET last_value = ? WHERE id = ?", (data.get(rule["field"]), rule["id"]))
+                elif not events:
+                    # Condition cleared: re-arm the threshold
+                    connection.execute("DELETE FROM fired WHERE rule_id = ? AND event = 'active'", (rule["id"],))
+            for event, value in events:
+                notification = {
+                    "rule": {key: rule[key] for key in ("id", "source", "field", "op", "threshold", "label")},
+                    "cell": cell,
+                    "location": data.get("location", ""),
+                    "event": event,
+                    "value": round(value, 2),
+                    "time": now
+                }
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO fired VALUES (?, ?, ?, ?)",
+                    (rule["id"], event, now, json.dumps(notification, default=_json_default))
+                ).rowcount
+                if inserted:
+                    notifications.append((rule["sink"], notification))
+                else:
+                    self.counters["duplicates"] += 1
+
+        if now - self._purged >= 3600:
+            self._purged = now
+            connection.execute("DELETE FROM fired WHERE fired_at < ?", (now - FIRED_RETENTION,))
+
+        for sink, notification in notifications:
+            self.counters["fired"] += 1
+            if self.background:
+                self._pool().submit(self.deliver, sink, notification)
+            else:
+                self.deliver(sink, notification)
+        return len(notifications)
+
+    def sink_for(self, target: str) -> Any:
+        """
+        Get the sink for a rule's target, creating webhook sinks on first use
+
+        Args:
+            target: Sink name or webhook URL
+
+        Returns:
+            Object with a send(notification) method
+        """
+        sink = self.sinks.get(target)
+        if sink is None:
+            with self._lock:
+                sink = self.sinks.setdefault(target, WebhookSink(target, hosts=self.webhook_hosts,
+                                                                 allow_private=self.allow_private))
+        return sink
+
+    def deliver(self, target: str, notification: Dict[str, Any]) -> bool:
+        """
+        Send one notification to its sink
+
+        Args:
+            target: Sink name or webhook URL
+            notification: Alert payload
+
+        Returns:
+            bool: True if delivered
+        """
+        try:
+            self.sink_for(target).send(notification)
+        except Exception as e:
+            self.counters["failed"] += 1
+            print(f"Warning: alert {notification['rule']['id']} not delivered: {e}")
+            return False
+        self.counters["delivered"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get rule counts and engine counters
+
+        Returns:
+            Dict with rules, cells watched, and evaluation/delivery counters
+        """
+        rules, cells = self._connect().execute("SELECT COUNT(*), COUNT(DISTINCT cell) FROM rules").fetchone()
+        return {"rules": rules, "cells": cells, **self.counters}
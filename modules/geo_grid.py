@@ -0,0 +1,339 @@
+"""
+Weather app - Geo Grid Module
+Spatial bucketing for coordinates
+
+Maps raw latitude/longitude pairs onto geohash cells so that requests a few
+hundred meters apart resolve to the same canonical location, and provides a
+small sorted index for "nearest cached observation" lookups.
+"""
+
+import math
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE_MAP = {char: index for index, char in enumerate(_BASE32)}
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+def encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    Encode coordinates as a geohash cell
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        precision: Number of geohash characters (6 is roughly 1.2km x 0.6km)
+
+    Returns:
+        str: Geohash of the cell containing the coordinates
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if lon >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+def decode_bounds(cell: str) -> Tuple[float, float, float, float]:
+    """
+    Get the bounding box of a geohash cell
+
+    Args:
+        cell: Geohash string
+
+    Returns:
+        Tuple of (lat_min, lat_max, lon_min, lon_max)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in cell:
+        value = _DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+def decode(cell: str) -> Tuple[float, float]:
+    """
+    Get the center point of a geohash cell
+
+    Args:
+        cell: Geohash string
+
+    Returns:
+        Tuple of (lat, lon) at the cell center
+    """
+    lat_min, lat_max, lon_min, lon_max = decode_bounds(cell)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Get the size of a cell at the given precision
+
+    Args:
+        precision: Number of geohash characters
+
+    Returns:
+        Tuple of (lat_degrees, lon_degrees)
+    """
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+def neighbors(cell: str) -> List[str]:
+    """
+    Get the cells surrounding a geohash cell
+
+    Args:
+        cell: Geohash string
+
+    Returns:
+        List of up to 8 adjacent cells at the same precision
+    """
+    lat, lon = decode(cell)
+    lat_step, lon_step = cell_size(len(cell))
+    result = []
+
+    for dlat in (-1, 0, 1):
+        for dlon in (-1, 0, 1):
+            if dlat == 0 and dlon == 0:
+                continue
+            nlat = lat + dlat * lat_step
+            if nlat <= -90.0 or nlat >= 90.0:
+                continue
+            nlon = (lon + dlon * lon_step + 180.0) % 360.0 - 180.0
+            neighbor = encode(nlat, nlon, len(cell))
+            if neighbor != cell and neighbor not in result:
+                result.append(neighbor)
+
+    return result
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points
+
+    Args:
+        lat1: Latitude of first point
+        lon1: Longitude of first point
+        lat2: Latitude of second point
+        lon2: Longitude of second point
+
+    Returns:
+        float: Distance in kilometers
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def search_precision(lat: float, radius_km: float, max_precision: int = 12) -> int:
+    """
+    Pick the finest precision whose cells are at least radius_km across
+
+    A circle of radius_km around any point is then covered by the point's
+    cell plus its 8 neighbors.
+
+    Args:
+        lat: Latitude the search is centered on
+        radius_km: Search radius in kilometers
+        max_precision: Upper bound on the returned precision
+
+    Returns:
+        int: Geohash precision to search at
+    """
+    lon_scale = max(math.cos(math.radians(lat)), 0.01)
+    best = 1
+    for precision in range(1, max_precision + 1):
+        lat_deg, lon_deg = cell_size(precision)
+        if min(lat_deg * KM_PER_DEGREE, lon_deg * KM_PER_DEGREE * lon_scale) < radius_km:
+            break
+        best = precision
+    return best
+
+class GeoIndex:
+    """
+    Sorted index of occupied geohash cells
+
+    Cells are kept in a sorted list so every cell sharing a geohash prefix
+    can be found with two binary searches. Request threads add cells
+    concurrently, so changes and prefix lookups hold a lock.
+    """
+
+    def __init__(self, precision: int = 6):
+        self.precision = precision
+        self._cells: List[str] = []
+        self._points: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def add(self, lat: float, lon: float) -> str:
+        """
+        Mark the cell containing a point as occupied
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            str: The cell the point was filed under
+        """
+        cell = encode(lat, lon, self.precision)
+        with self._lock:
+            if cell not in self._points:
+                insort(self._cells, cell)
+                self._points[cell] = decode(cell)
+        return cell
+
+    def remove(self, cell: str) -> None:
+        """
+        Drop a cell from the index
+
+        Args:
+            cell: Geohash string
+        """
+        with self._lock:
+            if self._points.pop(cell, None) is None:
+                return
+            index = bisect_left(self._cells, cell)
+            if index < len(self._cells) and self._cells[index] == cell:
+                del self._cells[index]
+
+    def cells_with_prefix(self, prefix: str) -> List[str]:
+        """
+        Get all indexed cells inside a coarser cell
+
+        Args:
+            prefix: Geohash prefix
+
+        Returns:
+            List of cell strings starting with prefix
+        """
+        with self._lock:
+            start = bisect_left(self._cells, prefix)
+            end = bisect_left(self._cells, prefix + "~")
+            return self._cells[start:end]
+
+    def within(self, south: float, west: float, north: float, east: float) -> List[str]:
+        """
+        Get all indexed cells whose centers fall inside a bounding box
+
+        The box is covered by a few dozen geohash prefixes at the finest
+        precision that keeps their number small; each prefix is two binary
+        searches, then the candidates are filtered by their centers.
+
+        Args:
+            south: Minimum latitude
+            west: Minimum longitude
+            north: Maximum latitude
+            east: Maximum longitude
+
+        Returns:
+            List of cell strings, in geohash order
+        """
+        precision = 1
+        while precision < self.precision:
+            lat_step, lon_step = cell_size(precision + 1)
+            if ((north - south) / lat_step + 1) * ((east - west) / lon_step + 1) > 64:
+                break
+            precision += 1
+        lat_step, lon_step = cell_size(precision)
+
+        prefixes = set()
+        lat = south
+        while True:
+            lon = west
+            while True:
+                prefixes.add(encode(lat, lon, precision))
+                if lon >= east:
+                    break
+                lon = min(lon + lon_step, east)
+            if lat >= north:
+                break
+            lat = min(lat + lat_step, north)
+
+        cells = []
+        for prefix in sorted(prefixes):
+            for cell in self.cells_with_prefix(prefix):
+                point = self._points.get(cell)
+                if point is None:
+                    continue  # Removed since the lookup
+                clat, clon = point
+                if south <= clat <= north and west <= clon <= east:
+                    cells.append(cell)
+        return cells
+
+    def nearest(self, lat: float, lon: float, max_km: float,
+                accept: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[float, str]]:
+        """
+        Find the closest indexed cell within a radius
+
+        Args:
+            lat: Latitude to search from
+            lon: Longitude to search from
+            max_km: Maximum distance in kilometers
+            accept: Optional filter, called with each candidate cell
+
+        Returns:
+            Tuple of (distance_km, cell) or None if nothing is in range
+        """
+        search_cell = encode(lat, lon, search_precision(lat, max_km, self.precision))
+        candidates = []
+
+        for prefix in [search_cell] + neighbors(search_cell):
+            for cell in self.cells_with_prefix(prefix):
+                point = self._points.get(cell)
+                if point is None:
+                    continue  # Removed since the lookup
+                clat, clon = point
+                distance = haversine_km(lat, lon, clat, clon)
+                if distance <= max_km:
+                    candidates.append((distance, cell))
+
+        for distance, cell in sorted(candidates):
+            if accept is None or accept(cell):
+                return distance, cell
+        return None
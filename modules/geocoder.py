@@ -0,0 +1,193 @@
+"""
+Weather app - Geocoder Module
+Offline city-name lookups
+
+Resolves city names to coordinates from a bundled gazetteer without calling
+any external geocoding service. The gazetteer is a tab-separated file sorted
+by normalized name, one city per line:
+
+    key  name  region  region_code  country_code  country  lat  lon  population
+
+The file is memory-mapped and searched in place; only an array of line
+offsets is built at load time.
+"""
+
+import mmap
+import os
+import re
+import threading
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_GAZETTEER = Path(__file__).resolve().parent.parent / "data" / "cities.tsv"
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a place name for index lookups
+
+    Strips accents, lowercases and collapses punctuation to single spaces,
+    so "Montréal", "MONTREAL" and "montreal" share one key.
+
+    Args:
+        name: Raw place name
+
+    Returns:
+        str: Normalized key
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = decomposed.encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", " ", ascii_name).strip()
+
+class Gazetteer:
+    """
+    Sorted, memory-mapped city index with exact and prefix search
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or os.getenv("GAZETTEER_PATH", DEFAULT_GAZETTEER))
+        with open(self.path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._offsets = array("I")
+        position = 0
+        size = len(self._data)
+        while position < size:
+            self._offsets.append(position)
+            newline = self._data.find(b"\n", position)
+            position = size if newline == -1 else newline + 1
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _key_at(self, index: int) -> bytes:
+        start = self._offsets[index]
+        return self._data[start:self._data.find(b"\t", start)]
+
+    def _record_at(self, index: int) -> Dict[str, Any]:
+        start = self._offsets[index]
+        end = self._data.find(b"\n", start)
+        line = self._data[start:end if end != -1 else len(self._data)].decode("utf-8")
+        _, name, region, region_code, country_code, country, lat, lon, population = line.split("\t")
+        return {
+            "city": name,
+            "region": region,
+            "region_code": region_code,
+            "country_code": country_code,
+            "country": country,
+            "latitude": float(lat),
+            "longitude": float(lon),
+            "population": int(population)
+        }
+
+    def _bound(self, key: bytes) -> int:
+        # Leftmost line whose key is >= key
+        low, high = 0, len(self._offsets)
+        while low < high:
+            mid = (low + high) // 2
+            if self._key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _range(self, prefix: str, exact: bool) -> Tuple[int, int]:
+        key = prefix.encode("ascii")
+        start = self._bound(key)
+        # Keys never contain tabs or DEL, so these sort just past every match
+        end = self._bound(key + (b"\t" if exact else b"\x7f"))
+        return start, end
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a city name to a single location
+
+        Accepts an optional qualifier after a comma ("Rochester, NH" or
+        "London, Canada"); among several matches the most populous wins.
+
+        Args:
+            query: City name, optionally followed by ", region or country"
+
+        Returns:
+            Dict with city, region, country, latitude and longitude, or None
+        """
+        name, _, qualifier = query.partition(",")
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        start, end = self._range(key, exact=True)
+        matches = [self._record_at(index) for index in range(start, end)]
+
+        qualifier = normalize_name(qualifier)
+        if qualifier:
+            matches = [
+                match for match in matches
+                if qualifier in (
+                    normalize_name(match["region"]),
+                    normalize_name(match["region_code"]),
+                    normalize_name(match["country"]),
+                    normalize_name(match["country_code"])
+                )
+            ]
+
+        if not matches:
+            return None
+        return max(matches, key=lambda match: match["population"])
+
+    def search(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Autocomplete city names by prefix
+
+        Args:
+            prefix: Beginning of a city name
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of matching locations, most populous first
+        """
+        key = normalize_name(prefix)
+        if not key:
+            return []
+
+        start, end = self._range(key, exact=False)
+        matches = [self._record_at(index) for index in range(start, end)]
+        matches.sort(key=lambda match: match["population"], reverse=True)
+        return matches[:limit]
+
+def get_gazetteer() -> Gazetteer:
+    """
+    Get the shared gazetteer, loading it on first use
+
+    Returns:
+        Gazetteer: Process-wide gazetteer instance
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+    return _gazetteer
+
+def geocode_city(query: str) -> Dict[str, Any]:
+    """
+    Resolve a city name to coordinates using the bundled gazetteer
+
+    Args:
+        query: City name, optionally followed by ", region or country"
+
+    Returns:
+        Dict containing lat, lon, city info (or an error)
+    """
+    try:
+        match = get_gazetteer().lookup(query)
+    except OSError as e:
+        return {"error": f"Gazetteer unavailable: {str(e)}"}
+
+    if match is None:
+        return {"error": f"Unknown city: {query}"}
+    return match
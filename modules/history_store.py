@@ -0,0 +1,249 @@
+"""
+Weather app - History Store Module
+Append-only columnar time series of observations
+
+Each grid cell gets a directory of fixed-width column files:
+
+    base        first observation time (epoch seconds, text)
+    ts.u32      observation times as uint32 offsets from base
+    <field>.f32 one float32 column per observed field
+
+Offsets are strictly increasing, so range queries binary-search the
+memory-mapped time column and then slice only the matching rows out of the
+other columns. Files use native byte order; they are host-local data.
+"""
+
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # not available on Windows; appends are then only thread-safe
+
+DEFAULT_HISTORY_DIR = Path(__file__).resolve().parent.parent / "data" / "history"
+
+FIELDS = ["temperature", "feels_like", "humidity", "pressure", "wind_speed",
+          "wind_direction", "visibility", "rain_1h"]
+
+RESOLUTIONS = {"raw": 0, "hour": 3600, "day": 86400}
+
+def to_epoch(value: Any) -> int:
+    """
+    Convert a datetime or number to epoch seconds
+
+    Args:
+        value: datetime, or seconds since the epoch
+
+    Returns:
+        int: Epoch seconds
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+class HistoryStore:
+    """
+    Per-cell columnar observation store
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.getenv("HISTORY_DIR", DEFAULT_HISTORY_DIR))
+        self._lock = threading.Lock()
+
+    def _cell_dir(self, cell: str) -> Path:
+        return self.root / cell
+
+    @contextmanager
+    def _locked(self, cell: str) -> Iterator[Path]:
+        # Columns must stay row-aligned, so appends are serialized across
+        # threads and, via flock, across worker processes
+        directory = self._cell_dir(cell)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(directory / ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield directory
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _base(self, directory: Path) -> Optional[int]:
+        try:
+            return int((directory / "base").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def append(self, cell: str, observation: Dict[str, Any]) -> bool:
+        """
+        Append one normalized current-weather observation
+
+        Args:
+            cell: Grid cell the observation belongs to
+            observation: Dict from WeatherAPI.get_current_weather
+
+        Returns:
+            bool: True if stored, False if not newer than the last row
+        """
+        observed = to_epoch(observation.get("observed_at") or observation.get("timestamp") or time.time())
+
+        with self._locked(cell) as directory:
+            base = self._base(directory)
+            if base is None:
+                base = observed
+                (directory / "base").write_text(str(base))
+
+            offset = observed - base
+            if offset < 0:
+                return False
+            # Convert every field before touching a column, so a bad value writes nothing
+            values = array("f", [float(observation[field]) if observation.get(field) is not None
+                                 else float("nan") for field in FIELDS])
+
+            # ts.u32 is appended last and defines the row count; cut anything a
+            # torn earlier append left past it, and pad columns added since
+            ts_path = directory / "ts.u32"
+            rows = ts_path.stat().st_size // 4 if ts_path.exists() else 0
+            if ts_path.exists() and ts_path.stat().st_size != rows * 4:
+                os.truncate(ts_path, rows * 4)
+            if rows:
+                with open(ts_path, "rb") as f:
+                    f.seek(-4, os.SEEK_END)
+                    last = array("I", f.read(4))[0]
+                if offset <= last:
+                    return False
+
+            for field, value in zip(FIELDS, values):
+                path = directory / f"{field}.f32"
+                size = path.stat().st_size if path.exists() else 0
+                with open(path, "ab") as f:
+                    if size != rows * 4:
+                        kept = min(size // 4, rows)
+                        f.truncate(kept * 4)
+                        array("f", [float("nan")] * (rows - kept)).tofile(f)
+                    array("f", [value]).tofile(f)
+            with open(ts_path, "ab") as f:
+                array("I", [offset]).tofile(f)
+
+        return True
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        """
+        WeatherAPI refresh listener: store fresh current observations
+
+        Args:
+            kind: Refreshed endpoint ("current", "forecast", ...)
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+        """
+        if kind == "current" and "error" not in data:
+            try:
+                self.append(cell, data)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Warning: could not record history for {cell}: {e}")
+
+    def _open_column(self, directory: Path, name: str) -> Optional[memoryview]:
+        path = directory / name
+        if not path.exists() or path.stat().st_size == 0:
+            return None
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast("I" if name.endswith(".u32") else "f")
+
+    def query(self, cell: str, start: int, end: int,
+              resolution: str = "raw") -> List[Dict[str, Any]]:
+        """
+        Get observations in a time range, optionally downsampled
+
+        Args:
+            cell: Grid cell
+            start: Range start (epoch seconds, inclusive)
+            end: Range end (epoch seconds, inclusive)
+            resolution: "raw", or "hour"/"day" for min/max/mean buckets
+
+        Returns:
+            List of points (raw) or buckets, oldest first
+        """
+        directory = self._cell_dir(cell)
+        base = self._base(directory)
+        times = self._open_column(directory, "ts.u32") if base is not None else None
+        if times is None:
+            return []
+
+        # Rows are only readable once every column has been written
+        rows = min([len(times)] + [
+            os.path.getsize(directory / f"{field}.f32") // 4
+            for field in FIELDS if (directory / f"{field}.f32").exists()
+        ])
+        first = bisect_left(times, max(start - base, 0), 0, rows)
+        last = bisect_right(times, max(end - base, -1), 0, rows) if end >= base else 0
+        if first >= last:
+            return []
+
+        offsets = times[first:last].tolist()
+        columns = {}
+        for field in FIELDS:
+            column = self._open_column(directory, f"{field}.f32")
+            columns[field] = column[first:last].tolist() if column is not None else [None] * len(offsets)
+
+        if RESOLUTIONS.get(resolution, 0) == 0:
+            return [
+                dict({"time": base + offset},
+                     **{field: round(columns[field][i], 2) for field in FIELDS
+                        if columns[field][i] is not None and columns[field][i] == columns[field][i]})
+                for i, offset in enumerate(offsets)
+            ]
+        return self._downsample(base, offsets, columns, RESOLUTIONS[resolution])
+
+    def _downsample(self, base: int, offsets: List[int], columns: Dict[str, List[float]],
+                    bucket_seconds: int) -> List[Dict[str, Any]]:
+        buckets: List[Dict[str, Any]] = []
+        current_start = None
+        stats: Dict[str, List[float]] = {}
+
+        for i, offset in enumerate(offsets):
+            bucket_start = (base + offset) // bucket_seconds * bucket_seconds
+            if bucket_start != current_start:
+                if current_start is not None:
+                    buckets.append(self._summarize(current_start, stats))
+                current_start = bucket_start
+                stats = {field: [] for field in columns}
+            for field, column in columns.items():
+                value = column[i]
+                if value is not None and value == value:  # skip NaN gaps
+                    stats[field].append(value)
+
+        if current_start is not None:
+            buckets.append(self._summarize(current_start, stats))
+        return buckets
+
+    def _summarize(self, bucket_start: int, stats: Dict[str, List[float]]) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"time": bucket_start, "count": max(len(v) for v in stats.values())}
+        for field, values in stats.items():
+            if values:
+                summary[field] = {
+                    "min": round(min(values), 2),
+                    "max": round(max(values), 2),
+                    "mean": round(sum(values) / len(values), 2)
+                }
+        return summary
+
+    def cells(self) -> List[str]:
+        """
+        List cells with stored history
+
+        Returns:
+            List of cell names
+        """
+        if not self.root.exists():
+            return []
+        return sorted(entry.name for entry in self.root.iterdir() if (entry / "ts.u32").exists())
@@ -0,0 +1,207 @@
+"""
+Weather app - IP Locator Module
+Local IP-to-location lookups
+
+Resolves client IPv4 addresses against a sorted, memory-mapped range table
+so each request can be located without an external service. Table layout
+(little-endian):
+
+    header   magic "WIPR", version u16, reserved u16, count u32, strings_offset u32
+    records  count x (start u32, end u32, lat f32, lon f32, place_offset u32)
+    strings  "city\\tregion\\tcountry\\n" entries referenced by place_offset
+
+Build a table with scripts/build-ip-table.py.
+"""
+
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_IP_TABLE = Path(__file__).resolve().parent.parent / "data" / "ip_ranges.bin"
+
+MAGIC = b"WIPR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+RECORD = struct.Struct("<IIffI")
+_START = struct.Struct("<I")
+_ADDRESS = struct.Struct("!I")
+
+# Non-global IPv4 blocks (RFC 6890): this-network, private, CGNAT, loopback,
+# link-local, IETF/TEST-NETs, benchmarking, multicast and reserved
+_NON_GLOBAL = [
+    (int(network.network_address), int(network.broadcast_address))
+    for network in map(ipaddress.IPv4Network, (
+        "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8",
+        "169.254.0.0/16", "172.16.0.0/12", "192.0.0.0/24", "192.0.2.0/24",
+        "192.168.0.0/16", "198.18.0.0/15", "198.51.100.0/24", "203.0.113.0/24",
+        "224.0.0.0/3"
+    ))
+]
+
+_table = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+def ip_to_int(ip: str) -> Optional[int]:
+    """
+    Convert a public IPv4 address to an integer
+
+    Args:
+        ip: Dotted-quad address
+
+    Returns:
+        int: Address as an unsigned 32-bit integer, or None for IPv6,
+        private, loopback or malformed addresses
+    """
+    try:
+        value = _ADDRESS.unpack(socket.inet_pton(socket.AF_INET, ip.strip()))[0]
+    except (OSError, ValueError):
+        return None
+    for first, last in _NON_GLOBAL:
+        if first <= value <= last:
+            return None
+    return value
+
+class IPRangeTable:
+    """
+    Binary-searchable table of IPv4 ranges and their locations
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = str(path or os.getenv("IP_LOCATION_DB", DEFAULT_IP_TABLE))
+        with open(self.path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, self.count, self.strings_offset = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a v{VERSION} IP range table")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _start_at(self, index: int) -> int:
+        return _START.unpack_from(self._data, HEADER.size + index * RECORD.size)[0]
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the location of an IP address
+
+        Args:
+            ip: Client IPv4 address
+
+        Returns:
+            Dict containing lat, lon, city info, or None if not covered
+        """
+        value = ip_to_int(ip)
+        if value is None or self.count == 0:
+            return None
+
+        # Rightmost range starting at or before the address
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._start_at(mid) <= value:
+                low = mid + 1
+            else:
+                high = mid
+        if low == 0:
+            return None
+
+        _, end, lat, lon, place_offset = RECORD.unpack_from(
+            self._data, HEADER.size + (low - 1) * RECORD.size
+        )
+        if value > end:
+            return None
+
+        place_end = self._data.find(b"\n", self.strings_offset + place_offset)
+        place = self._data[self.strings_offset + place_offset:place_end].decode("utf-8")
+        city, region, country = place.split("\t")
+        return {
+            "latitude": round(lat, 4),
+            "longitude": round(lon, 4),
+            "city": city,
+            "region": region,
+            "country": country
+        }
+
+def write_ip_table(ranges: Iterable[Tuple[str, str, float, float, str, str, str]],
+                   path: Optional[str] = None) -> int:
+    """
+    Write an IP range table
+
+    Args:
+        ranges: Tuples of (start_ip, end_ip, lat, lon, city, region, country);
+            IPv6 rows are skipped
+        path: Output file (defaults to IP_LOCATION_DB or data/ip_ranges.bin)
+
+    Returns:
+        int: Number of ranges written
+    """
+    path = str(path or os.getenv("IP_LOCATION_DB", DEFAULT_IP_TABLE))
+    records = []
+    places: Dict[str, int] = {}
+    strings = bytearray()
+
+    for start_ip, end_ip, lat, lon, city, region, country in ranges:
+        try:
+            start = ipaddress.IPv4Address(start_ip)
+            end = ipaddress.IPv4Address(end_ip)
+        except ValueError:
+            continue
+        place = f"{city}\t{region}\t{country}".replace("\n", " ")
+        if place not in places:
+            places[place] = len(strings)
+            strings += place.encode("utf-8") + b"\n"
+        records.append((int(start), int(end), float(lat), float(lon), places[place]))
+
+    records.sort()
+    strings_offset = HEADER.size + len(records) * RECORD.size
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(records), strings_offset))
+        for record in records:
+            f.write(RECORD.pack(*record))
+        f.write(bytes(strings))
+
+    return len(records)
+
+def get_ip_table() -> Optional[IPRangeTable]:
+    """
+    Get the shared IP range table, loading it on first use
+
+    Returns:
+        IPRangeTable, or None if no table is installed
+    """
+    global _table, _table_loaded
+    if not _table_loaded:
+        with _table_lock:
+            if not _table_loaded:
+                try:
+                    _table = IPRangeTable()
+                except (OSError, ValueError, struct.error):
+                    _table = None
+                _table_loaded = True
+    return _table
+
+def locate_ip(ip: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Locate a client IP using the local range table
+
+    Args:
+        ip: Client IPv4 address (may be None)
+
+    Returns:
+        Dict containing lat, lon, city info, or None if unknown
+    """
+    if not ip:
+        return None
+    table = get_ip_table()
+    if table is None:
+        return None
+    return table.lookup(ip)
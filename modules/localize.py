@@ -0,0 +1,209 @@
+"""
+Weather app - Localize Module
+Unit systems and languages applied to cached payloads
+
+Upstream data is always fetched and cached in one canonical unit system
+(imperial: °F, mph, miles), so every unit variant of a cell shares one cache
+entry and one upstream call. localize() converts a payload on the way out:
+each converted field is read as a column across all rows (the current
+observation, or every forecast day / hour) and rescaled in one pass with a
+single linear transform, then written back into copies of the rows; slot
+series are already columns and are rescaled directly.
+
+Condition descriptions are translated through a bundled table keyed by
+OpenWeatherMap condition id, one condition per line:
+
+    id  icon  en  fr  es  de
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CONDITIONS = Path(__file__).resolve().parent.parent / "data" / "conditions.tsv"
+
+CANONICAL_UNITS = "imperial"
+
+UNIT_SYSTEMS = {
+    "imperial": {"temperature": "°F", "wind_speed": "mph", "visibility": "mi",
+                 "pressure": "hPa", "precipitation": "mm"},
+    "metric": {"temperature": "°C", "wind_speed": "m/s", "visibility": "km",
+               "pressure": "hPa", "precipitation": "mm"}
+}
+
+# Canonical -> target as (scale, offset): value * scale + offset
+CONVERSIONS = {
+    "imperial": {},
+    "metric": {
+        "temperature": (5 / 9, -160 / 9),  # (°F - 32) * 5/9
+        "wind_speed": (0.44704, 0.0),      # mph -> m/s
+        "visibility": (1.609344, 0.0)      # miles -> km
+    }
+}
+
+# Payload field -> quantity it measures
+FIELDS = {
+    "temperature": "temperature",
+    "feels_like": "temperature",
+    "temp_high": "temperature",
+    "temp_low": "temperature",
+    "wind_speed": "wind_speed",
+    "visibility": "visibility"
+}
+
+LANGUAGES = ("en", "fr", "es", "de")
+
+# Dashboard strings per language
+LABELS = {
+    "en": {"title": "Personal Weather", "feels_like": "Feels Like", "humidity": "Humidity",
+           "wind_speed": "Wind Speed", "visibility": "Visibility", "pressure": "Pressure",
+           "sunrise": "Sunrise", "forecast": "7-Day Forecast", "rain": "rain",
+           "updated": "Last updated",
+           "weekdays": ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")},
+    "fr": {"title": "Météo personnelle", "feels_like": "Ressenti", "humidity": "Humidité",
+           "wind_speed": "Vent", "visibility": "Visibilité", "pressure": "Pression",
+           "sunrise": "Lever du soleil", "forecast": "Prévisions sur 7 jours", "rain": "de pluie",
+           "updated": "Mis à jour",
+           "weekdays": ("lun", "mar", "mer", "jeu", "ven", "sam", "dim")},
+    "es": {"title": "Mi tiempo", "feels_like": "Sensación", "humidity": "Humedad",
+           "wind_speed": "Viento", "visibility": "Visibilidad", "pressure": "Presión",
+           "sunrise": "Amanecer", "forecast": "Previsión a 7 días", "rain": "de lluvia",
+           "updated": "Actualizado",
+           "weekdays": ("lun", "mar", "mié", "jue", "vie", "sáb", "dom")},
+    "de": {"title": "Mein Wetter", "feels_like": "Gefühlt", "humidity": "Luftfeuchtigkeit",
+           "wind_speed": "Wind", "visibility": "Sicht", "pressure": "Luftdruck",
+           "sunrise": "Sonnenaufgang", "forecast": "7-Tage-Vorhersage", "rain": "Regen",
+           "updated": "Aktualisiert",
+           "weekdays": ("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So")}
+}
+
+_conditions: Optional[Dict[int, Tuple[str, Dict[str, str]]]] = None
+_conditions_lock = threading.Lock()
+
+def load_conditions(path: Optional[str] = None) -> Dict[int, Tuple[str, Dict[str, str]]]:
+    """
+    Read the condition table
+
+    Args:
+        path: Table path (default: CONDITIONS_PATH or data/conditions.tsv)
+
+    Returns:
+        Dict mapping condition id to (icon prefix, {language: description})
+    """
+    path = str(path or os.getenv("CONDITIONS_PATH", DEFAULT_CONDITIONS))
+    table = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 2 + len(LANGUAGES):
+                continue
+            table[int(fields[0])] = (fields[1], dict(zip(LANGUAGES, fields[2:])))
+    return table
+
+def get_conditions() -> Dict[int, Tuple[str, Dict[str, str]]]:
+    """
+    Get the shared condition table, loading it on first use
+
+    Returns:
+        Dict mapping condition id to (icon prefix, {language: description})
+    """
+    global _conditions
+    if _conditions is None:
+        with _conditions_lock:
+            if _conditions is None:
+                _conditions = load_conditions()
+    return _conditions
+
+def convert_rows(rows: List[Dict[str, Any]], units: str) -> List[Dict[str, Any]]:
+    """
+    Convert canonical-unit rows to a unit system, column by column
+
+    Args:
+        rows: Payload rows (not modified)
+        units: Target unit system
+
+    Returns:
+        List of converted row copies
+    """
+    converted = [dict(row) for row in rows]
+    for field, quantity in FIELDS.items():
+        transform = CONVERSIONS[units].get(quantity)
+        if transform is None or not converted or field not in converted[0]:
+            continue
+        scale, offset = transform
+        column = [row.get(field) for row in converted]
+        values = [None if value is None else round(value * scale + offset, 2) for value in column]
+        for row, value in zip(converted, values):
+            row[field] = value
+    return converted
+
+def convert_series(series: Dict[str, Any], units: str) -> Dict[str, Any]:
+    """
+    Convert the columns of a slot series (see modules/timeline.py) to a unit system
+
+    Args:
+        series: Field name to typed array (not modified)
+        units: Target unit system
+
+    Returns:
+        Dict with converted copies of the affected columns
+    """
+    converted = dict(series)
+    for field, column in series.items():
+        transform = CONVERSIONS[units].get(FIELDS.get(field))
+        if transform is not None:
+            scale, offset = transform
+            converted[field] = type(column)(column.typecode, [value * scale + offset for value in column])
+    return converted
+
+def translate_rows(rows: List[Dict[str, Any]], lang: str) -> None:
+    """
+    Replace condition descriptions with their translation, in place
+
+    Rows without a known condition_id keep their original description.
+
+    Args:
+        rows: Payload rows
+        lang: Target language
+    """
+    if lang == "en":
+        return
+    conditions = get_conditions()
+    for row in rows:
+        entry = conditions.get(row.get("condition_id"))
+        if entry is not None:
+            row["description"] = entry[1].get(lang, row.get("description", ""))
+
+def localize(payload: Dict[str, Any], units: str = CANONICAL_UNITS,
+             lang: str = "en") -> Dict[str, Any]:
+    """
+    Present a canonical payload in a unit system and language
+
+    Returns a new dict and never modifies the (possibly cached) payload.
+    Error payloads are returned unchanged.
+
+    Args:
+        payload: Normalized current, forecast, hourly or slot series dict
+        units: "imperial" or "metric"
+        lang: One of LANGUAGES
+
+    Returns:
+        Dict with converted values, translated descriptions, and the unit
+        labels and language used
+    """
+    if "error" in payload:
+        return payload
+
+    result = convert_rows([payload], units)[0]
+    rows = [result]
+    for key in ("forecasts", "hours"):
+        if isinstance(payload.get(key), list):
+            result[key] = convert_rows(payload[key], units)
+            rows = result[key]
+    if isinstance(payload.get("series"), dict):
+        result["series"] = convert_series(payload["series"], units)
+    translate_rows(rows, lang)
+    result["units"] = UNIT_SYSTEMS[units]
+    result["lang"] = lang
+    return result
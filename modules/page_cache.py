@@ -0,0 +1,158 @@
+"""
+Weather app - Page Cache Module
+Rendered HTML kept as ready-to-send bytes
+
+A page is fully determined by its key: the location cell, the part it
+renders ("page" for the whole dashboard, or a fragment such as "current" or
+"forecast"), then the display variant and a time bucket, so each part is
+re-rendered at most once per bucket. Each entry stores the UTF-8 body, a
+gzip copy compressed once at store time, and an ETag, so a hit is a
+dictionary lookup and a socket write. The WeatherAPI refresh listener drops
+only the parts of a cell built from the data that changed; in other worker
+processes the time bucket bounds how long an older part can be served.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+# Parts built from each refreshed endpoint
+DEPENDENT_PARTS = {
+    "current": ("page", "current"),
+    "forecast": ("page", "forecast")
+}
+
+class Page(NamedTuple):
+    """A rendered page ready to send"""
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+class PageCache:
+    """
+    Thread-safe LRU of rendered pages, indexed by cell for invalidation
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, bucket: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("PAGE_CACHE_SIZE", 512))
+        self.bucket_seconds = bucket or int(os.getenv("PAGE_CACHE_BUCKET", 60))
+        self._pages: "OrderedDict[Tuple[Any, ...], Page]" = OrderedDict()
+        self._by_cell: Dict[str, Set[Tuple[Any, ...]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bucket(self, now: Optional[float] = None, seconds: Optional[int] = None) -> int:
+        """
+        Get the current time bucket for page keys
+
+        Args:
+            now: Epoch seconds (default: now)
+            seconds: Bucket length (default: PAGE_CACHE_BUCKET)
+
+        Returns:
+            int: Bucket number
+        """
+        return int((time.time() if now is None else now) // (seconds or self.bucket_seconds))
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Page]:
+        """
+        Get a rendered page
+
+        Args:
+            key: Page key: cell, part, then variant fields
+
+        Returns:
+            Page, or None if not cached
+        """
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: Tuple[Any, ...], html: str) -> Page:
+        """
+        Store a rendered page, compressing it once
+
+        Args:
+            key: Page key: cell, part, then variant fields
+            html: Rendered HTML
+
+        Returns:
+            Page: The stored page
+        """
+        body = html.encode("utf-8")
+        page = Page(body, gzip.compress(body, 6), hashlib.blake2b(body, digest_size=12).hexdigest())
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            self._by_cell.setdefault(key[0], set()).add(key)
+            while len(self._pages) > self.max_entries:
+                old_key, _ = self._pages.popitem(last=False)
+                self._unindex(old_key)
+        return page
+
+    def _unindex(self, key: Tuple[Any, ...]) -> None:
+        keys = self._by_cell.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_cell[key[0]]
+
+    def invalidate(self, cell: str, parts: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop a cell's pages
+
+        Args:
+            cell: Grid cell
+            parts: Only drop these parts (default: all of them)
+
+        Returns:
+            int: Number of pages dropped
+        """
+        with self._lock:
+            keys = self._by_cell.get(cell, set())
+            dropped = {key for key in keys if parts is None or key[1] in parts}
+            for key in dropped:
+                self._pages.pop(key, None)
+                self._unindex(key)
+            return len(dropped)
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        """
+        WeatherAPI refresh listener: drop pages built from the old data
+
+        Args:
+            kind: Refreshed endpoint ("current", "forecast", ...)
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+        """
+        if "error" not in data:
+            self.invalidate(cell, DEPENDENT_PARTS.get(kind))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get page cache statistics
+
+        Returns:
+            Dict with size, cells, hits, misses and hit rate
+        """
+        with self._lock:
+            size = len(self._pages)
+            cells = len(self._by_cell)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "cells": cells,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
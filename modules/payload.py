@@ -0,0 +1,38 @@
+"""
+Weather app - Payload Module
+Upstream response decoding
+
+Decodes OpenWeatherMap response bytes directly, skipping the charset
+sniffing and text round-trip of response.json(). Uses orjson when it is
+installed (roughly 2-3x faster on forecast payloads), otherwise the
+standard library decoder; the choice is made on the first call so the
+import stays off the startup path. Normalizers read the handful of fields
+they need straight from the decoded value and drop it on return.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+_loads: Optional[Callable[[Union[bytes, str]], Any]] = None
+
+def decode_payload(content: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON response body
+
+    Args:
+        content: Raw response bytes (or text)
+
+    Returns:
+        Decoded JSON value
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    global _loads
+    if _loads is None:
+        try:
+            import orjson  # deferred: importing it costs ~10 ms of cold start
+            _loads = orjson.loads
+        except ImportError:
+            _loads = json.loads  # optional, falls back to the stdlib decoder
+    return _loads(content)
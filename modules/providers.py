@@ -0,0 +1,572 @@
+"""
+Weather app - Providers Module
+Upstream weather sources behind one interface
+
+Every provider exposes current(), forecast() and bundle() for a point and
+returns the normalized dicts WeatherAPI caches and serves (or an
+{"error": ...} dict). OpenWeatherMapProvider is the default;
+OpenMeteoProvider is a keyless stand-in. HedgedProvider wraps two of them:
+when the primary has not answered within its own recent p95 latency, the
+same query goes to the secondary and the first good answer wins.
+
+Upstream HTTP goes through the pluggable transport in modules.transport
+(network, record or replay). requests (and concurrent.futures, for
+hedging) are imported on first use rather than at startup; they are the
+largest imports on the cold-start path.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from modules.localize import CANONICAL_UNITS, get_conditions
+from modules.payload import decode_payload
+from modules.timeline import day_date, local_day, make_series, summarize_days
+from modules.transport import UpstreamError, get_transport
+
+def http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> bytes:
+    """
+    GET a URL through the process transport (see modules.transport)
+
+    Args:
+        url: Request URL
+        params: Query parameters
+        timeout: Seconds to wait for the server
+
+    Returns:
+        bytes: Response body
+
+    Raises:
+        UpstreamError: If the request fails or returns an error status
+    """
+    return get_transport().get(url, params, timeout)
+
+class OpenWeatherMapProvider:
+    """
+    OpenWeatherMap: 2.5 current/forecast endpoints, One Call 3.0 for bundles
+    """
+
+    name = "openweathermap"
+
+    def __init__(self, api_key: Optional[str] = None,
+                 base_url: str = "https://api.openweathermap.org/data/2.5",
+                 onecall_url: str = "https://api.openweathermap.org/data/3.0/onecall",
+                 timeout: float = 10):
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.base_url = base_url
+        self.onecall_url = onecall_url
+        self.timeout = timeout
+
+    def _fetch(self, url: str, **params: Any) -> Any:
+        # Always the canonical units (°F, mph); other systems are converted locally
+        params.update({"appid": self.api_key, "units": CANONICAL_UNITS})
+        return decode_payload(http_get(url, params, self.timeout))
+
+    def current(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get current weather for given coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict containing current weather data
+        """
+        if not self.api_key:
+            return {"error": "API key not configured"}
+
+        try:
+            data = self._fetch(f"{self.base_url}/weather", lat=lat, lon=lon)
+
+            return {
+                "location": data["name"],
+                "country": data["sys"]["country"],
+                "temperature": data["main"]["temp"],
+                "feels_like": data["main"]["feels_like"],
+                "humidity": data["main"]["humidity"],
+                "pressure": data["main"]["pressure"],
+                "description": data["weather"][0]["description"],
+                "condition_id": data["weather"][0]["id"],
+                "icon": data["weather"][0]["icon"],
+                "wind_speed": data["wind"]["speed"],
+                "wind_direction": data["wind"].get("deg", 0),
+                "visibility": data.get("visibility", 0) / 1609.34,  # Convert to miles
+                "sunrise": datetime.fromtimestamp(data["sys"]["sunrise"]),
+                "sunset": datetime.fromtimestamp(data["sys"]["sunset"]),
+                "rain_1h": data.get("rain", {}).get("1h", 0),  # mm
+                "observed_at": datetime.fromtimestamp(data["dt"]),
+                "utc_offset": data.get("timezone", 0),
+                "timestamp": datetime.now()
+            }
+
+        except UpstreamError as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except (KeyError, ValueError) as e:
+            return {"error": f"Unexpected API response format: {str(e)}"}
+
+    def forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get 5-day forecast for given coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict containing forecast data
+        """
+        if not self.api_key:
+            return {"error": "API key not configured"}
+
+        try:
+            data = self._fetch(f"{self.base_url}/forecast", lat=lat, lon=lon)
+
+            # Slots as columns; days are bucketed in the city's own time zone
+            slots = data["list"]
+            offset = data["city"].get("timezone", 0)
+            times = [item["dt"] for item in slots]
+            columns = {
+                "temperature": [item["main"]["temp"] for item in slots],
+                "feels_like": [item["main"].get("feels_like", item["main"]["temp"]) for item in slots],
+                "humidity": [item["main"]["humidity"] for item in slots],
+                "wind_speed": [item["wind"]["speed"] for item in slots],
+                "rain_chance": [item.get("pop", 0) * 100 for item in slots],  # Probability of precipitation
+                "condition_id": [item["weather"][0]["id"] for item in slots],
+                "description": [item["weather"][0]["description"] for item in slots],
+                "icon": [item["weather"][0]["icon"] for item in slots]
+            }
+
+            return {
+                "location": data["city"]["name"],
+                "country": data["city"]["country"],
+                "forecasts": summarize_days(times, columns, offset),
+                "series": make_series(times, columns),
+                "utc_offset": offset,
+                "step": 10800,
+                "timestamp": datetime.now()
+            }
+
+        except UpstreamError as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except (KeyError, ValueError) as e:
+            return {"error": f"Unexpected API response format: {str(e)}"}
+
+    def bundle(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get current, hourly and daily data from one One Call 3.0 request
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict with "current", "forecast" and "hourly" in the normalized shapes
+        """
+        if not self.api_key:
+            return {"error": "API key not configured"}
+
+        try:
+            return self._normalize_onecall(
+                self._fetch(self.onecall_url, lat=lat, lon=lon, exclude="minutely,alerts")
+            )
+        except UpstreamError as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except (KeyError, ValueError) as e:
+            return {"error": f"Unexpected API response format: {str(e)}"}
+
+    def _normalize_onecall(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # One Call has no place name; callers fall back to the resolved location
+        now = datetime.now()
+        current = data["current"]
+        offset = data.get("timezone_offset", 0)
+
+        return {
+            "current": {
+                "location": "",
+                "country": "",
+                "temperature": current["temp"],
+                "feels_like": current["feels_like"],
+                "humidity": current["humidity"],
+                "pressure": current["pressure"],
+                "description": current["weather"][0]["description"],
+                "condition_id": current["weather"][0]["id"],
+                "icon": current["weather"][0]["icon"],
+                "wind_speed": current["wind_speed"],
+                "wind_direction": current.get("wind_deg", 0),
+                "visibility": current.get("visibility", 0) / 1609.34,  # Convert to miles
+                "sunrise": datetime.fromtimestamp(current["sunrise"]),
+                "sunset": datetime.fromtimestamp(current["sunset"]),
+                "rain_1h": current.get("rain", {}).get("1h", 0),  # mm
+                "observed_at": datetime.fromtimestamp(current["dt"]),
+                "utc_offset": offset,
+                "timestamp": now
+            },
+            "forecast": {
+                "location": "",
+                "country": "",
+                "forecasts": [
+                    {
+                        "date": day_date(local_day(day["dt"], offset)),
+                        "temp_high": day["temp"]["max"],
+                        "temp_low": day["temp"]["min"],
+                        "description": day["weather"][0]["description"],
+                        "condition_id": day["weather"][0]["id"],
+                        "icon": day["weather"][0]["icon"],
+                        "humidity": day["humidity"],
+                        "wind_speed": day["wind_speed"],
+                        "rain_chance": day.get("pop", 0) * 100
+                    }
+                    for day in data["daily"][:7]
+                ],
+                "utc_offset": offset,
+                "timestamp": now
+            },
+            "hourly": {
+                "location": "",
+                "country": "",
+                "hours": [
+                    {
+                        "time": datetime.fromtimestamp(hour["dt"]),
+                        "temperature": hour["temp"],
+                        "feels_like": hour["feels_like"],
+                        "humidity": hour["humidity"],
+                        "wind_speed": hour["wind_speed"],
+                        "description": hour["weather"][0]["description"],
+                        "condition_id": hour["weather"][0]["id"],
+                        "icon": hour["weather"][0]["icon"],
+                        "rain_chance": hour.get("pop", 0) * 100
+                    }
+                    for hour in data["hourly"]
+                ],
+                "timestamp": now
+            }
+        }
+
+# WMO weather interpretation codes -> closest OpenWeatherMap condition id
+WMO_CODES = {
+    0: 800, 1: 801, 2: 802, 3: 804, 45: 741, 48: 741,
+    51: 300, 53: 301, 55: 302, 56: 511, 57: 511,
+    61: 500, 63: 501, 65: 502, 66: 511, 67: 511,
+    71: 600, 73: 601, 75: 602, 77: 600,
+    80: 520, 81: 521, 82: 522, 85: 620, 86: 622,
+    95: 211, 96: 201, 99: 202
+}
+
+class OpenMeteoProvider:
+    """
+    Open-Meteo forecast API (no key needed), normalized to the OpenWeatherMap shapes
+
+    Weather codes map to OpenWeatherMap condition ids, descriptions and
+    icons. Open-Meteo has no place names, so location/country are empty like
+    One Call's.
+    """
+
+    name = "open-meteo"
+
+    CURRENT = ("temperature_2m,relative_humidity_2m,apparent_temperature,is_day,rain,"
+               "weather_code,pressure_msl,wind_speed_10m,wind_direction_10m,visibility")
+    DAILY = ("weather_code,temperature_2m_max,temperature_2m_min,sunrise,sunset,"
+             "precipitation_probability_max,relative_humidity_2m_mean,wind_speed_10m_mean")
+    HOURLY = ("temperature_2m,apparent_temperature,relative_humidity_2m,wind_speed_10m,"
+              "weather_code,precipitation_probability,is_day")
+
+    def __init__(self, base_url: str = "https://api.open-meteo.com/v1/forecast", timeout: float = 10):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def _fetch(self, lat: float, lon: float, **params: Any) -> Any:
+        params.update({
+            "latitude": lat,
+            "longitude": lon,
+            "temperature_unit": "fahrenheit",
+            "wind_speed_unit": "mph",
+            "timezone": "auto",
+            "timeformat": "unixtime"
+        })
+        return decode_payload(http_get(self.base_url, params, self.timeout))
+
+    def _condition(self, code: Any, is_day: Any = 1) -> Dict[str, Any]:
+        condition_id = WMO_CODES.get(int(code or 0), 802)
+        icon, descriptions = get_conditions()[condition_id]
+        return {"description": descriptions["en"], "condition_id": condition_id,
+                "icon": icon + ("d" if is_day else "n")}
+
+    def _normalize(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now()
+        offset = data.get("utc_offset_seconds", 0)
+        result: Dict[str, Any] = {}
+
+        daily = data.get("daily")
+        if daily and "temperature_2m_max" in daily:
+            result["forecast"] = {
+                "location": "",
+                "country": "",
+                "forecasts": [
+                    dict({
+                        "date": day_date(local_day(day_start, offset)),
+                        "temp_high": daily["temperature_2m_max"][i],
+                        "temp_low": daily["temperature_2m_min"][i],
+                        "humidity": int(daily["relative_humidity_2m_mean"][i] or 0),
+                        "wind_speed": daily["wind_speed_10m_mean"][i] or 0,
+                        "rain_chance": daily["precipitation_probability_max"][i] or 0
+                    }, **self._condition(daily["weather_code"][i]))
+                    for i, day_start in enumerate(daily["time"][:7])
+                ],
+                "utc_offset": offset,
+                "timestamp": now
+            }
+
+        current = data.get("current")
+        if current:
+            result["current"] = dict({
+                "location": "",
+                "country": "",
+                "temperature": current["temperature_2m"],
+                "feels_like": current["apparent_temperature"],
+                "humidity": current["relative_humidity_2m"],
+                "pressure": current["pressure_msl"],
+                "wind_speed": current["wind_speed_10m"],
+                "wind_direction": current.get("wind_direction_10m", 0),
+                "visibility": (current.get("visibility") or 0) / 1609.34,  # Convert to miles
+                "sunrise": datetime.fromtimestamp(daily["sunrise"][0]) if daily else None,
+                "sunset": datetime.fromtimestamp(daily["sunset"][0]) if daily else None,
+                "rain_1h": current.get("rain", 0) or 0,  # mm
+                "observed_at": datetime.fromtimestamp(current["time"]),
+                "utc_offset": offset,
+                "timestamp": now
+            }, **self._condition(current["weather_code"], current.get("is_day", 1)))
+
+        hourly = data.get("hourly")
+        if hourly:
+            result["hourly"] = {
+                "location": "",
+                "country": "",
+                "hours": [
+                    dict({
+                        "time": datetime.fromtimestamp(hour_start),
+                        "temperature": hourly["temperature_2m"][i],
+                        "feels_like": hourly["apparent_temperature"][i],
+                        "humidity": hourly["relative_humidity_2m"][i],
+                        "wind_speed": hourly["wind_speed_10m"][i],
+                        "rain_chance": hourly["precipitation_probability"][i] or 0
+                    }, **self._condition(hourly["weather_code"][i], hourly["is_day"][i]))
+                    for i, hour_start in enumerate(hourly["time"])
+                ],
+                "timestamp": now
+            }
+        return result
+
+    def _request(self, section: Optional[str], **params: Any) -> Dict[str, Any]:
+        try:
+            result = self._normalize(self._fetch(**params))
+            return result[section] if section else result
+        except UpstreamError as e:
+            return {"error": f"API request failed: {str(e)}"}
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            return {"error": f"Unexpected API response format: {str(e)}"}
+
+    def current(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get current weather for given coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict containing current weather data
+        """
+        return self._request("current", lat=lat, lon=lon, current=self.CURRENT,
+                             daily="sunrise,sunset", forecast_days=1)
+
+    def forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get 7-day forecast for given coordinates
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict containing forecast data
+        """
+        return self._request("forecast", lat=lat, lon=lon, daily=self.DAILY, forecast_days=7)
+
+    def bundle(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get current, 48-hour hourly and daily data from one request
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            Dict with "current", "forecast" and "hourly" in the normalized shapes
+        """
+        return self._request(None, lat=lat, lon=lon, current=self.CURRENT, daily=self.DAILY,
+                             hourly=self.HOURLY, forecast_days=7, forecast_hours=48)
+
+class HedgedProvider:
+    """
+    Primary provider backed up by a secondary for slow or failed requests
+
+    The hedge delay is the primary's p95 latency over its recent successful
+    calls (HEDGE_DELAY seconds until enough samples exist). A request that
+    has not finished by then, or that fails, is also sent to the secondary;
+    the first good answer is returned and the slower call finishes in the
+    background so its latency still counts.
+
+    The delay is timed from when the primary call starts running, not from
+    when it was queued. If every pool thread is busy for the whole delay,
+    the queued primary is cancelled and called on the caller's thread
+    without a hedge: a saturated pool has no room for a second request.
+    """
+
+    def __init__(self, primary: Any, secondary: Any, window: int = 200,
+                 min_samples: int = 20, default_delay: Optional[float] = None,
+                 max_workers: int = 8):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"{primary.name}+{secondary.name}"
+        self.min_samples = min_samples
+        self.default_delay = default_delay if default_delay is not None else float(os.getenv('HEDGE_DELAY', 1.0))
+        self.max_workers = max_workers
+        self.latencies: Dict[str, Deque[float]] = {
+            primary.name: deque(maxlen=window),
+            secondary.name: deque(maxlen=window)
+        }
+        self.hedged = 0
+        self.secondary_wins = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Any] = None
+        self._executor_pid = 0
+
+    def _pool(self) -> Any:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Shared by primaries and hedges; when every thread is busy, _hedge calls the primary inline
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="hedge")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def hedge_delay(self) -> float:
+        """
+        Get how long to wait on the primary before hedging
+
+        Returns:
+            float: Primary p95 latency in seconds, or the default delay
+        """
+        with self._lock:
+            samples = sorted(self.latencies[self.primary.name])
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _timed(self, provider: Any, method: str, lat: float, lon: float,
+               running: Optional[threading.Event] = None) -> Dict[str, Any]:
+        if running is not None:
+            running.set()
+        started = time.perf_counter()
+        try:
+            result = getattr(provider, method)(lat, lon)
+        except Exception as e:
+            return {"error": f"{provider.name} failed: {str(e)}"}
+        if "error" not in result:
+            with self._lock:
+                self.latencies[provider.name].append(time.perf_counter() - started)
+        return result
+
+    def _hedge(self, method: str, lat: float, lon: float) -> Dict[str, Any]:
+        from concurrent.futures import FIRST_COMPLETED, TimeoutError, wait
+
+        pool = self._pool()
+        delay = self.hedge_delay()
+        running = threading.Event()
+        first = pool.submit(self._timed, self.primary, method, lat, lon, running)
+        if not running.wait(delay) and first.cancel():
+            return self._timed(self.primary, method, lat, lon)
+        try:
+            result = first.result(timeout=delay)
+            if "error" not in result:
+                return result
+            pending = set()
+        except TimeoutError:
+            result = None
+            pending = {first}
+
+        with self._lock:
+            self.hedged += 1
+        second = pool.submit(self._timed, self.secondary, method, lat, lon)
+        pending.add(second)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate = future.result()
+                if "error" not in candidate:
+                    # A hedge still queued behind other calls is no longer needed
+                    for other in pending:
+                        other.cancel()
+                    if future is second:
+                        with self._lock:
+                            self.secondary_wins += 1
+                    return candidate
+                result = result or candidate
+        return result
+
+    def current(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._hedge("current", lat, lon)
+
+    def forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._hedge("forecast", lat, lon)
+
+    def bundle(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._hedge("bundle", lat, lon)
+
+PROVIDERS = {
+    "openweathermap": OpenWeatherMapProvider,
+    "open-meteo": OpenMeteoProvider
+}
+
+def make_provider(name: str, api_key: Optional[str] = None) -> Any:
+    """
+    Build a single provider by name
+
+    Args:
+        name: Key of PROVIDERS; unknown names fall back to openweathermap
+        api_key: OpenWeatherMap API key (defaults to OPENWEATHER_API_KEY)
+
+    Returns:
+        Provider instance
+    """
+    if name not in PROVIDERS:
+        print(f"Warning: unknown weather provider {name!r}, using openweathermap")
+        name = "openweathermap"
+    if name == "openweathermap":
+        return OpenWeatherMapProvider(api_key)
+    return PROVIDERS[name]()
+
+def build_provider(api_key: Optional[str] = None) -> Any:
+    """
+    Build the upstream provider configured by the environment
+
+    WEATHER_PROVIDER picks the primary (default openweathermap); setting
+    WEATHER_HEDGE_PROVIDER hedges slow or failed primary calls to it.
+
+    Args:
+        api_key: OpenWeatherMap API key (defaults to OPENWEATHER_API_KEY)
+
+    Returns:
+        A provider, or a HedgedProvider over two of them
+    """
+    primary = make_provider(os.getenv('WEATHER_PROVIDER', 'openweathermap').lower(), api_key)
+    hedge = os.getenv('WEATHER_HEDGE_PROVIDER', '').lower()
+    if not hedge or hedge == primary.name:
+        return primary
+    return HedgedProvider(primary, make_provider(hedge, api_key))
@@ -0,0 +1,387 @@
+"""
+Weather app - Quota Module
+Upstream call budget: usage tracking, projection and TTL tuning
+
+The upstream plan allows QUOTA_DAILY_LIMIT (1000) calls a day. Every
+upstream fetch is counted per UTC day in SQLite, shared by all worker
+processes. Expected usage under a refresh policy (cache TTLs, grid
+precision, warm set budget) is projected two ways:
+
+- model(): closed form. With requests to a cached key arriving at rate r
+  and a TTL of T seconds, the key expires and is refetched on the next
+  request, once per T + 1/r seconds on average, so each key costs
+  r / (1 + r*T) calls per second.
+- simulate(): replays the access log's recorded (cell, hour) counts for
+  the last few days, spreading each hour's requests evenly over it, and
+  walks each key's expiry. Coarser grid precisions are evaluated by
+  merging cells into their shorter geohash prefix.
+
+Both assume every request reads current weather and the forecast, as the
+dashboard does (one bundle key under the current TTL in onecall mode), and
+both count the warm set's daily budget as spent in full.
+
+tune() picks the freshest TTL pair, never fresher than the configured ones,
+whose projected calls for the rest of today, plus the calls already made and
+the warm set budget left, stay under the limit less QUOTA_HEADROOM, and
+applies it. Each process retunes itself from the shared logs at most every
+QUOTA_TUNE_INTERVAL seconds, so all of them arrive at the same TTLs.
+"""
+
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from modules.sqlite_store import SQLiteStore
+
+DEFAULT_QUOTA_DB = Path(__file__).resolve().parent.parent / "data" / "quota.sqlite"
+
+# TTL candidates tried by tune(), in seconds
+CURRENT_TTLS = (300, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200)
+FORECAST_TTLS = (3600, 10800, 21600, 43200, 86400)
+
+class QuotaTracker(SQLiteStore):
+    """
+    Upstream calls per UTC day in SQLite
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 10.0,
+                 retention_days: int = 90):
+        super().__init__(str(path or os.getenv("QUOTA_DB", DEFAULT_QUOTA_DB)))
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._buffer: Dict[int, int] = {}
+        self._flushed = time.time()
+        connection = self._connect()
+        connection.execute("CREATE TABLE IF NOT EXISTS calls (day INTEGER PRIMARY KEY, calls INTEGER)")
+        # The warm set's share of the calls, so its daily budget outlives the worker that spends it
+        connection.execute("CREATE TABLE IF NOT EXISTS warm (day INTEGER PRIMARY KEY, calls INTEGER)")
+
+    def record(self, calls: int = 1, when: Optional[float] = None) -> None:
+        """
+        Count upstream calls
+
+        Args:
+            calls: Number of calls made
+            when: Call time in epoch seconds (default: now)
+        """
+        now = time.time()
+        day = int((now if when is None else when) // 86400)
+        with self._lock:
+            self._buffer[day] = self._buffer.get(day, 0) + calls
+            due = now - self._flushed >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered counts and drop expired days
+
+        Returns:
+            int: Number of calls written
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+            self._flushed = time.time()
+        if not buffer:
+            return 0
+
+        written = self._write([
+            ("INSERT INTO calls VALUES (?, ?) "
+             "ON CONFLICT (day) DO UPDATE SET calls = calls + excluded.calls",
+             list(buffer.items())),
+            ("DELETE FROM calls WHERE day < ?", [(max(buffer) - self.retention_days,)])
+        ], "quota usage")
+        return sum(buffer.values()) if written else 0
+
+    def used(self, when: Optional[float] = None) -> int:
+        """
+        Get the calls made on a UTC day, including this process's unflushed ones
+
+        Args:
+            when: Any time on the day in epoch seconds (default: now)
+
+        Returns:
+            int: Upstream calls that day
+        """
+        day = int((time.time() if when is None else when) // 86400)
+        row = self._connect().execute("SELECT calls FROM calls WHERE day = ?", (day,)).fetchone()
+        with self._lock:
+            pending = self._buffer.get(day, 0)
+        return (row[0] if row else 0) + pending
+
+    def record_warm(self, calls: int, when: Optional[float] = None) -> bool:
+        """
+        Count calls spent pre-warming, written at once
+
+        Args:
+            calls: Number of calls made
+            when: Call time in epoch seconds (default: now)
+
+        Returns:
+            bool: True if written
+        """
+        day = int((time.time() if when is None else when) // 86400)
+        return self._write([
+            ("INSERT INTO warm VALUES (?, ?) "
+             "ON CONFLICT (day) DO UPDATE SET calls = calls + excluded.calls",
+             [(day, calls)]),
+            ("DELETE FROM warm WHERE day < ?", [(day - self.retention_days,)])
+        ], "warm-set usage")
+
+    def warm_used(self, when: Optional[float] = None) -> int:
+        """
+        Get the calls spent pre-warming on a UTC day, by any process
+
+        Args:
+            when: Any time on the day in epoch seconds (default: now)
+
+        Returns:
+            int: Pre-warm calls that day
+        """
+        day = int((time.time() if when is None else when) // 86400)
+        row = self._connect().execute("SELECT calls FROM warm WHERE day = ?", (day,)).fetchone()
+        return row[0] if row else 0
+
+    def history(self, days: int = 7, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Get daily usage for the last few days
+
+        Args:
+            days: Number of days, today included
+            now: Reference time in epoch seconds (default: now)
+
+        Returns:
+            List of {"day": epoch seconds at UTC midnight, "calls": count}, oldest first
+        """
+        self.flush()
+        today = int((time.time() if now is None else now) // 86400)
+        rows = dict(self._connect().execute(
+            "SELECT day, calls FROM calls WHERE day > ?", (today - days,)
+        ).fetchall())
+        return [{"day": day * 86400, "calls": rows.get(day, 0)} for day in range(today - days + 1, today + 1)]
+
+def replay(rows: Iterable[Tuple[str, int, int]], ttl: float) -> List[int]:
+    """
+    Count the upstream calls one cached key per cell makes under recorded traffic
+
+    Each hour's requests are spread evenly over the hour; a request after
+    the key expired refetches it.
+
+    Args:
+        rows: (cell, epoch hour, hits), ordered by cell then hour
+        ttl: Cache lifetime in seconds
+
+    Returns:
+        List of 24 call counts, by UTC hour of day
+    """
+    calls = [0] * 24
+    cell, expires = None, float("-inf")
+    for row_cell, hour, hits in rows:
+        if row_cell != cell:
+            cell, expires = row_cell, float("-inf")
+        spacing = 3600 / hits
+        first = hour * 3600 + spacing / 2
+        index = 0
+        while index < hits:
+            arrival = first + index * spacing
+            if arrival >= expires:
+                calls[hour % 24] += 1
+                expires = arrival + ttl
+            # Jump to the first request after the key expires
+            index = max(index + 1, math.ceil((expires - first) / spacing))
+    return calls
+
+class QuotaPlanner:
+    """
+    Projects daily upstream calls for a refresh policy and tunes the cache TTLs to fit
+    """
+
+    def __init__(self, weather_api: Any, warm_set: Any, tracker: Optional[QuotaTracker] = None,
+                 limit: Optional[int] = None, headroom: Optional[float] = None,
+                 days: Optional[int] = None, tune_interval: Optional[int] = None):
+        self.weather_api = weather_api
+        self.warm_set = warm_set
+        self.tracker = tracker or QuotaTracker()
+        self.limit = limit if limit is not None else int(os.getenv("QUOTA_DAILY_LIMIT", 1000))
+        self.headroom = headroom if headroom is not None else float(os.getenv("QUOTA_HEADROOM", 0.1))
+        self.days = days or int(os.getenv("QUOTA_HISTORY_DAYS", 7))
+        self.tune_interval = (tune_interval if tune_interval is not None
+                              else int(os.getenv("QUOTA_TUNE_INTERVAL", 3600)))
+        # Tuning only ever lengthens the configured TTLs
+        self.base_ttls = (weather_api.current_ttl, weather_api.forecast_ttl)
+        self.last_tune: Optional[Dict[str, Any]] = None
+        self._tuned = 0.0
+        self._lock = threading.Lock()
+        weather_api.quota = self.tracker
+
+    def _ttls(self, current_ttl: float, forecast_ttl: float) -> List[float]:
+        if self.weather_api.mode == "onecall":
+            return [current_ttl]
+        return [current_ttl, forecast_ttl]
+
+    def model(self, requests_per_day: float, cells: int, current_ttl: Optional[float] = None,
+              forecast_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Project a day's upstream calls in closed form
+
+        Args:
+            requests_per_day: Requests expected per day
+            cells: Distinct grid cells they spread over (evenly)
+            current_ttl: Current weather TTL (default: the active one)
+            forecast_ttl: Forecast TTL (default: the active one)
+
+        Returns:
+            Dict with request-driven calls, warm set calls, the total and the hit rate
+        """
+        ttls = self._ttls(current_ttl or self.weather_api.current_ttl,
+                          forecast_ttl or self.weather_api.forecast_ttl)
+        rate = requests_per_day / cells / 86400 if cells else 0.0
+        calls = sum(cells * 86400 * rate / (1 + rate * ttl) for ttl in ttls)
+        reads = requests_per_day * len(ttls)
+        warm_calls = self.warm_set.daily_budget if self.warm_set.interval > 0 else 0
+        return {
+            "requests": round(requests_per_day, 1),
+            "cells": cells,
+            "calls": round(calls, 1),
+            "warm_calls": warm_calls,
+            "total": round(calls + warm_calls, 1),
+            "hit_rate": round(1 - calls / reads, 3) if reads else None
+        }
+
+    def traffic(self, precision: Optional[int] = None,
+                now: Optional[float] = None) -> Tuple[List[Tuple[str, int, int]], float]:
+        """
+        Load the recorded traffic the simulation replays
+
+        Args:
+            precision: Grid precision to merge cells to (default: the active one)
+            now: Reference time in epoch seconds (default: now)
+
+        Returns:
+            Tuple of (rows of (cell, hour, hits), whole days of traffic they span)
+        """
+        self.warm_set.access_log.flush()
+        # Up to and including the current hour
+        until = int((time.time() if now is None else now) // 3600) + 1
+        precision = min(precision or self.weather_api.precision, self.weather_api.precision)
+        rows = self.warm_set.access_log.counts(until - self.days * 24, until, precision)
+        first = min((hour for _, hour, _ in rows), default=until - 24)
+        return rows, max(1, math.ceil((until - first) / 24))
+
+    def simulate(self, current_ttl: Optional[float] = None, forecast_ttl: Optional[float] = None,
+                 precision: Optional[int] = None, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Project a day's upstream calls by replaying recorded traffic
+
+        Args:
+            current_ttl: Current weather TTL (default: the active one)
+            forecast_ttl: Forecast TTL (default: the active one)
+            precision: Grid precision, at most the active one (default: the active one)
+            now: Reference time in epoch seconds (default: now)
+
+        Returns:
+            Dict with mean daily requests, cells and calls, warm set calls,
+            the total, the hit rate and calls by UTC hour
+        """
+        rows, days = self.traffic(precision, now)
+        ttls = self._ttls(current_ttl or self.weather_api.current_ttl,
+                          forecast_ttl or self.weather_api.forecast_ttl)
+        by_hour = [0.0] * 24
+        for ttl in ttls:
+            for hour, calls in enumerate(replay(rows, ttl)):
+                by_hour[hour] += calls / days
+        requests = sum(hits for _, _, hits in rows) / days
+        calls = sum(by_hour)
+        reads = requests * len(ttls)
+        warm_calls = self.warm_set.daily_budget if self.warm_set.interval > 0 else 0
+        return {
+            "days": days,
+            "requests": round(requests, 1),
+            "cells": len({cell for cell, _, _ in rows}),
+            "calls": round(calls, 1),
+            "warm_calls": warm_calls,
+            "total": round(calls + warm_calls, 1),
+            "hit_rate": round(1 - calls / reads, 3) if reads else None,
+            "by_hour": [round(value, 2) for value in by_hour]
+        }
+
+    def tune(self, apply: bool = True, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Choose the freshest TTLs that keep today's projected calls under budget
+
+        Each endpoint's calls depend only on its own TTL, so every candidate
+        TTL is replayed once and the pairs are scored from those curves.
+
+        Args:
+            apply: Set the chosen TTLs on the WeatherAPI
+            now: Reference time in epoch seconds (default: now)
+
+        Returns:
+            Dict with the chosen TTLs, today's used and projected calls, the
+            target and whether the projection fits it
+        """
+        now = time.time() if now is None else now
+        rows, days = self.traffic(None, now)
+        hour_of_day = int(now // 3600) % 24
+        used = self.tracker.used(now)
+        warm_calls = self.warm_set.remaining_budget(now) if self.warm_set.interval > 0 else 0
+        target = self.limit * (1 - self.headroom)
+
+        # Calls from this hour to midnight, per TTL
+        rest = {}
+        for ttl in set(CURRENT_TTLS + FORECAST_TTLS + self.base_ttls):
+            rest[ttl] = sum(replay(rows, ttl)[hour_of_day:]) / days
+
+        base_current, base_forecast = self.base_ttls
+        candidates = sorted(
+            ((current_ttl, forecast_ttl)
+             for current_ttl in set(CURRENT_TTLS + (base_current,)) if current_ttl >= base_current
+             for forecast_ttl in set(FORECAST_TTLS + (base_forecast,)) if forecast_ttl >= base_forecast),
+            key=lambda pair: (pair[0] / base_current + pair[1] / base_forecast, pair)
+        )
+        projected = None
+        for current_ttl, forecast_ttl in candidates:
+            projected = used + warm_calls + sum(rest[ttl] for ttl in self._ttls(current_ttl, forecast_ttl))
+            if projected <= target:
+                break
+
+        if apply:
+            self.weather_api.current_ttl = current_ttl
+            self.weather_api.forecast_ttl = forecast_ttl
+        self.last_tune = {
+            "time": int(now),
+            "current_ttl": current_ttl,
+            "forecast_ttl": forecast_ttl,
+            "used": used,
+            "projected": round(projected, 1),
+            "target": round(target, 1),
+            "fits": projected <= target
+        }
+        return self.last_tune
+
+    def maybe_tune(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Retune if QUOTA_TUNE_INTERVAL has passed since the last run (0 disables it)
+
+        Only one thread per process tunes; the others carry on at once.
+
+        Returns:
+            The tune result, or None if no tuning ran
+        """
+        now = time.time() if now is None else now
+        if self.tune_interval <= 0 or now - self._tuned < self.tune_interval:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._tuned = now
+            return self.tune(now=now)
+        except Exception as e:
+            print(f"Warning: quota tuning failed: {e}")
+            return None
+        finally:
+            self._lock.release()
@@ -0,0 +1,565 @@
+"""
+Weather app - Redis Cache Module
+Cluster-wide cache tier over the Redis protocol
+
+With several hosts behind a load balancer, per-host caches multiply upstream
+calls by the host count. RemoteCache keeps cached weather in any server that
+speaks RESP (Redis, Valkey, KeyDB, ...) so every node shares one copy per
+cell. It sits behind the process-local tier in a TieredCache, exactly like
+the SQLite host tier.
+
+The client is deliberately small: one socket per thread and process, and
+batches sent as a pipeline (all commands written at once, then all replies
+read), so a multi-key lookup is one MGET round trip. Values use a compact
+tagged binary encoding of the normalized models (dicts, lists, numbers,
+strings, dates); repeated strings such as the field names of every forecast
+row are written once and referenced by index after that.
+
+The tier also hands out refresh leases (SET NX PX on a companion key), so
+when a cell expires only one node in the cluster calls upstream for it; a
+lease is released with a compare-and-delete script so a holder that ran
+past its lease cannot drop a newer holder's lease.
+
+When the server cannot be reached the tier reports misses and drops writes
+for REDIS_RETRY_INTERVAL seconds instead of failing requests, so the app
+keeps running on its local tier (and refreshes without leases).
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from modules.weather_cache import NO_LEASE
+
+CODEC_VERSION = 1
+
+# Delete a lease only if it still holds our token
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+_DOUBLE = struct.Struct("<d")
+_HEADER = struct.Struct("<Bd")  # codec version, expires_at
+
+class RedisError(Exception):
+    """Error reply from the server, or a protocol violation"""
+
+class RedisClient:
+    """
+    Minimal pipelining RESP2 client
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: Optional[float] = None):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout if timeout is not None else float(os.getenv("REDIS_TIMEOUT", 0.25))
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: Optional[float] = None) -> "RedisClient":
+        """
+        Build a client from a redis://[:password@]host[:port][/db] URL
+
+        Args:
+            url: Server URL
+            timeout: Socket timeout in seconds (default: REDIS_TIMEOUT)
+
+        Returns:
+            RedisClient: Unconnected client
+        """
+        parsed = urlparse(url)
+        db = parsed.path.strip("/")
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379,
+                   int(db) if db else 0, parsed.password, timeout)
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        # Replies are read off the socket in order, so two threads (or a forked
+        # child and its parent) sharing one would read each other's replies
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = (sock, sock.makefile("rb"))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            setup = ([("AUTH", self.password)] if self.password else []) + ([("SELECT", self.db)] if self.db else [])
+            for reply in self.pipeline(setup) if setup else []:
+                if isinstance(reply, RedisError):
+                    self.close()
+                    raise reply
+        return connection
+
+    def close(self) -> None:
+        """Close this thread's connection, if any"""
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection[1].close()
+                connection[0].close()
+            except OSError:
+                pass
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Send commands in one write and read all their replies
+
+        Args:
+            commands: Commands as (name, arg, ...) sequences
+
+        Returns:
+            List of replies in command order; error replies are returned as
+            RedisError instances so the remaining replies stay aligned
+
+        Raises:
+            OSError: If the connection fails (it is closed and reopened on
+                the next call)
+        """
+        sock, reader = self._connect()
+        try:
+            sock.sendall(b"".join(encode_command(command) for command in commands))
+            return [read_reply(reader) for _ in commands]
+        except (OSError, RedisError):
+            self.close()
+            raise
+
+    def execute(self, *command: Any) -> Any:
+        """
+        Run a single command
+
+        Returns:
+            The reply
+
+        Raises:
+            RedisError: On an error reply
+            OSError: If the connection fails
+        """
+        reply = self.pipeline([command])[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+def encode_command(command: Sequence[Any]) -> bytes:
+    """
+    Encode one command as a RESP array of bulk strings
+
+    Args:
+        command: Command name and arguments (bytes, str or numbers)
+
+    Returns:
+        bytes: Wire format
+    """
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+def read_reply(reader: Any) -> Any:
+    """
+    Read one RESP2 reply
+
+    Args:
+        reader: Buffered binary file over the socket
+
+    Returns:
+        bytes, int, None, list of replies, or a RedisError for "-" replies
+
+    Raises:
+        RedisError: If the stream is not valid RESP
+        ConnectionError: If the server closed the connection
+    """
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        return RedisError(rest.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("Connection closed by server")
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [read_reply(reader) for _ in range(count)]
+    raise RedisError(f"Unexpected reply type {kind!r}")
+
+def _pack_uint(number: int, out: bytearray) -> None:
+    # Unsigned LEB128 varint
+    while number > 0x7F:
+        out.append((number & 0x7F) | 0x80)
+        number >>= 7
+    out.append(number)
+
+def _unpack_uint(buf: bytes, pos: int) -> Tuple[int, int]:
+    number, shift = 0, 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, pos
+        shift += 7
+
+def _pack(value: Any, out: bytearray, strings: Dict[str, int]) -> None:
+    # Tags: N None, T/F bools, i/j non-negative/negative int, d float,
+    # s new string (added to the table), r string table reference, b bytes,
+    # l list, m dict, D date (ordinal), t datetime (ordinal, microseconds of day),
+    # a typed array (type code, item count, little-endian items)
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int):
+        out += b"i" if value >= 0 else b"j"
+        _pack_uint(abs(value), out)
+    elif isinstance(value, float):
+        out += b"d"
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        index = strings.get(value)
+        if index is None:
+            strings[value] = len(strings)
+            data = value.encode("utf-8")
+            out += b"s"
+            _pack_uint(len(data), out)
+            out += data
+        else:
+            out += b"r"
+            _pack_uint(index, out)
+    elif isinstance(value, (list, tuple)):
+        out += b"l"
+        _pack_uint(len(value), out)
+        for item in value:
+            _pack(item, out, strings)
+    elif isinstance(value, dict):
+        out += b"m"
+        _pack_uint(len(value), out)
+        for key, item in value.items():
+            _pack(key, out, strings)
+            _pack(item, out, strings)
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            raise TypeError("Aware datetimes are not supported")
+        out += b"t"
+        _pack_uint(value.toordinal(), out)
+        _pack_uint(((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond, out)
+    elif isinstance(value, date):
+        out += b"D"
+        _pack_uint(value.toordinal(), out)
+    elif isinstance(value, bytes):
+        out += b"b"
+        _pack_uint(len(value), out)
+        out += value
+    elif isinstance(value, array):
+        out += b"a" + value.typecode.encode("ascii")
+        _pack_uint(len(value), out)
+        if sys.byteorder == "big":
+            value = array(value.typecode, value)
+            value.byteswap()
+        out += value.tobytes()
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def _unpack(buf: bytes, pos: int, strings: List[str]) -> Tuple[Any, int]:
+    tag = buf[pos:pos + 1]
+    pos += 1
+    if tag == b"r":
+        index, pos = _unpack_uint(buf, pos)
+        return strings[index], pos
+    if tag == b"s":
+        length, pos = _unpack_uint(buf, pos)
+        text = buf[pos:pos + length].decode("utf-8")
+        strings.append(text)
+        return text, pos + length
+    if tag == b"d":
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + 8
+    if tag == b"i" or tag == b"j":
+        number, pos = _unpack_uint(buf, pos)
+        return (number if tag == b"i" else -number), pos
+    if tag == b"m":
+        count, pos = _unpack_uint(buf, pos)
+        result = {}
+        for _ in range(count):
+            key, pos = _unpack(buf, pos, strings)
+            result[key], pos = _unpack(buf, pos, strings)
+        return result, pos
+    if tag == b"l":
+        count, pos = _unpack_uint(buf, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _unpack(buf, pos, strings)
+            items.append(item)
+        return items, pos
+    if tag == b"N":
+        return None, pos
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", pos
+    if tag == b"t":
+        ordinal, pos = _unpack_uint(buf, pos)
+        micros, pos = _unpack_uint(buf, pos)
+        seconds, micro = divmod(micros, 1000000)
+        return datetime.fromordinal(ordinal).replace(hour=seconds // 3600, minute=seconds // 60 % 60,
+                                                     second=seconds % 60, microsecond=micro), pos
+    if tag == b"D":
+        ordinal, pos = _unpack_uint(buf, pos)
+        return date.fromordinal(ordinal), pos
+    if tag == b"b":
+        length, pos = _unpack_uint(buf, pos)
+        return bytes(buf[pos:pos + length]), pos + length
+    if tag == b"a":
+        items = array(buf[pos:pos + 1].decode("ascii"))
+        count, pos = _unpack_uint(buf, pos + 1)
+        end = pos + count * items.itemsize
+        items.frombytes(buf[pos:end])
+        if sys.byteorder == "big":
+            items.byteswap()
+        return items, end
+    raise ValueError(f"Unknown tag {tag!r} at offset {pos - 1}")
+
+def encode_value(value: Any, expires_at: float) -> bytes:
+    """
+    Encode a cache entry
+
+    Args:
+        value: Normalized payload (dicts, lists, str, int, float, bool,
+            None, bytes, typed arrays, date and naive datetime)
+        expires_at: Epoch seconds after which the entry is stale
+
+    Returns:
+        bytes: Versioned binary entry
+
+    Raises:
+        TypeError: If the value holds an unsupported type
+    """
+    out = bytearray(_HEADER.pack(CODEC_VERSION, expires_at))
+    _pack(value, out, {})
+    return bytes(out)
+
+def decode_value(data: bytes) -> Tuple[float, Any]:
+    """
+    Decode a cache entry written by encode_value
+
+    Args:
+        data: Binary entry
+
+    Returns:
+        Tuple of (expires_at, value)
+
+    Raises:
+        ValueError: If the entry is corrupt or from another codec version
+    """
+    if len(data) < _HEADER.size or data[0] != CODEC_VERSION:
+        raise ValueError("Unsupported cache entry")
+    expires_at = _HEADER.unpack_from(data)[1]
+    try:
+        value, pos = _unpack(data, _HEADER.size, [])
+    except (IndexError, UnicodeDecodeError, struct.error) as e:
+        raise ValueError(f"Corrupt cache entry: {e}")
+    if pos != len(data):
+        raise ValueError("Trailing bytes in cache entry")
+    return expires_at, value
+
+class RemoteCache:
+    """
+    TTL cache in a Redis-compatible server, shared by every node (the remote tier)
+
+    Entries are kept for their TTL plus the stale grace period; the
+    freshness deadline travels inside the encoded value.
+    """
+
+    def __init__(self, client: RedisClient, prefix: Optional[str] = None, stale_ttl: int = 3600,
+                 retry_interval: Optional[float] = None, batch_size: int = 100):
+        self.client = client
+        self.prefix = prefix if prefix is not None else os.getenv("REDIS_PREFIX", "weather:")
+        self.stale_ttl = stale_ttl
+        self.retry_interval = retry_interval if retry_interval is not None else float(os.getenv("REDIS_RETRY_INTERVAL", 5))
+        self.batch_size = batch_size
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.leases = {"acquired": 0, "contended": 0}
+        self._down_until = 0.0
+
+    def _call(self, commands: Sequence[Sequence[Any]]) -> Optional[List[Any]]:
+        # Pipeline the commands, or None while the server is marked unavailable
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            replies = self.client.pipeline(commands)
+        except (OSError, RedisError) as e:
+            self.errors += 1
+            if not self._down_until:
+                print(f"Warning: remote cache unavailable, using the local tier: {e}")
+            self._down_until = time.monotonic() + self.retry_interval
+            return None
+        self._down_until = 0.0
+        return replies
+
+    def available(self) -> bool:
+        """
+        Check whether the server is currently being used
+
+        Returns:
+            bool: False while the tier is backing off after a failure
+        """
+        return time.monotonic() >= self._down_until
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[float, Any]]:
+        """
+        Get several entries with their expiry times in one round trip
+
+        Keys are split into MGET commands of batch_size keys, all sent as
+        one pipeline.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of key to (expires_at, value) for every fresh or stale entry
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        chunks = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        replies = self._call([("MGET",) + tuple(self.prefix + key for key in chunk) for chunk in chunks])
+        if replies is None:
+            return {}
+
+        entries = {}
+        for chunk, reply in zip(chunks, replies):
+            if not isinstance(reply, list):
+                self.errors += 1
+                continue
+            for key, data in zip(chunk, reply):
+                if data is None:
+                    continue
+                try:
+                    entries[key] = decode_value(data)
+                except ValueError:
+                    self.errors += 1
+        return entries
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """
+        Get an entry with its expiry time, fresh or stale
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (expires_at, value), or None if missing or unreachable
+        """
+        return self.get_entries([key]).get(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        now = time.time()
+        found = {key: value for key, (expires_at, value) in self.get_entries(keys).items() if expires_at > now}
+        self.hits += len(found)
+        self.misses += len(set(keys)) - len(found)
+        return found
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            data = encode_value(value, time.time() + ttl)
+        except TypeError as e:
+            print(f"Warning: not caching {key} remotely: {e}")
+            return
+        self._call([("SET", self.prefix + key, data, "PX", int((ttl + self.stale_ttl) * 1000))])
+
+    def delete(self, key: str) -> None:
+        self._call([("DEL", self.prefix + key)])
+
+    def clear(self) -> None:
+        # Only this app's keys: walk them with SCAN and delete each page
+        cursor = b"0"
+        while True:
+            replies = self._call([("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 500)])
+            if replies is None or not isinstance(replies[0], list):
+                return
+            cursor, keys = replies[0]
+            if keys:
+                self._call([("DEL",) + tuple(keys)])
+            if cursor == b"0":
+                return
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Take the cluster-wide refresh lease for a key
+
+        Args:
+            key: Cache key about to be refreshed
+            ttl: Seconds after which the lease lapses if never released
+
+        Returns:
+            Lease token if this caller should refresh, None if another node
+            holds the lease, or NO_LEASE if the server is unavailable (refresh
+            without coordination)
+        """
+        token = os.urandom(8).hex()
+        replies = self._call([("SET", f"{self.prefix}lease:{key}", token, "NX", "PX", int(ttl * 1000))])
+        if replies is None or isinstance(replies[0], RedisError):
+            return NO_LEASE
+        if replies[0] is None:
+            self.leases["contended"] += 1
+            return None
+        self.leases["acquired"] += 1
+        return token
+
+    def release(self, key: str, token: str) -> None:
+        """
+        Give up a refresh lease, unless it already lapsed and was taken over
+
+        Args:
+            key: Cache key that was refreshed
+            token: Token returned by acquire()
+        """
+        if token != NO_LEASE:
+            self._call([("EVAL", RELEASE_SCRIPT, 1, f"{self.prefix}lease:{key}", token)])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "available": self.available(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "leases": dict(self.leases),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,190 @@
+"""
+Weather app - Rollups Module
+Incremental daily/weekly/monthly aggregates of observations
+
+Each ingested observation updates one row per period (day, week, month) in
+a SQLite table, so long-range history queries read a few hundred
+precomputed rows instead of scanning raw points. Buckets are UTC; weeks
+start on Monday.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from modules.history_store import to_epoch
+from modules.sqlite_store import SQLiteStore
+
+DEFAULT_ROLLUP_DB = Path(__file__).resolve().parent.parent / "data" / "rollups.sqlite"
+
+PERIODS = ("day", "week", "month")
+
+# Gaps longer than this are not credited with rainfall
+MAX_RAIN_INTERVAL = 3600
+
+def period_start(epoch: int, period: str) -> int:
+    """
+    Get the start of the UTC bucket containing a time
+
+    Args:
+        epoch: Epoch seconds
+        period: "day", "week" or "month"
+
+    Returns:
+        int: Bucket start in epoch seconds
+    """
+    day = epoch - epoch % 86400
+    if period == "day":
+        return day
+    moment = datetime.fromtimestamp(day, tz=timezone.utc)
+    if period == "week":
+        return int((moment - timedelta(days=moment.weekday())).timestamp())
+    if period == "month":
+        return int(moment.replace(day=1).timestamp())
+    raise ValueError(f"Unknown period: {period}")
+
+class RollupStore(SQLiteStore):
+    """
+    SQLite-backed incremental aggregates per cell and period
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(str(path or os.getenv("ROLLUP_DB", DEFAULT_ROLLUP_DB)))
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            "cell TEXT, period TEXT, start INTEGER, count INTEGER, "
+            "temp_sum REAL, temp_min REAL, temp_max REAL, humidity_sum REAL, "
+            "wind_max REAL, precip_mm REAL, "
+            "PRIMARY KEY (cell, period, start)) WITHOUT ROWID"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS last_seen (cell TEXT PRIMARY KEY, observed INTEGER)"
+        )
+
+    def ingest(self, cell: str, observation: Dict[str, Any]) -> bool:
+        """
+        Fold one observation into the day, week and month rollups
+
+        Rainfall is integrated from the rain_1h rate over the time since
+        the cell's previous observation (capped at an hour).
+
+        Args:
+            cell: Grid cell
+            observation: Normalized current-weather dict
+
+        Returns:
+            bool: True if applied, False if not newer than the last one
+        """
+        observed = to_epoch(observation.get("observed_at") or observation["timestamp"])
+        temperature = float(observation["temperature"])
+        humidity = float(observation.get("humidity", 0))
+        wind = float(observation.get("wind_speed", 0))
+        rain_rate = float(observation.get("rain_1h", 0) or 0)
+
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT observed FROM last_seen WHERE cell = ?", (cell,)
+            ).fetchone()
+            if row is not None and observed <= row[0]:
+                connection.execute("ROLLBACK")
+                return False
+
+            interval = observed - row[0] if row is not None else 0
+            precip = rain_rate * min(interval, MAX_RAIN_INTERVAL) / 3600
+
+            for period in PERIODS:
+                connection.execute(
+                    "INSERT INTO rollups VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (cell, period, start) DO UPDATE SET "
+                    "count = count + 1, temp_sum = temp_sum + excluded.temp_sum, "
+                    "temp_min = MIN(temp_min, excluded.temp_min), "
+                    "temp_max = MAX(temp_max, excluded.temp_max), "
+                    "humidity_sum = humidity_sum + excluded.humidity_sum, "
+                    "wind_max = MAX(wind_max, excluded.wind_max), "
+                    "precip_mm = precip_mm + excluded.precip_mm",
+                    (cell, period, period_start(observed, period), temperature,
+                     temperature, temperature, humidity, wind, precip)
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO last_seen VALUES (?, ?)", (cell, observed)
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        return True
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        """
+        WeatherAPI refresh listener: fold fresh current observations in
+
+        Args:
+            kind: Refreshed endpoint ("current", "forecast", ...)
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+        """
+        if kind == "current" and "error" not in data:
+            try:
+                self.ingest(cell, data)
+            except (sqlite3.Error, KeyError, ValueError) as e:
+                print(f"Warning: could not update rollups for {cell}: {e}")
+
+    def query(self, cell: str, period: str, start: int, end: int) -> List[Dict[str, Any]]:
+        """
+        Get aggregates for buckets overlapping a time range
+
+        Args:
+            cell: Grid cell
+            period: "day", "week" or "month"
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds)
+
+        Returns:
+            List of buckets, oldest first
+        """
+        rows = self._connect().execute(
+            "SELECT start, count, temp_sum, temp_min, temp_max, humidity_sum, wind_max, precip_mm "
+            "FROM rollups WHERE cell = ? AND period = ? AND start BETWEEN ? AND ? ORDER BY start",
+            (cell, period, period_start(start, period), end)
+        ).fetchall()
+
+        return [
+            {
+                "time": bucket,
+                "count": count,
+                "temperature": {
+                    "min": round(temp_min, 2),
+                    "max": round(temp_max, 2),
+                    "mean": round(temp_sum / count, 2)
+                },
+                "humidity": {"mean": round(humidity_sum / count, 1)},
+                "wind_speed": {"max": round(wind_max, 2)},
+                "precip_mm": round(precip_mm, 2)
+            }
+            for bucket, count, temp_sum, temp_min, temp_max, humidity_sum, wind_max, precip_mm in rows
+        ]
+
+    def rebuild(self, cell: str, points: List[Dict[str, Any]]) -> int:
+        """
+        Replay raw history points into the rollups (e.g. after enabling them)
+
+        Args:
+            cell: Grid cell
+            points: Raw points from HistoryStore.query, oldest first
+
+        Returns:
+            int: Number of points applied
+        """
+        applied = 0
+        for point in points:
+            if "temperature" not in point:
+                continue
+            observation = dict(point, observed_at=point["time"])
+            if self.ingest(cell, observation):
+                applied += 1
+        return applied
@@ -0,0 +1,74 @@
+"""
+Weather app - SQLite Store Module
+Connection handling shared by the SQLite-backed stores
+
+The stores are used from many request threads and from pre-forked worker
+processes. SQLiteStore gives each thread of each process its own
+connection (autocommit, WAL, synchronous=NORMAL) and writes buffered
+batches in one immediate transaction.
+
+A forked worker starts with a copy of everything the master built, but
+not with the master's threads, and any socket or file handle it copied is
+shared with the master. So every per-process resource in the app
+(connections, thread pools, write buffers) remembers the pid that built
+it and is rebuilt when os.getpid() no longer matches.
+Because connections are per thread, a store needs a real file: ":memory:"
+would give every thread its own empty database.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Iterable, Optional, Sequence, Tuple
+
+class SQLiteStore:
+    """
+    Base for stores kept in one SQLite file
+    """
+
+    # Set to sqlite3.Row for rows addressable by column name
+    row_factory: Optional[Any] = None
+
+    def __init__(self, path: str):
+        if path == ":memory:":
+            raise ValueError("SQLiteStore needs a database file, not :memory:")
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Cached on the thread, and rebuilt in a forked child
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            if self.row_factory is not None:
+                connection.row_factory = self.row_factory
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, statements: Iterable[Tuple[str, Iterable[Sequence[Any]]]], what: str) -> bool:
+        """
+        Run statements in one immediate transaction, rolling back on failure
+
+        Args:
+            statements: (SQL, parameter rows) pairs, each run with executemany
+            what: What is being written, for the warning on failure
+
+        Returns:
+            bool: True if committed, False if rolled back
+        """
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for sql, rows in statements:
+                connection.executemany(sql, rows)
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            print(f"Warning: could not write {what}: {e}")
+            return False
+        return True
@@ -0,0 +1,421 @@
+"""
+Weather app - Tiles Module
+Temperature heatmap map tiles rendered from cached observations only
+
+A tile (z/x/y, Web Mercator, 256x256) is drawn from the current
+observations already cached for cells inside it or near its edges: their
+temperatures are interpolated onto a coarse sample grid by inverse distance
+weighting (IDW), colored through a fixed palette and written as a PNG with
+zlib and struct, so no imaging library is needed. Rendering never calls
+upstream; areas with no cached observation within reach are transparent.
+
+Interpolation only uses observations within a fixed radius (a fraction of a
+tile, measured in the zoom level's pixel space), and a tile considers every
+observation within that radius of its edges, so a point's value does not
+depend on which tile draws it and neighboring tiles join without seams.
+NumPy is used for the interpolation when it is installed; otherwise a
+pure-Python loop visits only the samples inside each observation's radius.
+
+Rendered tiles are kept in an LRU. The WeatherAPI refresh listener drops the
+tiles, at every cached zoom, whose reach includes the refreshed cell; in
+other worker processes TILE_CACHE_TTL bounds how long an older tile is
+served.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from modules.geo_grid import decode
+
+TILE_SIZE = 256
+
+# Interpolated samples per tile side; each is drawn as a square block of pixels
+TILE_GRID = 64
+
+# Web Mercator's latitude limit
+MAX_LATITUDE = 85.0511287798
+
+# (°F, RGB) color stops; tiles are colored in canonical units whatever the display units
+COLOR_STOPS = [
+    (-40, (145, 0, 190)),
+    (0, (40, 40, 220)),
+    (32, (60, 170, 230)),
+    (50, (60, 200, 120)),
+    (68, (240, 220, 60)),
+    (86, (245, 140, 40)),
+    (104, (210, 30, 30)),
+    (122, (120, 0, 20))
+]
+
+TILE_ALPHA = 170
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_TRANSPARENT = b"\x00\x00\x00\x00"
+
+class Tile(NamedTuple):
+    """A rendered tile ready to send"""
+    body: bytes
+    etag: str
+    stations: int
+    created: float
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """
+    Get the geographic bounds of a Web Mercator tile
+
+    Args:
+        z: Zoom level
+        x: Tile column (0 at 180°W)
+        y: Tile row (0 at the north edge)
+
+    Returns:
+        Tuple of (south, west, north, east) in degrees
+    """
+    n = 1 << z
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+def project(lat: float, lon: float, z: int) -> Tuple[float, float]:
+    """
+    Project a point to global pixel coordinates at a zoom level
+
+    Args:
+        lat: Latitude (clamped to the Mercator limit)
+        lon: Longitude
+        z: Zoom level
+
+    Returns:
+        Tuple of (x, y) pixels from the world's top-left corner
+    """
+    scale = TILE_SIZE * (1 << z)
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)) * scale
+    return x, y
+
+def unproject_lat(y: float, z: int) -> float:
+    """Get the latitude of a global pixel row at a zoom level"""
+    n = math.pi * (1 - 2 * y / (TILE_SIZE * (1 << z)))
+    return math.degrees(math.atan(math.sinh(n)))
+
+def idw(samples: Sequence[float], stations: Sequence[Tuple[float, float, float]],
+        radius: float, power: float = 2.0) -> List[Optional[float]]:
+    """
+    Interpolate station values onto a square sample grid (pure Python)
+
+    Args:
+        samples: Sample coordinates along one axis, in pixels (the grid is
+            every (samples[col], samples[row]) pair)
+        stations: (x, y, value) in the same pixel space
+        radius: Stations farther than this from a sample are ignored
+        power: Distance weighting exponent
+
+    Returns:
+        Row-major list of interpolated values, None where no station reaches
+    """
+    size = len(samples)
+    numerators = [0.0] * (size * size)
+    denominators = [0.0] * (size * size)
+    radius_sq = radius * radius
+    half_power = power / 2
+    first, step = samples[0], (samples[-1] - samples[0]) / max(size - 1, 1) or 1.0
+
+    for sx, sy, value in stations:
+        # Only the samples inside this station's radius: one chord per row
+        lo_row = max(0, math.ceil((sy - radius - first) / step))
+        hi_row = min(size - 1, math.floor((sy + radius - first) / step))
+        for row in range(lo_row, hi_row + 1):
+            dy_sq = (samples[row] - sy) ** 2
+            if dy_sq > radius_sq:
+                continue
+            chord = math.sqrt(radius_sq - dy_sq)
+            lo_col = max(0, math.ceil((sx - chord - first) / step))
+            hi_col = min(size - 1, math.floor((sx + chord - first) / step))
+            if hi_col < lo_col:
+                continue
+            index = row * size + lo_col
+            for sample in samples[lo_col:hi_col + 1]:
+                distance_sq = (sample - sx) ** 2 + dy_sq
+                if distance_sq < 1e-9:
+                    distance_sq = 1e-9
+                weight = 1.0 / distance_sq if half_power == 1 else distance_sq ** -half_power
+                numerators[index] += weight * value
+                denominators[index] += weight
+                index += 1
+
+    return [num / den if den else None for num, den in zip(numerators, denominators)]
+
+def idw_numpy(samples: Sequence[float], stations: Sequence[Tuple[float, float, float]],
+              radius: float, power: float = 2.0) -> List[Optional[float]]:
+    """
+    Interpolate station values onto a square sample grid with NumPy
+
+    Same arguments and result as idw(); stations are processed in chunks so
+    memory stays bounded at grid size x 256 weights.
+    """
+    import numpy as np  # optional; callers fall back to idw() without it
+
+    axis = np.asarray(samples, dtype=np.float64)
+    gx, gy = np.meshgrid(axis, axis)
+    gx, gy = gx.ravel()[:, None], gy.ravel()[:, None]
+    numerators = np.zeros(gx.shape[0])
+    denominators = np.zeros(gx.shape[0])
+    points = np.asarray(stations, dtype=np.float64).reshape(-1, 3)
+
+    for start in range(0, len(points), 256):
+        chunk = points[start:start + 256]
+        distance_sq = (gx - chunk[:, 0]) ** 2 + (gy - chunk[:, 1]) ** 2
+        weights = np.where(distance_sq <= radius * radius,
+                           1.0 / np.maximum(distance_sq, 1e-9) ** (power / 2), 0.0)
+        numerators += weights @ chunk[:, 2]
+        denominators += weights.sum(axis=1)
+
+    values = np.divide(numerators, denominators, out=np.zeros_like(numerators), where=denominators > 0)
+    return [float(value) if den else None for value, den in zip(values, denominators)]
+
+def build_palette(stops: Sequence[Tuple[float, Tuple[int, int, int]]] = COLOR_STOPS,
+                  alpha: int = TILE_ALPHA) -> Tuple[int, List[bytes]]:
+    """
+    Precompute one RGBA pixel per whole degree across the color stops
+
+    Returns:
+        Tuple of (lowest degree, list of 4-byte pixels)
+    """
+    low, high = int(stops[0][0]), int(stops[-1][0])
+    palette = []
+    for degree in range(low, high + 1):
+        for (t0, c0), (t1, c1) in zip(stops, stops[1:]):
+            if degree <= t1:
+                mix = (degree - t0) / (t1 - t0)
+                palette.append(bytes(round(a + (b - a) * mix) for a, b in zip(c0, c1)) + bytes([alpha]))
+                break
+    return low, palette
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    """Frame one PNG chunk: length, type, data, CRC"""
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(width: int, height: int, rows: Sequence[bytes]) -> bytes:
+    """
+    Encode RGBA scanlines as a PNG
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        rows: One bytes object of width * 4 RGBA bytes per scanline
+
+    Returns:
+        bytes: PNG file
+    """
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)  # 8-bit RGBA
+    raw = b"".join(b"\x00" + row for row in rows)  # filter type 0 on every scanline
+    return (_PNG_SIGNATURE + png_chunk(b"IHDR", header) +
+            png_chunk(b"IDAT", zlib.compress(raw, 6)) + png_chunk(b"IEND", b""))
+
+class TileCache:
+    """
+    Thread-safe LRU of rendered tiles, drawn from a WeatherAPI's cached observations
+    """
+
+    def __init__(self, weather_api: Any, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None, radius: Optional[float] = None,
+                 max_zoom: Optional[int] = None):
+        self.weather_api = weather_api
+        self.max_entries = max_entries or int(os.getenv("TILE_CACHE_SIZE", 1024))
+        self.ttl = ttl if ttl is not None else float(os.getenv("TILE_CACHE_TTL", 300))
+        # Reach of one observation, in tiles
+        self.radius = radius if radius is not None else float(os.getenv("TILE_RADIUS", 0.5))
+        self.max_zoom = max_zoom if max_zoom is not None else int(os.getenv("TILE_MAX_ZOOM", 14))
+        self.low, self.palette = build_palette()
+        self._tiles: "OrderedDict[Tuple[int, int, int], Tile]" = OrderedDict()
+        self._zooms: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._interpolate = None
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+
+    def interpolator(self) -> Any:
+        """
+        Get the interpolation function: NumPy if installed, else pure Python
+
+        Returns:
+            idw_numpy or idw
+        """
+        if self._interpolate is None:
+            try:
+                import numpy  # noqa: F401  deferred: a heavy import used only by tiles
+                self._interpolate = idw_numpy
+            except ImportError:
+                self._interpolate = idw
+        return self._interpolate
+
+    def valid(self, z: int, x: int, y: int) -> bool:
+        """Check that a tile address exists and is within TILE_MAX_ZOOM"""
+        return 0 <= z <= self.max_zoom and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+    def get(self, z: int, x: int, y: int) -> Tile:
+        """
+        Get a tile, rendering it from cached observations on a miss
+
+        Args:
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+
+        Returns:
+            Tile
+        """
+        key = (z, x, y)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None and time.time() - tile.created < self.ttl:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        tile = self.render(z, x, y)
+        with self._lock:
+            if key not in self._tiles:
+                self._zooms[z] = self._zooms.get(z, 0) + 1
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_entries:
+                old_key, _ = self._tiles.popitem(last=False)
+                self._unzoom(old_key[0])
+        return tile
+
+    def _unzoom(self, z: int) -> None:
+        self._zooms[z] -= 1
+        if not self._zooms[z]:
+            del self._zooms[z]
+
+    def stations(self, z: int, x: int, y: int) -> List[Tuple[float, float, float]]:
+        """
+        Get the cached temperatures that reach a tile, in its pixel space
+
+        Only cells already observed by this process are considered, and they
+        are read in one cache get_many call; nothing is fetched upstream.
+
+        Returns:
+            List of (x, y, temperature °F) relative to the tile's top-left
+        """
+        margin = self.radius
+        _, west, _, east = tile_bounds(z, x, y)
+        lat_low = unproject_lat((y + 1 + margin) * TILE_SIZE, z)
+        lat_high = unproject_lat((y - margin) * TILE_SIZE, z)
+        lon_span = (east - west) * margin
+        cells = self.weather_api.observations.within(lat_low, max(west - lon_span, -180.0),
+                                                     lat_high, min(east + lon_span, 180.0))
+        if not cells:
+            return []
+
+        found = self.weather_api.cache.get_many([f"current:{cell}" for cell in cells])
+        origin_x, origin_y = x * TILE_SIZE, y * TILE_SIZE
+        stations = []
+        for cell in cells:
+            current = found.get(f"current:{cell}")
+            if current is None or current.get("temperature") is None:
+                continue
+            px, py = project(*decode(cell), z)
+            stations.append((px - origin_x, py - origin_y, float(current["temperature"])))
+        return stations
+
+    def render(self, z: int, x: int, y: int) -> Tile:
+        """
+        Render a tile from cached observations (never calls upstream)
+
+        Returns:
+            Tile
+        """
+        stations = self.stations(z, x, y)
+        block = TILE_SIZE // TILE_GRID
+        if stations:
+            samples = [(index + 0.5) * block for index in range(TILE_GRID)]
+            values = self.interpolator()(samples, stations, self.radius * TILE_SIZE)
+        else:
+            values = [None] * (TILE_GRID * TILE_GRID)
+
+        last = len(self.palette) - 1
+        rows = []
+        for row in range(TILE_GRID):
+            pixels = b"".join(
+                _TRANSPARENT * block if value is None
+                else self.palette[min(last, max(0, int(round(value)) - self.low))] * block
+                for value in values[row * TILE_GRID:(row + 1) * TILE_GRID]
+            )
+            rows.extend([pixels] * block)
+
+        body = encode_png(TILE_SIZE, TILE_SIZE, rows)
+        self.renders += 1
+        return Tile(body, hashlib.blake2b(body, digest_size=12).hexdigest(), len(stations), time.time())
+
+    def invalidate(self, lat: float, lon: float) -> int:
+        """
+        Drop the cached tiles, at every zoom, that an observation at a point reaches
+
+        Args:
+            lat: Latitude
+            lon: Longitude
+
+        Returns:
+            int: Number of tiles dropped
+        """
+        dropped = 0
+        with self._lock:
+            for z in list(self._zooms):
+                px, py = project(lat, lon, z)
+                reach = self.radius * TILE_SIZE
+                last = (1 << z) - 1
+                for tx in range(max(0, int((px - reach) // TILE_SIZE)), min(last, int((px + reach) // TILE_SIZE)) + 1):
+                    for ty in range(max(0, int((py - reach) // TILE_SIZE)), min(last, int((py + reach) // TILE_SIZE)) + 1):
+                        if self._tiles.pop((z, tx, ty), None) is not None:
+                            self._unzoom(z)
+                            dropped += 1
+        return dropped
+
+    def record(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        """
+        WeatherAPI refresh listener: drop tiles drawn from the cell's old observation
+
+        Args:
+            kind: Refreshed endpoint ("current", "forecast", ...)
+            cell: Grid cell that was refreshed
+            data: Normalized payload
+        """
+        if kind == "current" and "error" not in data:
+            self.invalidate(*decode(cell))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get tile cache statistics
+
+        Returns:
+            Dict with size, zoom levels, hits, misses, renders, hit rate and
+            the interpolation backend
+        """
+        with self._lock:
+            size = len(self._tiles)
+            zooms = sorted(self._zooms)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "zooms": zooms,
+            "hits": self.hits,
+            "misses": self.misses,
+            "renders": self.renders,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "backend": "numpy" if self.interpolator() is idw_numpy else "python"
+        }
@@ -0,0 +1,227 @@
+"""
+Weather app - Timeline Module
+Forecast slot series: compact columns, range slicing and downsampling
+
+Forecast slots (3-hourly from the standard forecast, hourly in onecall
+mode) are kept as parallel typed arrays, one per field, with epoch-second
+times in ascending order: 40 slots of 7 fields take about 1.5 KB instead of
+40 dicts. A time range is two binary searches and a slice of each column.
+Downsampling uses Largest-Triangle-Three-Buckets (LTTB) on one field, which
+keeps the peaks and troughs a sparkline needs instead of averaging them
+away, and takes the same slots from every column.
+
+Slots are grouped into days in the location's own time zone: the day number
+is (epoch + utc_offset) // 86400, integer arithmetic with no datetime per
+slot, and consecutive slots of one day form a run that is summarized from
+column slices.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Column type codes: 4-byte floats for measurements, 2-byte condition ids
+SERIES_TYPES = {
+    "temperature": "f",
+    "feels_like": "f",
+    "humidity": "f",
+    "wind_speed": "f",
+    "rain_chance": "f",
+    "condition_id": "H"
+}
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def local_day(epoch: float, offset: int = 0) -> int:
+    """
+    Get the local day number of a time (days since 1970-01-01, local calendar)
+
+    Args:
+        epoch: Epoch seconds
+        offset: Location's UTC offset in seconds (e.g. -14400 for EDT)
+
+    Returns:
+        int: Day number; see day_date()
+    """
+    return (int(epoch) + offset) // 86400
+
+def day_date(day: int) -> date:
+    """Get the calendar date of a local day number"""
+    return date.fromordinal(EPOCH_ORDINAL + day)
+
+def day_runs(times: Sequence[int], offset: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Split ascending slot times into local days
+
+    Args:
+        times: Slot times in epoch seconds, ascending
+        offset: Location's UTC offset in seconds
+
+    Returns:
+        List of (day number, first index, end index) per day, in order
+    """
+    runs = []
+    current, start = None, 0
+    for index, epoch in enumerate(times):
+        day = (epoch + offset) // 86400
+        if day != current:
+            if current is not None:
+                runs.append((current, start, index))
+            current, start = day, index
+    if current is not None:
+        runs.append((current, start, len(times)))
+    return runs
+
+def summarize_days(times: Sequence[int], columns: Dict[str, Sequence[Any]],
+                   offset: int = 0, limit: int = 7) -> List[Dict[str, Any]]:
+    """
+    Summarize forecast slots into daily forecasts
+
+    Args:
+        times: Slot times in epoch seconds, ascending
+        columns: Per-slot lists of temperature, humidity, wind_speed,
+            rain_chance, condition_id, description and icon
+        offset: Location's UTC offset in seconds
+        limit: Maximum number of days
+
+    Returns:
+        List of daily dicts: date, temp_high/low, most common description,
+        condition_id and icon, average humidity and wind speed, highest
+        rain chance
+    """
+    days = []
+    for day, lo, hi in day_runs(times, offset)[:limit]:
+        temps = columns["temperature"][lo:hi]
+        humidity = columns["humidity"][lo:hi]
+        wind = columns["wind_speed"][lo:hi]
+        summary = {"date": day_date(day), "temp_high": max(temps), "temp_low": min(temps)}
+        for field in ("description", "condition_id", "icon"):
+            values = columns[field][lo:hi]
+            summary[field] = max(set(values), key=values.count)  # Most common
+        summary["humidity"] = sum(humidity) // len(humidity)
+        summary["wind_speed"] = sum(wind) / len(wind)
+        summary["rain_chance"] = max(columns["rain_chance"][lo:hi])
+        days.append(summary)
+    return days
+
+def make_series(times: Iterable[int], columns: Dict[str, Iterable[Any]]) -> Dict[str, array]:
+    """
+    Pack slot columns into typed arrays
+
+    Args:
+        times: Slot start times in epoch seconds, ascending
+        columns: Field name to values, one per slot (fields not in
+            SERIES_TYPES are dropped)
+
+    Returns:
+        Dict with a "time" array and one array per field
+    """
+    series = {"time": array("q", times)}
+    for field, values in columns.items():
+        if field in SERIES_TYPES:
+            series[field] = array(SERIES_TYPES[field], values)
+    return series
+
+def series_from_rows(rows: List[Dict[str, Any]]) -> Dict[str, array]:
+    """
+    Build a series from hourly rows (onecall or Open-Meteo "hours")
+
+    Args:
+        rows: Dicts with a "time" datetime and the SERIES_TYPES fields
+
+    Returns:
+        Dict of typed column arrays
+    """
+    fields = [field for field in SERIES_TYPES if rows and field in rows[0]]
+    times = [int(row["time"].timestamp()) if isinstance(row["time"], datetime) else int(row["time"]) for row in rows]
+    return make_series(times, {field: [row[field] or 0 for row in rows] for field in fields})
+
+def slice_series(series: Dict[str, array], start: Optional[int] = None,
+                 end: Optional[int] = None) -> Dict[str, array]:
+    """
+    Keep the slots starting within [start, end]
+
+    Args:
+        series: Column arrays
+        start: First slot time in epoch seconds (default: from the first)
+        end: Last slot time in epoch seconds (default: to the last)
+
+    Returns:
+        Dict of sliced column arrays
+    """
+    times = series["time"]
+    lo = 0 if start is None else bisect_left(times, start)
+    hi = len(times) if end is None else bisect_right(times, end)
+    return {field: column[lo:hi] for field, column in series.items()}
+
+def lttb(times: Sequence[float], values: Sequence[float], points: int) -> List[int]:
+    """
+    Choose the slots that best preserve a series' shape (Largest-Triangle-Three-Buckets)
+
+    The first and last slots are always kept; every bucket in between
+    contributes the slot forming the largest triangle with the previously
+    chosen slot and the average of the next bucket.
+
+    Args:
+        times: X values, ascending
+        values: Y values
+        points: Number of slots to keep
+
+    Returns:
+        Ascending list of kept slot indexes
+    """
+    count = len(values)
+    if points >= count:
+        return list(range(count))
+    if points <= 2:
+        return [0, count - 1][:max(points, 0)]
+
+    every = (count - 2) / (points - 2)
+    chosen = [0]
+    previous = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        span = next_end - end
+        mean_x = sum(times[end:next_end]) / span
+        mean_y = sum(values[end:next_end]) / span
+
+        x0, y0 = times[previous], values[previous]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            area = abs((x0 - mean_x) * (values[index] - y0) - (x0 - times[index]) * (mean_y - y0))
+            if area > best_area:
+                best, best_area = index, area
+        chosen.append(best)
+        previous = best
+    chosen.append(count - 1)
+    return chosen
+
+def downsample(series: Dict[str, array], points: int, field: str = "temperature") -> Dict[str, array]:
+    """
+    Reduce a series to at most `points` slots, shaped by one field
+
+    Args:
+        series: Column arrays
+        points: Number of slots to keep
+        field: Column whose shape is preserved (default: temperature)
+
+    Returns:
+        Dict of downsampled column arrays
+    """
+    if field not in series:
+        field = next((name for name in SERIES_TYPES if name in series), "time")
+    keep = lttb(series["time"], series[field], points)
+    return {name: array(column.typecode, [column[index] for index in keep]) for name, column in series.items()}
+
+def series_json(series: Dict[str, array]) -> Dict[str, List[Any]]:
+    """
+    Convert column arrays to JSON lists, rounding floats to 2 decimals
+
+    Returns:
+        Dict of field to list
+    """
+    return {field: [round(value, 2) for value in column] if column.typecode in "fd" else column.tolist()
+            for field, column in series.items()}
@@ -0,0 +1,353 @@
+"""
+Weather app - Transport Module
+Pluggable HTTP transport under the upstream providers and location lookup
+
+Every upstream GET (the weather providers and the server's IP
+geolocation) goes through http_get() in modules.providers, which hands it
+to this process's transport:
+
+- RequestsTransport: the network, via requests (the default)
+- RecordingTransport: wraps another transport and appends every exchange
+  and its latency to an archive
+- ReplayTransport: answers from an archive without the network, taking
+  each exchange's recorded latency divided by a speed factor
+
+TRANSPORT=requests|record|replay selects one, TRANSPORT_ARCHIVE names the
+archive (default data/upstream.jsonl.gz) and TRANSPORT_SPEED scales replay
+(1 = recorded speed, 10 = ten times faster, 0 = no delay).
+
+The archive is gzip-compressed JSON lines, one exchange per line: URL,
+query parameters with credentials removed, latency in milliseconds, and
+the body or the error message, also stripped of credentials. Exchanges are
+appended in batches, each batch a gzip member of its own written in one
+call, so several worker processes can record into the same archive.
+
+Replay matches a request on its URL and parameters, with coordinates
+rounded to 4 decimals, and cycles through the recordings of a repeated
+request. A request that was never recorded gets the recording of the same
+query at the nearest coordinates, so load tests can spread over cells the
+archive does not cover.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus
+
+DEFAULT_ARCHIVE = Path(__file__).resolve().parent.parent / "data" / "upstream.jsonl.gz"
+
+# Query parameters never written to an archive or used to match against it
+SECRET_PARAMS = {"appid", "apikey", "api_key", "key", "token"}
+
+# "name=value" for any of them, as it appears in a URL inside an error message
+SECRET_PATTERN = re.compile(r"\b(" + "|".join(sorted(SECRET_PARAMS)) + r")=[^&\s'\"]+", re.IGNORECASE)
+
+# Coordinate parameters: index into (lat, lon)
+COORDINATE_PARAMS = {"lat": 0, "latitude": 0, "lon": 1, "longitude": 1}
+
+class UpstreamError(Exception):
+    """An upstream HTTP request failed (connection, timeout or error status)"""
+
+def request_key(url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, str, Optional[Tuple[float, float]]]:
+    """
+    Normalize a request for archive matching
+
+    Args:
+        url: Request URL
+        params: Query parameters
+
+    Returns:
+        Tuple of (query key without coordinates, full key, (lat, lon) or None)
+    """
+    query, point = [], [None, None]
+    for name, value in sorted((params or {}).items()):
+        if name in SECRET_PARAMS:
+            continue
+        if name in COORDINATE_PARAMS:
+            point[COORDINATE_PARAMS[name]] = round(float(value), 4)
+        else:
+            query.append(f"{name}={value}")
+    group = url + "?" + "&".join(query)
+    if point[0] is None or point[1] is None:
+        return group, group, None
+    return group, f"{group}&@{point[0]:.4f},{point[1]:.4f}", (point[0], point[1])
+
+def redact(text: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Remove credentials from an error message before it is logged or archived
+
+    Args:
+        text: Error message, often including the request URL
+        params: Query parameters; their secret values are removed wherever they appear
+
+    Returns:
+        str: The message with every secret value replaced by "***"
+    """
+    for name, value in (params or {}).items():
+        if name in SECRET_PARAMS and value:
+            for form in {str(value), quote_plus(str(value))}:
+                text = text.replace(form, "***")
+    return SECRET_PATTERN.sub(r"\1=***", text)
+
+def load_archive(path: str) -> List[Dict[str, Any]]:
+    """
+    Read every exchange from an archive
+
+    Args:
+        path: Archive file
+
+    Returns:
+        List of exchange dicts, in recording order
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class RequestsTransport:
+    """
+    Live HTTP via requests
+    """
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> bytes:
+        """
+        GET a URL and return the response body
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Seconds to wait for the server
+
+        Returns:
+            bytes: Response body
+
+        Raises:
+            UpstreamError: If the request fails or returns an error status
+        """
+        import requests  # deferred to keep it off the cold-start path
+
+        try:
+            response = requests.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise UpstreamError(redact(str(e), params)) from e
+        return response.content
+
+class RecordingTransport:
+    """
+    Passes requests to another transport and archives each exchange
+    """
+
+    def __init__(self, inner: Any, path: Optional[str] = None, batch: int = 50):
+        self.inner = inner
+        self.path = str(path or os.getenv("TRANSPORT_ARCHIVE", DEFAULT_ARCHIVE))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.batch = batch
+        self.recorded = 0
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        atexit.register(self.flush)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> bytes:
+        """
+        GET a URL through the wrapped transport, recording the exchange
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Seconds to wait for the server
+
+        Returns:
+            bytes: Response body
+
+        Raises:
+            UpstreamError: If the request fails (the failure is recorded too)
+        """
+        start = time.perf_counter()
+        try:
+            body = self.inner.get(url, params, timeout)
+        except UpstreamError as e:
+            self._add(url, params, time.perf_counter() - start, {"error": redact(str(e), params)})
+            raise
+        self._add(url, params, time.perf_counter() - start, {"body": body.decode("utf-8", "replace")})
+        return body
+
+    def _forked(self) -> None:
+        # A forked worker inherits the parent's unflushed exchanges (and its
+        # atexit flush); they are the parent's to write, so drop them here
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self._buffer = []
+
+    def _add(self, url: str, params: Optional[Dict[str, Any]], elapsed: float,
+             outcome: Dict[str, str]) -> None:
+        self._forked()
+        entry = {
+            "url": url,
+            "params": {name: value for name, value in (params or {}).items() if name not in SECRET_PARAMS},
+            "ms": round(elapsed * 1000, 1),
+            **outcome
+        }
+        with self._lock:
+            self._buffer.append(json.dumps(entry, separators=(",", ":")))
+            self.recorded += 1
+            due = len(self._buffer) >= self.batch
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Append buffered exchanges to the archive as one gzip member
+
+        Returns:
+            int: Number of exchanges written
+        """
+        self._forked()
+        with self._lock:
+            buffer, self._buffer = self._buffer, []
+            if not buffer:
+                return 0
+            member = gzip.compress(("\n".join(buffer) + "\n").encode("utf-8"))
+            with open(self.path, "ab") as f:
+                f.write(member)
+        return len(buffer)
+
+class ReplayTransport:
+    """
+    Answers requests from an archive at recorded or scaled speed
+    """
+
+    def __init__(self, path: Optional[str] = None, speed: Optional[float] = None):
+        self.path = str(path or os.getenv("TRANSPORT_ARCHIVE", DEFAULT_ARCHIVE))
+        self.speed = speed if speed is not None else float(os.getenv("TRANSPORT_SPEED", 1.0))
+        self.exchanges = load_archive(self.path)
+        self.stats = {"exact": 0, "nearest": 0, "missing": 0}
+        self._lock = threading.Lock()
+        self._next: Dict[str, int] = {}
+        self._recorded: Dict[str, List[Dict[str, Any]]] = {}
+        self._points: Dict[str, List[Tuple[float, float, str]]] = {}
+        for exchange in self.exchanges:
+            group, key, point = request_key(exchange["url"], exchange["params"])
+            if key not in self._recorded:
+                self._recorded[key] = []
+                if point is not None:
+                    self._points.setdefault(group, []).append((point[0], point[1], key))
+            self._recorded[key].append(exchange)
+
+    def lookup(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the recorded exchange that answers a request
+
+        Args:
+            url: Request URL
+            params: Query parameters
+
+        Returns:
+            The next recording of the same request, else of the same query
+            at the nearest recorded coordinates, else None
+        """
+        group, key, point = request_key(url, params)
+        kind = "exact"
+        if key not in self._recorded:
+            candidates = self._points.get(group)
+            if point is None or not candidates:
+                with self._lock:
+                    self.stats["missing"] += 1
+                return None
+            key = min(candidates, key=lambda c: (c[0] - point[0]) ** 2 + (c[1] - point[1]) ** 2)[2]
+            kind = "nearest"
+
+        recordings = self._recorded[key]
+        with self._lock:
+            self.stats[kind] += 1
+            index = self._next.get(key, 0)
+            self._next[key] = index + 1
+        return recordings[index % len(recordings)]
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, timeout: float = 10) -> bytes:
+        """
+        Replay the recorded response to a request after its scaled latency
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Seconds to wait; slower recordings fail as timeouts
+
+        Returns:
+            bytes: Recorded response body
+
+        Raises:
+            UpstreamError: If nothing matches, the recording is a failure, or
+                its scaled latency exceeds the timeout
+        """
+        exchange = self.lookup(url, params)
+        if exchange is None:
+            raise UpstreamError(f"No recorded response for {url}")
+
+        delay = exchange["ms"] / 1000 / self.speed if self.speed > 0 else 0.0
+        if delay > timeout:
+            time.sleep(timeout)
+            raise UpstreamError(f"Read timed out (replayed {exchange['ms']} ms response)")
+        time.sleep(delay)
+        if "error" in exchange:
+            raise UpstreamError(exchange["error"])
+        return exchange["body"].encode("utf-8")
+
+_transport: Optional[Any] = None
+_transport_lock = threading.Lock()
+
+def build_transport() -> Any:
+    """
+    Build the transport configured by the environment
+
+    TRANSPORT=record wraps the network transport in a recorder and
+    TRANSPORT=replay serves from the archive; anything else is the network.
+
+    Returns:
+        RequestsTransport, RecordingTransport or ReplayTransport
+    """
+    name = os.getenv("TRANSPORT", "requests").lower()
+    if name == "replay":
+        return ReplayTransport()
+    if name == "record":
+        return RecordingTransport(RequestsTransport())
+    if name != "requests":
+        print(f"Warning: unknown transport {name!r}, using requests")
+    return RequestsTransport()
+
+def get_transport() -> Any:
+    """
+    Get this process's transport, building it on first use
+
+    Returns:
+        The active transport
+    """
+    global _transport
+
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = build_transport()
+    return _transport
+
+def set_transport(transport: Optional[Any]) -> Optional[Any]:
+    """
+    Swap the process transport, e.g. to replay an archive in a benchmark
+
+    Args:
+        transport: New transport, or None to rebuild from the environment on next use
+
+    Returns:
+        The previous transport (None if none was built yet)
+    """
+    global _transport
+
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    return previous
@@ -0,0 +1,312 @@
+"""
+Weather app - Warm Set Module
+Learns the hot locations from request history and pre-warms their cells
+
+Every resolved request location is counted per grid cell and UTC hour in a
+SQLite access log (buffered in memory and flushed in batches). Traffic has a
+daily shape, so the cells to warm for an upcoming hour are the ones that
+were busiest in that same hour over the last few days. A scheduler thread
+fetches those cells shortly before the hour, most requested first, until
+the daily pre-warm call budget is spent; cells that are already cached cost
+nothing. Under gunicorn the scheduler runs in one worker, chosen by a lock
+file, never in the forking master. The calls spent are kept per UTC day in
+the quota database, so a recycled worker's successor picks up the same
+day's budget rather than a fresh one.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from modules.geo_grid import decode
+from modules.sqlite_store import SQLiteStore
+
+DEFAULT_ACCESS_DB = Path(__file__).resolve().parent.parent / "data" / "access.sqlite"
+
+class AccessLog(SQLiteStore):
+    """
+    Per-cell, per-hour request counts in SQLite
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = 30.0,
+                 max_buffer: int = 1000, retention_days: int = 28):
+        super().__init__(str(path or os.getenv("ACCESS_DB", DEFAULT_ACCESS_DB)))
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._buffer: Dict[Tuple[str, int], int] = {}
+        self._flushed = time.time()
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS access ("
+            "cell TEXT, hour INTEGER, hits INTEGER, "
+            "PRIMARY KEY (cell, hour)) WITHOUT ROWID"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS access_hour ON access (hour)")
+
+    def record(self, cell: str, when: Optional[float] = None) -> None:
+        """
+        Count one request for a cell
+
+        Args:
+            cell: Grid cell the request resolved to
+            when: Request time in epoch seconds (default: now)
+        """
+        now = time.time()
+        hour = int((now if when is None else when) // 3600)
+        with self._lock:
+            self._buffer[(cell, hour)] = self._buffer.get((cell, hour), 0) + 1
+            due = len(self._buffer) >= self.max_buffer or now - self._flushed >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered counts to the log and drop expired hours
+
+        Returns:
+            int: Number of (cell, hour) counts written
+        """
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+            self._flushed = time.time()
+        if not buffer:
+            return 0
+
+        written = self._write([
+            ("INSERT INTO access VALUES (?, ?, ?) "
+             "ON CONFLICT (cell, hour) DO UPDATE SET hits = hits + excluded.hits",
+             [(cell, hour, hits) for (cell, hour), hits in buffer.items()]),
+            ("DELETE FROM access WHERE hour < ?",
+             [(max(hour for _, hour in buffer) - self.retention_days * 24,)])
+        ], "access log")
+        return len(buffer) if written else 0
+
+    def hot_cells(self, hour_of_day: int, days: int = 14, limit: int = 200,
+                  now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Rank cells by their average hits in one hour of the day
+
+        Args:
+            hour_of_day: UTC hour (0-23)
+            days: How many past days to average over
+            limit: Maximum number of cells
+            now: Reference time in epoch seconds (default: now)
+
+        Returns:
+            List of (cell, mean hits per day in that hour), busiest first
+        """
+        since = int((time.time() if now is None else now) // 3600) - days * 24
+        rows = self._connect().execute(
+            "SELECT cell, SUM(hits) FROM access WHERE hour >= ? AND hour % 24 = ? "
+            "GROUP BY cell ORDER BY SUM(hits) DESC, cell LIMIT ?",
+            (since, hour_of_day, limit)
+        ).fetchall()
+        return [(cell, hits / days) for cell, hits in rows]
+
+    def counts(self, since_hour: int, until_hour: int,
+               precision: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        Get recorded request counts per cell and hour
+
+        Args:
+            since_hour: First hour (epoch hours, inclusive)
+            until_hour: Last hour (epoch hours, exclusive)
+            precision: Merge cells into their geohash prefix of this length
+                (default: the recorded cells)
+
+        Returns:
+            List of (cell, hour, hits), ordered by cell then hour
+        """
+        return self._connect().execute(
+            "SELECT substr(cell, 1, ?), hour, SUM(hits) FROM access WHERE hour >= ? AND hour < ? "
+            "GROUP BY 1, 2 ORDER BY 1, 2",
+            (precision or 12, since_hour, until_hour)
+        ).fetchall()
+
+class WarmSet:
+    """
+    Scheduled cache pre-warming for the cells expected to be busy next
+    """
+
+    def __init__(self, weather_api: Any, access_log: Optional[AccessLog] = None,
+                 lead: Optional[int] = None, interval: Optional[int] = None,
+                 daily_budget: Optional[int] = None, max_cells: Optional[int] = None,
+                 days: Optional[int] = None, tracker: Optional[Any] = None):
+        self.weather_api = weather_api
+        self.access_log = access_log or AccessLog()
+        self.lead = lead if lead is not None else int(os.getenv("WARM_LEAD", 1800))
+        self.interval = interval if interval is not None else int(os.getenv("WARM_INTERVAL", 600))
+        self.daily_budget = daily_budget if daily_budget is not None else int(os.getenv("WARM_DAILY_BUDGET", 300))
+        self.max_cells = max_cells or int(os.getenv("WARM_MAX_CELLS", 200))
+        self.days = days or int(os.getenv("WARM_HISTORY_DAYS", 14))
+        # QuotaTracker holding the day's spend; without one it is counted in memory
+        self.tracker = tracker
+        self.spent = 0
+        self.spent_day = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file: Optional[Any] = None
+
+    def _keys(self, cell: str) -> List[str]:
+        if self.weather_api.mode == "onecall":
+            return [f"onecall:{cell}"]
+        return [f"current:{cell}", f"forecast:{cell}"]
+
+    def remaining_budget(self, now: Optional[float] = None) -> int:
+        """
+        Get the upstream calls pre-warming may still make today (UTC)
+
+        Returns:
+            int: Calls left in the daily budget
+        """
+        if self.tracker is not None:
+            return max(0, self.daily_budget - self.tracker.warm_used(now))
+        day = int((time.time() if now is None else now) // 86400)
+        with self._lock:
+            if day != self.spent_day:
+                self.spent_day, self.spent = day, 0
+            return max(0, self.daily_budget - self.spent)
+
+    def plan(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Choose the cells to warm for the hour starting `lead` seconds from now
+
+        Cells are taken busiest first; each costs one upstream call per
+        endpoint that is not already cached, and cells stop being added once
+        the remaining daily budget is used up.
+
+        Returns:
+            Dict with the target hour, the budget and the chosen cells
+            (cell, expected hits, calls needed)
+        """
+        now = time.time() if now is None else now
+        hour_of_day = int((now + self.lead) // 3600) % 24
+        budget = self.remaining_budget(now)
+        hot = self.access_log.hot_cells(hour_of_day, self.days, self.max_cells, now)
+
+        keys = {cell: self._keys(cell) for cell, _ in hot}
+        cached = self.weather_api.cache.get_many([key for cell_keys in keys.values() for key in cell_keys])
+
+        chosen, skipped, calls = [], 0, 0
+        for cell, expected in hot:
+            cost = sum(1 for key in keys[cell] if key not in cached)
+            if cost == 0:
+                continue
+            if calls + cost > budget:
+                skipped += 1
+                continue
+            calls += cost
+            chosen.append({"cell": cell, "expected_hits": round(expected, 2), "calls": cost})
+
+        return {
+            "hour": hour_of_day,
+            "budget": budget,
+            "calls": calls,
+            "cells": chosen,
+            "over_budget": skipped
+        }
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Flush the access log, then fetch every planned cell
+
+        Returns:
+            Dict summarizing the run: plan totals, cells warmed and failures
+        """
+        self.access_log.flush()
+        plan = self.plan(now)
+        warmed, failed = 0, 0
+        for entry in plan["cells"]:
+            lat, lon = decode(entry["cell"])
+            if self.weather_api.mode == "onecall":
+                results = [self.weather_api.get_weather_bundle(lat, lon)]
+            else:
+                results = [self.weather_api.get_current_weather(lat, lon),
+                           self.weather_api.get_forecast(lat, lon)]
+            with self._lock:
+                self.spent += entry["calls"]
+            if any("error" in result for result in results):
+                failed += 1
+            else:
+                warmed += 1
+        if self.tracker is not None and plan["calls"]:
+            self.tracker.record_warm(plan["calls"], now)
+
+        self.last_run = {
+            "time": int(time.time() if now is None else now),
+            "hour": plan["hour"],
+            "planned": len(plan["cells"]),
+            "warmed": warmed,
+            "failed": failed,
+            "calls": plan["calls"],
+            "over_budget": plan["over_budget"]
+        }
+        return self.last_run
+
+    def coverage(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Report how much of this hour's expected traffic is already cached
+
+        Returns:
+            Dict with the hot cell count, how many are warm, and the share of
+            expected requests that will be served from cache
+        """
+        now = time.time() if now is None else now
+        hour_of_day = int(now // 3600) % 24
+        hot = self.access_log.hot_cells(hour_of_day, self.days, self.max_cells, now)
+        keys = {cell: self._keys(cell) for cell, _ in hot}
+        cached = self.weather_api.cache.get_many([key for cell_keys in keys.values() for key in cell_keys])
+
+        warm = [(cell, expected) for cell, expected in hot if all(key in cached for key in keys[cell])]
+        expected_total = sum(expected for _, expected in hot)
+        expected_warm = sum(expected for _, expected in warm)
+        return {
+            "hour": hour_of_day,
+            "hot_cells": len(hot),
+            "warm_cells": len(warm),
+            "expected_requests": round(expected_total, 2),
+            "coverage": round(expected_warm / expected_total, 3) if expected_total else None
+        }
+
+    def _loop(self, lock_path: Optional[str] = None) -> None:
+        if lock_path is not None:
+            import fcntl
+            os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+            # Held until this process exits; the file stays open for that
+            self._lock_file = open(lock_path, "a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: warm-set run failed: {e}")
+            time.sleep(self.interval)
+
+    def start(self, lock_path: Optional[str] = None) -> bool:
+        """
+        Start the background pre-warm scheduler (WARM_INTERVAL=0 disables it)
+
+        Call it in a process that will not fork afterwards. With several
+        worker processes, pass a lock file: each worker's thread waits for
+        an exclusive lock on it, so exactly one of them runs the scheduler
+        and another takes over when that worker exits.
+
+        Args:
+            lock_path: Lock file shared by the worker processes
+
+        Returns:
+            bool: True if a scheduler thread is running or waiting for the lock
+        """
+        if self.interval <= 0:
+            return False
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, args=(lock_path,),
+                                                 name="warm-set", daemon=True)
+                self._thread.start()
+        return True
@@ -1,28 +1,152 @@
 #!/usr/bin/env python3
 """
-Weather API module for OpenWeatherMap integration
+Weather API module: grid-cached access to the upstream providers
 
 Handles weather data retrieval for the weather app.
 """
 
-import requests
 import os
-from typing import Dict, Any, Optional
-from datetime import datetime
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from modules.geo_grid import GeoIndex, decode, encode
+from modules.ip_locator import locate_ip
+from modules.payload import decode_payload
+from modules.providers import UpstreamError, build_provider, http_get
+from modules.timeline import series_from_rows
+from modules.weather_cache import NO_LEASE, build_cache
 
 class WeatherAPI:
     """
-    OpenWeatherMap API client for weather data retrieval
+    Grid-cached weather client over a pluggable upstream provider
     
-    Free tier provides:
+    The provider (modules.providers) defaults to OpenWeatherMap, whose free
+    tier provides:
     - Current weather data
     - 5-day/3-hour forecast 
     - 1000 calls/day limit
+    
+    In "onecall" mode (WEATHER_API_MODE=onecall, needs a One Call 3.0
+    subscription) current, hourly and daily data come from a single upstream
+    call per cell, normalized into the same shapes as the standard endpoints.
+    
+    Coordinates are snapped to a geohash cell before any upstream call, so
+    every request inside the same cell shares one cached response. With a
+    shared cache tier that hands out leases, an expired cell is refreshed by
+    one node in the cluster; the others serve the stale copy or wait for
+    the new one.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[Any] = None,
+                 precision: Optional[int] = None, mode: Optional[str] = None,
+                 provider: Optional[Any] = None):
         self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+        self.provider = provider if provider is not None else build_provider(self.api_key)
+        self.mode = (mode or os.getenv('WEATHER_API_MODE', 'standard')).lower()
+        self.precision = precision or int(os.getenv('GRID_PRECISION', 6))
+        self.cache = cache if cache is not None else build_cache()
+        self.current_ttl = int(os.getenv('CURRENT_CACHE_TTL', 600))
+        self.forecast_ttl = int(os.getenv('FORECAST_CACHE_TTL', 10800))
+        self.observations = GeoIndex(self.precision)
+        self.fetch_workers = int(os.getenv('FETCH_CONCURRENCY', 100))
+        self.lease_ttl = float(os.getenv('REFRESH_LEASE_TTL', 15))
+        self.lease_wait = float(os.getenv('REFRESH_LEASE_WAIT', 3))
+        self.lease_poll = 0.05
+        self.refreshes = {"fetched": 0, "stale": 0, "shared": 0, "timed_out": 0}
+        # Daily upstream call counter, set by QuotaPlanner
+        self.quota: Optional[Any] = None
+        self.listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+    
+    def add_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]) -> None:
+        """
+        Register a callback for fresh upstream data
+        
+        Args:
+            callback: Called as callback(kind, cell, data) after each upstream
+                fetch, where kind is "current" or "forecast"
+        """
+        self.listeners.append(callback)
+    
+    def _notify(self, kind: str, cell: str, data: Dict[str, Any]) -> None:
+        for callback in self.listeners:
+            try:
+                callback(kind, cell, data)
+            except Exception as e:
+                print(f"Warning: {kind} listener failed for {cell}: {e}")
+    
+    def _refresh(self, cache_key: str, fetch: Callable[[], Dict[str, Any]],
+                 ttl: float) -> Tuple[Dict[str, Any], bool]:
+        """
+        Fetch and cache a missing key, one caller per cluster at a time
+        
+        The caller holding the refresh lease fetches and stores the result
+        before releasing it. Everyone else returns the stale copy at once if
+        there is one, else polls for the holder's result for up to
+        lease_wait seconds, taking the lease over if the holder gives up.
+        
+        Args:
+            cache_key: Key being refreshed
+            fetch: Upstream call
+            ttl: Cache lifetime of a successful result
+            
+        Returns:
+            Tuple of (result, True if this call fetched it upstream)
+        """
+        acquire = getattr(self.cache, "acquire", None)
+        if acquire is None:
+            token = NO_LEASE
+        else:
+            deadline = time.monotonic() + self.lease_wait
+            first = True
+            while True:
+                token = acquire(cache_key, self.lease_ttl)
+                if token is not None:
+                    break
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self.refreshes["shared"] += 1
+                    return cached, False
+                stale = self.cache.get_stale(cache_key) if first else None
+                if stale is not None:
+                    self.refreshes["stale"] += 1
+                    return stale, False
+                if time.monotonic() >= deadline:
+                    self.refreshes["timed_out"] += 1
+                    return {"error": "Weather data is being refreshed, please retry shortly"}, False
+                first = False
+                time.sleep(self.lease_poll)
+        
+        try:
+            # The previous holder may have stored the key just before releasing
+            cached = self.cache.get(cache_key) if token != NO_LEASE else None
+            if cached is not None:
+                self.refreshes["shared"] += 1
+                return cached, False
+            result = fetch()
+            self.refreshes["fetched"] += 1
+            if self.quota is not None:
+                self.quota.record()
+            if "error" not in result:
+                self.cache.set(cache_key, result, ttl)
+            return result, True
+        finally:
+            if token != NO_LEASE:
+                self.cache.release(cache_key, token)
+    
+    def snap(self, lat: float, lon: float) -> Tuple[str, float, float]:
+        """
+        Map coordinates to their canonical grid cell
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            
+        Returns:
+            Tuple of (cell, cell_center_lat, cell_center_lon)
+        """
+        cell = encode(lat, lon, self.precision)
+        center_lat, center_lon = decode(cell)
+        return cell, round(center_lat, 6), round(center_lon, 6)
         
     def get_current_weather(self, lat: float, lon: float) -> Dict[str, Any]:
         """
@@ -35,43 +159,23 @@ class WeatherAPI:
         Returns:
             Dict containing current weather data
         """
-        if not self.api_key:
-            return {"error": "API key not configured"}
-            
-        url = f"{self.base_url}/weather"
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "units": "imperial"  # Fahrenheit, mph for wind
-        }
+        if self.mode == "onecall":
+            bundle = self.get_weather_bundle(lat, lon)
+            return bundle.get("current", bundle)
         
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "location": data["name"],
-                "country": data["sys"]["country"],
-                "temperature": data["main"]["temp"],
-                "feels_like": data["main"]["feels_like"],
-                "humidity": data["main"]["humidity"],
-                "pressure": data["main"]["pressure"],
-                "description": data["weather"][0]["description"],
-                "icon": data["weather"][0]["icon"],
-                "wind_speed": data["wind"]["speed"],
-                "wind_direction": data["wind"].get("deg", 0),
-                "visibility": data.get("visibility", 0) / 1609.34,  # Convert to miles
-                "sunrise": datetime.fromtimestamp(data["sys"]["sunrise"]),
-                "sunset": datetime.fromtimestamp(data["sys"]["sunset"]),
-                "timestamp": datetime.now()
-            }
-            
-        except requests.RequestException as e:
-            return {"error": f"API request failed: {str(e)}"}
-        except KeyError as e:
-            return {"error": f"Unexpected API response format: {str(e)}"}
+        cell, lat, lon = self.snap(lat, lon)
+        cache_key = f"current:{cell}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, fetched = self._refresh(cache_key, lambda: self.provider.current(lat, lon), self.current_ttl)
+        if not fetched or "error" in result:
+            return result
+        
+        self.observations.add(lat, lon)
+        self._notify("current", cell, result)
+        return result
     
     def get_forecast(self, lat: float, lon: float) -> Dict[str, Any]:
         """
@@ -84,125 +188,275 @@ class WeatherAPI:
         Returns:
             Dict containing forecast data
         """
-        if not self.api_key:
-            return {"error": "API key not configured"}
-            
-        url = f"{self.base_url}/forecast"
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "units": "imperial"
-        }
+        if self.mode == "onecall":
+            bundle = self.get_weather_bundle(lat, lon)
+            return bundle.get("forecast", bundle)
         
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process forecast data into daily summaries
-            daily_forecasts = []
-            current_date = None
-            daily_data = {}
+        cell, lat, lon = self.snap(lat, lon)
+        cache_key = f"forecast:{cell}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, fetched = self._refresh(cache_key, lambda: self._fetch_forecast(cell, lat, lon), self.forecast_ttl)
+        if not fetched or "error" in result:
+            return result
+        
+        self._notify("forecast", cell, result)
+        return result
+    
+    def _fetch_forecast(self, cell: str, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Fetch a forecast, caching its slot series under a key of its own
+        
+        The daily payload stays small for /api/forecast and the dashboard;
+        the slots are stored before the forecast key, so they are in place
+        by the time other callers see the refreshed forecast.
+        """
+        result = self.provider.forecast(lat, lon)
+        if "error" in result:
+            return result
+        
+        result = dict(result)
+        series = result.pop("series", None)
+        step = result.pop("step", None)
+        if series is None:
+            slots = {"error": "Hourly forecast is not available from this provider"}
+        else:
+            slots = {
+                "location": result.get("location", ""),
+                "country": result.get("country", ""),
+                "step": step,
+                "utc_offset": result.get("utc_offset", 0),
+                "series": series,
+                "timestamp": result.get("timestamp")
+            }
+        self.cache.set(f"slots:{cell}", slots, self.forecast_ttl)
+        return result
+    
+    def get_hourly_forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get the forecast slot series for given coordinates
+        
+        Standard mode serves the 3-hour slots of the 5-day forecast, cached
+        alongside it; onecall mode serves the 48 hourly slots of the bundle.
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
             
-            for item in data["list"]:
-                forecast_date = datetime.fromtimestamp(item["dt"]).date()
-                
-                # New day - save previous and start new
-                if current_date != forecast_date:
-                    if daily_data:
-                        daily_forecasts.append(daily_data)
-                    
-                    daily_data = {
-                        "date": forecast_date,
-                        "temps": [item["main"]["temp"]],
-                        "descriptions": [item["weather"][0]["description"]],
-                        "icons": [item["weather"][0]["icon"]],
-                        "humidity": [item["main"]["humidity"]],
-                        "wind_speed": [item["wind"]["speed"]],
-                        "rain_chance": item.get("pop", 0) * 100  # Probability of precipitation
-                    }
-                    current_date = forecast_date
-                else:
-                    # Add to current day
-                    daily_data["temps"].append(item["main"]["temp"])
-                    daily_data["descriptions"].append(item["weather"][0]["description"])
-                    daily_data["icons"].append(item["weather"][0]["icon"])
-                    daily_data["humidity"].append(item["main"]["humidity"])
-                    daily_data["wind_speed"].append(item["wind"]["speed"])
-                    daily_data["rain_chance"] = max(daily_data["rain_chance"], item.get("pop", 0) * 100)
+        Returns:
+            Dict with location, country, step (seconds between slots) and
+            series (column arrays, see modules.timeline)
+        """
+        if self.mode == "onecall":
+            bundle = self.get_weather_bundle(lat, lon)
+            hourly = bundle.get("hourly", bundle)
+            if "error" in hourly:
+                return hourly
+            return {
+                "location": hourly.get("location", ""),
+                "country": hourly.get("country", ""),
+                "step": 3600,
+                "utc_offset": bundle.get("forecast", {}).get("utc_offset", 0),
+                "series": series_from_rows(hourly["hours"]),
+                "timestamp": hourly.get("timestamp")
+            }
+        
+        cell, _, _ = self.snap(lat, lon)
+        slots_key = f"slots:{cell}"
+        slots = self.cache.get(slots_key)
+        if slots is None:
+            forecast = self.get_forecast(lat, lon)
+            if "error" in forecast:
+                return forecast
+            slots = self.cache.get(slots_key)
+        if slots is None:
+            # The forecast outlived its slots (evicted): refetch both once
+            self.cache.delete(f"forecast:{cell}")
+            forecast = self.get_forecast(lat, lon)
+            slots = self.cache.get(slots_key) or forecast
+            if "error" not in slots and "series" not in slots:
+                slots = {"error": "Hourly forecast is temporarily unavailable, please retry shortly"}
+        return slots
+    
+    def get_weather_bundle(self, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Get current, hourly and daily data from one upstream request
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
             
-            # Add the last day
-            if daily_data:
-                daily_forecasts.append(daily_data)
+        Returns:
+            Dict with "current", "forecast" and "hourly" in the normalized shapes
+        """
+        cell, lat, lon = self.snap(lat, lon)
+        cache_key = f"onecall:{cell}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result, fetched = self._refresh(cache_key, lambda: self.provider.bundle(lat, lon), self.current_ttl)
+        if not fetched or "error" in result:
+            return result
+        
+        # Keep the per-endpoint keys warm too, so cell lookups work in either mode
+        self.cache.set(f"current:{cell}", result["current"], self.current_ttl)
+        self.cache.set(f"forecast:{cell}", result["forecast"], self.current_ttl)
+        self.observations.add(lat, lon)
+        self._notify("current", cell, result["current"])
+        self._notify("forecast", cell, result["forecast"])
+        return result
+    
+    def get_batch(self, points: List[Tuple[float, float]],
+                  kinds: Tuple[str, ...] = ("current", "forecast"),
+                  max_fetches: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get current weather and/or forecasts for many points in one pass
+        
+        Points are snapped and deduplicated by cell, every cache key is read
+        in one get_many call, and all misses are fetched concurrently (one
+        bundle per cell in onecall mode), so a batch takes about as long as
+        its slowest upstream call rather than the sum of them. Past
+        max_fetches, misses that have a stale copy are the first left
+        unfetched; they get that copy, the nearest cached observation
+        (current weather only) or an error instead of an upstream call.
+        
+        Args:
+            points: (lat, lon) pairs
+            kinds: Any of "current" and "forecast"
+            max_fetches: Most upstream calls to make (default: no limit)
             
-            # Calculate daily summaries
-            processed_forecasts = []
-            for day in daily_forecasts[:7]:  # Limit to 7 days
-                processed_forecasts.append({
-                    "date": day["date"],
-                    "temp_high": max(day["temps"]),
-                    "temp_low": min(day["temps"]),
-                    "description": max(set(day["descriptions"]), key=day["descriptions"].count),  # Most common
-                    "icon": max(set(day["icons"]), key=day["icons"].count),  # Most common
-                    "humidity": sum(day["humidity"]) // len(day["humidity"]),  # Average
-                    "wind_speed": sum(day["wind_speed"]) / len(day["wind_speed"]),  # Average
-                    "rain_chance": day["rain_chance"]
-                })
+        Returns:
+            Dict mapping each kind to one result per point, in order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        centers: Dict[str, Tuple[float, float]] = {}
+        point_cells = []
+        for lat, lon in points:
+            cell, center_lat, center_lon = self.snap(lat, lon)
+            centers.setdefault(cell, (center_lat, center_lon))
+            point_cells.append(cell)
+        
+        found = self.cache.get_many([f"{kind}:{cell}" for kind in kinds for cell in centers])
+        if self.mode == "onecall":
+            tasks: List[Any] = sorted({cell for kind in kinds for cell in centers
+                                       if f"{kind}:{cell}" not in found})
+            fetch = lambda cell: self.get_weather_bundle(*centers[cell])
+        else:
+            tasks = [(kind, cell) for cell in centers for kind in kinds if f"{kind}:{cell}" not in found]
+            fetch = lambda task: (self.get_current_weather if task[0] == "current"
+                                  else self.get_forecast)(*centers[task[1]])
+        
+        if max_fetches is not None and len(tasks) > max_fetches:
+            # Spend the calls on misses with no stale copy to fall back on
+            keys = {task: ([f"{kind}:{task}" for kind in kinds] if self.mode == "onecall"
+                           else [f"{task[0]}:{task[1]}"]) for task in tasks}
+            tasks.sort(key=lambda task: all(self.cache.get_stale(key) is not None for key in keys[task]))
+            tasks, deferred = tasks[:max(0, max_fetches)], tasks[max(0, max_fetches):]
+            for task in deferred:
+                cell = task if self.mode == "onecall" else task[1]
+                for key in keys[task]:
+                    found[key] = self._fallback(key.split(":", 1)[0], cell, *centers[cell])
+        
+        if tasks:
+            with ThreadPoolExecutor(max_workers=min(len(tasks), self.fetch_workers)) as pool:
+                for task, result in zip(tasks, pool.map(fetch, tasks)):
+                    if self.mode == "onecall":
+                        for kind in kinds:
+                            found[f"{kind}:{task}"] = result.get(kind, result)
+                    else:
+                        found[f"{task[0]}:{task[1]}"] = result
+        
+        return {kind: [found[f"{kind}:{cell}"] for cell in point_cells] for kind in kinds}
+    
+    def _fallback(self, kind: str, cell: str, lat: float, lon: float) -> Dict[str, Any]:
+        """
+        Answer a miss without calling upstream
+        
+        Args:
+            kind: "current" or "forecast"
+            cell: Grid cell of the miss
+            lat: Cell center latitude
+            lon: Cell center longitude
             
-            return {
-                "location": data["city"]["name"],
-                "country": data["city"]["country"],
-                "forecasts": processed_forecasts,
-                "timestamp": datetime.now()
-            }
+        Returns:
+            Dict containing the stale cached copy, the nearest cached
+            observation (current weather only), or an error
+        """
+        stale = self.cache.get_stale(f"{kind}:{cell}")
+        if stale is not None:
+            return stale
+        if kind == "current":
+            nearby = self.find_nearby_weather(lat, lon)
+            if "error" not in nearby:
+                return nearby
+        return {"error": "Upstream call limit reached for this request, try again shortly"}
+    
+    def find_nearby_weather(self, lat: float, lon: float, max_km: float = 5.0) -> Dict[str, Any]:
+        """
+        Get the closest cached current observation without calling upstream
+        
+        Args:
+            lat: Latitude
+            lon: Longitude
+            max_km: Maximum distance to the observation's cell center
             
-        except requests.RequestException as e:
-            return {"error": f"API request failed: {str(e)}"}
-        except KeyError as e:
-            return {"error": f"Unexpected API response format: {str(e)}"}
+        Returns:
+            Dict containing the cached weather data plus distance_km
+        """
+        match = self.observations.nearest(
+            lat, lon, max_km,
+            accept=lambda cell: self.cache.get(f"current:{cell}") is not None
+        )
+        cached = self.cache.get(f"current:{match[1]}") if match else None
+        if cached is None:
+            return {"error": f"No cached observation within {max_km} km"}
+        
+        distance, cell = match
+        result = dict(cached)
+        result["cell"] = cell
+        result["distance_km"] = round(distance, 2)
+        return result
+
+SERVER_LOCATION_TTL = 6 * 3600
+SERVER_LOCATION_RETRY = 300
+
+_server_location: Optional[Dict[str, Any]] = None
+_server_location_expires = 0.0
 
-def get_user_location() -> Dict[str, Any]:
+def get_server_location() -> Dict[str, Any]:
     """
-    Get user's location - uses .env coordinates, falls back to IP detection
+    Get the server's own location via IP detection, cached per process
+    
+    The lookup geolocates the host rather than the client, so it only runs
+    when nothing better is available, and at most once per few hours.
     
     Returns:
         Dict containing lat, lon, city info
     """
+    global _server_location, _server_location_expires
     
-    # Use coordinates from .env file if available
-    default_lat = os.getenv('DEFAULT_LATITUDE')
-    default_lon = os.getenv('DEFAULT_LONGITUDE')
-    
-    if default_lat and default_lon:
-        try:
-            return {
-                "latitude": float(default_lat),
-                "longitude": float(default_lon),
-                "city": os.getenv('DEFAULT_CITY', 'Rochester'),
-                "region": os.getenv('DEFAULT_REGION', 'New Hampshire'),
-                "country": "United States"
-            }
-        except ValueError:
-            pass  # Fall back to IP detection
+    if _server_location is not None and time.time() < _server_location_expires:
+        return _server_location
     
-    # Fallback to IP-based location detection
     try:
-        response = requests.get("https://ipapi.co/json/", timeout=5)
-        response.raise_for_status()
-        data = response.json()
+        data = decode_payload(http_get("https://ipapi.co/json/", timeout=5))
         
-        return {
+        location = {
             "latitude": data["latitude"],
             "longitude": data["longitude"],
             "city": data["city"],
             "region": data["region"],
             "country": data["country_name"]
         }
+        ttl = SERVER_LOCATION_TTL
         
-    except requests.RequestException as e:
+    except (UpstreamError, KeyError, ValueError) as e:
         # Final fallback to Rochester, NH
-        return {
+        location = {
             "latitude": 43.3000803,
             "longitude": -70.988277,
             "city": "Rochester",
@@ -210,3 +464,44 @@ def get_user_location() -> Dict[str, Any]:
             "country": "United States",
             "error": f"Using fallback location: {str(e)}"
         }
+        ttl = SERVER_LOCATION_RETRY
+    
+    _server_location = location
+    _server_location_expires = time.time() + ttl
+    return location
+
+def get_user_location(client_ip: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get user's location - local IP table for the client, then .env
+    coordinates, then (cached) server IP detection
+    
+    Args:
+        client_ip: Client address, e.g. from X-Forwarded-For
+    
+    Returns:
+        Dict containing lat, lon, city info
+    """
+    
+    # Per-client lookup against the local IP range table, if installed
+    located = locate_ip(client_ip)
+    if located is not None:
+        return located
+    
+    # Use coordinates from .env file if available
+    default_lat = os.getenv('DEFAULT_LATITUDE')
+    default_lon = os.getenv('DEFAULT_LONGITUDE')
+    
+    if default_lat and default_lon:
+        try:
+            return {
+                "latitude": float(default_lat),
+                "longitude": float(default_lon),
+                "city": os.getenv('DEFAULT_CITY', 'Rochester'),
+                "region": os.getenv('DEFAULT_REGION', 'New Hampshire'),
+                "country": "United States"
+            }
+        except ValueError:
+            pass  # Fall back to IP detection
+    
+    # Fallback to IP-based detection of the server's location
+    return get_server_location()
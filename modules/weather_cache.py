@@ -0,0 +1,415 @@
+"""
+Weather app - Weather Cache Module
+TTL caches for upstream weather data
+
+Tiers share one interface: WeatherCache lives in process memory, HostCache
+is a SQLite file that every worker process on the host can read, and
+RemoteCache (modules.redis_cache) is a Redis-compatible server shared by
+every node. TieredCache stacks the local tier on a shared one. Entries are
+kept past their TTL for a grace period so callers can fall back to slightly
+stale data when a fresh fetch is not possible.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from modules.sqlite_store import SQLiteStore
+
+# Lease token for a refresh that goes ahead without cluster coordination
+NO_LEASE = ""
+
+# HostCache drops entries past their grace period once every this many writes
+PURGE_EVERY = 1000
+
+class WeatherCache:
+    """
+    Thread-safe LRU cache with per-entry TTL (the local tier)
+    """
+
+    def __init__(self, max_entries: int = 1024, stale_ttl: int = 3600):
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: str, allow_stale: bool) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if now >= expires_at + self.stale_ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            if now >= expires_at and not allow_stale:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a fresh cache entry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        return self._lookup(key, allow_stale=False)
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """
+        Get a cache entry even if its TTL has passed
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or past the stale grace period
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several fresh entries at once
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of key to value for every fresh hit
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until the entry is considered stale
+        """
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """
+        Remove an entry
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with size, hits, misses and hit rate
+        """
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+class HostCache(SQLiteStore):
+    """
+    SQLite-backed TTL cache shared by all processes on a host (the host tier)
+
+    Values are stored with the remote tier's binary codec (never pickled),
+    in a file created owner-only; a file owned by another user is refused.
+    """
+
+    def __init__(self, path: str, stale_ttl: int = 3600):
+        super().__init__(path)
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        if os.stat(path).st_uid != os.getuid():
+            raise PermissionError(f"Host cache {path} is owned by another user")
+        os.chmod(path, 0o600)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """
+        Get an entry with its expiry time, fresh or stale
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (expires_at, value), or None if missing or too old
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT expires_at, value FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time() - self.stale_ttl)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        from modules.redis_cache import decode_value  # redis_cache imports this module
+        try:
+            return decode_value(row[1])
+        except ValueError:
+            return None
+
+    def get_entries(self, keys: Iterable[str]) -> Dict[str, Tuple[float, Any]]:
+        """
+        Get several entries with their expiry times in one query
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dict of key to (expires_at, value) for every fresh or stale entry
+        """
+        from modules.redis_cache import decode_value  # redis_cache imports this module
+        keys = list(dict.fromkeys(keys))
+        entries: Dict[str, Tuple[float, Any]] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            try:
+                rows = self._connect().execute(
+                    f"SELECT key, expires_at, value FROM cache WHERE key IN ({','.join('?' * len(chunk))}) "
+                    "AND expires_at > ?",
+                    (*chunk, time.time() - self.stale_ttl)
+                ).fetchall()
+            except sqlite3.Error:
+                return entries
+            for key, _, value in rows:
+                try:
+                    entries[key] = decode_value(value)
+                except ValueError:
+                    continue
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        if entry is None or entry[0] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        entry = self.get_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        from modules.redis_cache import encode_value  # redis_cache imports this module
+        expires_at = time.time() + ttl
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, encode_value(value, expires_at))
+            )
+        except (sqlite3.Error, TypeError):
+            return  # The host tier is best-effort
+        self.writes += 1
+        if self.writes % PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache")
+        except sqlite3.Error:
+            pass
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries past their stale grace period
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            cursor = self._connect().execute(
+                "DELETE FROM cache WHERE expires_at <= ?", (time.time() - self.stale_ttl,)
+            )
+        except sqlite3.Error:
+            return 0
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            size = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            size = 0
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+class TieredCache:
+    """
+    Process-local cache in front of a shared tier (HostCache or RemoteCache)
+
+    Reads fall through to the shared tier and backfill the local tier with
+    the entry's remaining TTL; writes go to both.
+    """
+
+    def __init__(self, local: WeatherCache, shared: Any, name: str = "host"):
+        self.local = local
+        self.shared = shared
+        self.name = name
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        entry = self.shared.get_entry(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        self.local.set(key, entry[1], entry[0] - time.time())
+        return entry[1]
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = self.local.get_stale(key)
+        if value is not None:
+            return value
+        return self.shared.get_stale(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        # Local hits first, then every remaining key in one shared-tier batch
+        keys = list(keys)
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+        now = time.time()
+        for key, (expires_at, value) in self.shared.get_entries(missing).items():
+            if expires_at > now:
+                self.local.set(key, value, expires_at - now)
+                found[key] = value
+        return found
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.local.set(key, value, ttl)
+        self.shared.set(key, value, ttl)
+
+    def acquire(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Take the shared tier's refresh lease for a key, if it has leases
+
+        Args:
+            key: Cache key about to be refreshed
+            ttl: Seconds after which the lease lapses
+
+        Returns:
+            Lease token, None if another node is refreshing the key, or
+            NO_LEASE if the shared tier cannot coordinate refreshes
+        """
+        acquire = getattr(self.shared, "acquire", None)
+        return NO_LEASE if acquire is None else acquire(key, ttl)
+
+    def release(self, key: str, token: str) -> None:
+        """
+        Give up a refresh lease taken with acquire()
+
+        Args:
+            key: Cache key that was refreshed
+            token: Token returned by acquire()
+        """
+        if token != NO_LEASE:
+            self.shared.release(key, token)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def clear(self) -> None:
+        self.local.clear()
+        self.shared.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"local": self.local.stats(), self.name: self.shared.stats()}
+
+def build_cache() -> Any:
+    """
+    Build the weather cache configured by the environment
+
+    Uses a process-local cache, stacked on a Redis-compatible tier shared
+    by every node when REDIS_URL is set, else on a host-wide SQLite tier
+    when HOST_CACHE_PATH is set (the production launcher sets it so
+    pre-forked workers share fetched data).
+
+    Returns:
+        WeatherCache or TieredCache
+    """
+    local = WeatherCache()
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        from modules.redis_cache import RedisClient, RemoteCache
+        return TieredCache(local, RemoteCache(RedisClient.from_url(redis_url)), "remote")
+    host_path = os.getenv('HOST_CACHE_PATH')
+    if not host_path:
+        return local
+    try:
+        return TieredCache(local, HostCache(host_path))
+    except (sqlite3.Error, OSError) as e:
+        print(f"Warning: host cache unavailable at {host_path}: {e}")
+        return local
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+bench-forecast.py: Compare forecast day-bucketing paths for speed and correctness.
+
+Feeds the recorded OpenWeatherMap 5-day forecast in tests/fixtures, re-labelled
+with a spread of city UTC offsets, through two aggregation paths:
+
+    datetime/slot  - the previous path (datetime.fromtimestamp(dt).date() per
+                     slot, in the server's time zone, dict-of-lists per day,
+                     plus a second pass for the slot series columns)
+    integer days   - OpenWeatherMapProvider.forecast() (columns once, then
+                     (dt + city.timezone) // 86400 runs via summarize_days)
+
+For each path it reports time per forecast at batch scale and how many slots
+land on a different date than the city's own calendar puts them on.
+
+Usage:
+    .venv/bin/python scripts/bench-forecast.py [forecasts]
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules.providers import OpenWeatherMapProvider
+from modules.timeline import day_date, day_runs, make_series
+
+FIXTURE = os.path.join(ROOT, 'tests', 'fixtures', 'owm_forecast.json')
+
+# Honolulu, Montreal (EDT), London (UTC), Delhi, Tokyo, Auckland (NZDT)
+OFFSETS = [-36000, -14400, 0, 19800, 32400, 46800]
+
+def previous_forecast(data):
+    """The aggregation get_forecast used before: one datetime per slot, server time zone"""
+    daily_forecasts = []
+    current_date = None
+    daily_data = {}
+    for item in data["list"]:
+        forecast_date = datetime.fromtimestamp(item["dt"]).date()
+        if current_date != forecast_date:
+            if daily_data:
+                daily_forecasts.append(daily_data)
+            daily_data = {
+                "date": forecast_date,
+                "temps": [item["main"]["temp"]],
+                "descriptions": [item["weather"][0]["description"]],
+                "conditions": [item["weather"][0]["id"]],
+                "icons": [item["weather"][0]["icon"]],
+                "humidity": [item["main"]["humidity"]],
+                "wind_speed": [item["wind"]["speed"]],
+                "rain_chance": item.get("pop", 0) * 100
+            }
+            current_date = forecast_date
+        else:
+            daily_data["temps"].append(item["main"]["temp"])
+            daily_data["descriptions"].append(item["weather"][0]["description"])
+            daily_data["conditions"].append(item["weather"][0]["id"])
+            daily_data["icons"].append(item["weather"][0]["icon"])
+            daily_data["humidity"].append(item["main"]["humidity"])
+            daily_data["wind_speed"].append(item["wind"]["speed"])
+            daily_data["rain_chance"] = max(daily_data["rain_chance"], item.get("pop", 0) * 100)
+    if daily_data:
+        daily_forecasts.append(daily_data)
+
+    slots = data["list"]
+    make_series([item["dt"] for item in slots], {
+        "temperature": [item["main"]["temp"] for item in slots],
+        "feels_like": [item["main"].get("feels_like", item["main"]["temp"]) for item in slots],
+        "humidity": [item["main"]["humidity"] for item in slots],
+        "wind_speed": [item["wind"]["speed"] for item in slots],
+        "rain_chance": [item.get("pop", 0) * 100 for item in slots],
+        "condition_id": [item["weather"][0]["id"] for item in slots]
+    })
+    return [{
+        "date": day["date"],
+        "temp_high": max(day["temps"]),
+        "temp_low": min(day["temps"]),
+        "description": max(set(day["descriptions"]), key=day["descriptions"].count),
+        "condition_id": max(set(day["conditions"]), key=day["conditions"].count),
+        "icon": max(set(day["icons"]), key=day["icons"].count),
+        "humidity": sum(day["humidity"]) // len(day["humidity"]),
+        "wind_speed": sum(day["wind_speed"]) / len(day["wind_speed"]),
+        "rain_chance": day["rain_chance"]
+    } for day in daily_forecasts[:7]]
+
+def slot_dates(data, offset, local):
+    """Date each slot is filed under: by the city's calendar, or the server's"""
+    if local:
+        return [day_date(day) for day, lo, hi in day_runs([item["dt"] for item in data["list"]], offset)
+                for _ in range(lo, hi)]
+    return [datetime.fromtimestamp(item["dt"]).date() for item in data["list"]]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with open(FIXTURE) as f:
+        fixture = json.load(f)
+
+    batch = []
+    for index in range(count):
+        data = json.loads(json.dumps(fixture))
+        data["city"]["timezone"] = OFFSETS[index % len(OFFSETS)]
+        batch.append(data)
+
+    provider = OpenWeatherMapProvider('bench')
+    queue = []
+    provider._fetch = lambda url, **params: queue.pop()
+
+    def current_forecast(data):
+        queue.append(data)
+        return provider.forecast(0.0, 0.0)["forecasts"]
+
+    print(f"server time zone: {time.strftime('%Z (UTC%z)')}, {count} forecasts x {len(fixture['list'])} slots")
+    print(f"{'path':<15} {'us/forecast':>12} {'misfiled slots':>15}")
+    for label, aggregate, local in (('datetime/slot', previous_forecast, False),
+                                    ('integer days', current_forecast, True)):
+        aggregate(batch[0])
+        start = time.perf_counter()
+        for data in batch:
+            aggregate(data)
+        elapsed_us = (time.perf_counter() - start) / count * 1e6
+
+        misfiled = 0
+        for offset in OFFSETS:
+            truth = [datetime.fromtimestamp(item["dt"], timezone(timedelta(seconds=offset))).date()
+                     for item in fixture["list"]]
+            misfiled += sum(a != b for a, b in zip(truth, slot_dates(fixture, offset, local)))
+        print(f"{label:<15} {elapsed_us:>12.1f} {misfiled:>9} / {len(OFFSETS) * len(fixture['list'])}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+bench-payload.py: Compare upstream payload decoding paths end to end.
+
+Feeds the recorded OpenWeatherMap fixtures in tests/fixtures through
+WeatherAPI (cache disabled, network stubbed) and reports time per response
+and peak transient memory for each decoding path:
+
+    response.json  - the previous path (text decode + stdlib json)
+    stdlib bytes   - decode_payload() without orjson
+    orjson bytes   - decode_payload() with orjson (only if installed)
+
+Usage:
+    .venv/bin/python scripts/bench-payload.py [iterations]
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from modules import payload, providers
+from modules.weather_api import WeatherAPI
+from modules.weather_cache import WeatherCache
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures')
+CASES = [
+    ('current', 'owm_current.json', 'standard', 'get_current_weather'),
+    ('forecast', 'owm_forecast.json', 'standard', 'get_forecast'),
+    ('onecall', 'owm_onecall.json', 'onecall', 'get_weather_bundle'),
+]
+
+class FixtureResponse:
+    def __init__(self, body):
+        self.content = body
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+def measure(call, iterations):
+    call()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    elapsed_us = (time.perf_counter() - start) / iterations * 1e6
+
+    gc.collect()
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed_us, peak
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    try:
+        import orjson as installed_orjson
+    except ImportError:
+        installed_orjson = None
+
+    paths = [('response.json', lambda body: json.loads(body.decode('utf-8')))]
+    paths.append(('stdlib bytes', json.loads))
+    if installed_orjson is not None:
+        paths.append(('orjson bytes', installed_orjson.loads))
+    else:
+        print("ℹ️  orjson not installed - skipping the orjson path")
+
+    print(f"{'payload':<10} {'path':<15} {'bytes':>7} {'us/op':>9} {'peak KiB':>9}")
+    for name, filename, mode, method in CASES:
+        with open(os.path.join(FIXTURES, filename), 'rb') as f:
+            body = f.read()
+        requests.get = lambda url, params=None, timeout=None: FixtureResponse(body)
+        api = WeatherAPI(api_key='bench', cache=WeatherCache(max_entries=0), mode=mode)
+
+        for label, decoder in paths:
+            providers.decode_payload = decoder
+            elapsed_us, peak = measure(lambda: getattr(api, method)(45.5017, -73.5673), iterations)
+            print(f"{name:<10} {label:<15} {len(body):>7} {elapsed_us:>9.1f} {peak / 1024:>9.1f}")
+
+    providers.decode_payload = payload.decode_payload
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+bench-replay.py: Load-test the full request path offline from a recorded upstream archive.
+
+Serves /api/weather and /api/forecast requests through the Flask app, with
+every upstream call answered by modules.transport.ReplayTransport: recorded
+bodies after their recorded latency divided by the speed factor. Request
+coordinates are drawn (seeded) around the archive's recorded points, so
+runs are reproducible and also exercise cells that were never recorded.
+All stores go to a temporary directory.
+
+Record an archive once, against the live upstreams or the stubs in
+tests/stub_servers.py, by running the app with:
+
+    TRANSPORT=record TRANSPORT_ARCHIVE=data/upstream.jsonl.gz
+
+Usage:
+    .venv/bin/python scripts/bench-replay.py ARCHIVE [requests] [concurrency] [speed]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SPREAD = 0.01  # degrees of jitter: a few grid cells around each recorded point
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    archive = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    speed = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+
+    scratch = tempfile.mkdtemp(prefix='bench-replay-')
+    for name in ('ROLLUP_DB', 'ACCURACY_DB', 'ACCESS_DB', 'ALERTS_DB', 'QUOTA_DB'):
+        os.environ[name] = os.path.join(scratch, name.lower() + '.sqlite')
+    os.environ['HISTORY_DIR'] = os.path.join(scratch, 'history')
+
+    from modules.transport import ReplayTransport, request_key, set_transport
+    from modules.weather_api import WeatherAPI
+    from modules.weather_cache import WeatherCache
+    from weather_app import create_app
+
+    transport = ReplayTransport(archive, speed)
+    set_transport(transport)
+    points = sorted({point for point in (request_key(e['url'], e['params'])[2] for e in transport.exchanges)
+                     if point is not None})
+    if not points:
+        sys.exit(f"{archive}: no recorded coordinates to draw requests from")
+
+    rng = random.Random(1)
+    paths = []
+    for index in range(count):
+        lat, lon = rng.choice(points)
+        endpoint = '/api/weather' if index % 2 == 0 else '/api/forecast'
+        paths.append(f"{endpoint}?lat={lat + rng.uniform(-SPREAD, SPREAD):.5f}"
+                     f"&lon={lon + rng.uniform(-SPREAD, SPREAD):.5f}")
+
+    weather_api = WeatherAPI(api_key='replay', cache=WeatherCache())
+    app = create_app(weather_api)
+
+    def request(path):
+        start = time.perf_counter()
+        status = app.test_client().get(path).status_code
+        return status, time.perf_counter() - start
+
+    print(f"archive: {archive} ({len(transport.exchanges)} exchanges, {len(points)} points), "
+          f"speed x{speed:g}, {count} requests, concurrency {concurrency}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(request, paths))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(elapsed * 1000 for _, elapsed in results)
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"wall {wall:.2f} s, {count / wall:.0f} req/s, statuses {statuses}")
+    print(f"latency ms: p50 {percentile(latencies, 0.5):.2f}  p95 {percentile(latencies, 0.95):.2f}  "
+          f"p99 {percentile(latencies, 0.99):.2f}  max {latencies[-1]:.2f}")
+    print(f"upstream: {weather_api.refreshes['fetched']} fetches, replayed {transport.stats}")
+
+if __name__ == '__main__':
+    main()
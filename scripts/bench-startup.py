@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+bench-startup.py: Measure cold-start cost of the weather app.
+
+Runs fresh interpreters and reports medians of:
+
+    import       `import weather_app`
+    create_app   building the app and its services
+    first /health  first response through the test client (in process)
+    process      interpreter start to that first response
+    server       spawning `python weather_app.py` to the first HTTP 200
+                 from /health
+
+then the import time of each project module and of each package that
+weather_app pulls in directly, from `python -X importtime`.
+
+Usage:
+    .venv/bin/python scripts/bench-startup.py [runs]
+"""
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import weather_app
+imported = time.perf_counter()
+app = weather_app.create_app()
+created = time.perf_counter()
+status = app.test_client().get('/health').status_code
+answered = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported,
+                  "first /health": answered - created, "status": status}))
+"""
+
+def run_probe():
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - started
+    return timings
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def time_server(deadline=30.0):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), DEBUG='False')
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'weather_app.py'], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < deadline:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=0.5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+def import_times():
+    """Cumulative import time (seconds) per project module and direct dependency"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import weather_app'],
+                            cwd=ROOT, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if m:
+            rows.append((int(m.group(2)) / 1e6, len(m.group(3)), m.group(4)))
+
+    # Modules are listed after their children, so weather_app's direct imports
+    # are the depth-3 rows between it and the previous top-level row
+    end = next(i for i, row in enumerate(rows) if row[2] == 'weather_app')
+    start = max((i for i in range(end) if rows[i][1] <= 1), default=-1) + 1
+    direct = {name: t for t, depth, name in rows[start:end]
+              if depth == 3 or name.startswith('modules.')}
+    return rows[end][0], sorted(((t, name) for name, t in direct.items()), reverse=True)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    probes = [run_probe() for _ in range(runs)]
+    servers = [t for t in (time_server() for _ in range(runs)) if t is not None]
+
+    print(f"Cold start over {runs} runs (median, ms)")
+    for key in ('import', 'create_app', 'first /health', 'process'):
+        print(f"  {key:<14} {statistics.median(p[key] for p in probes) * 1000:>8.1f}")
+    if servers:
+        print(f"  {'server':<14} {statistics.median(servers) * 1000:>8.1f}")
+    else:
+        print("  server         did not answer /health")
+
+    total, modules = import_times()
+    print(f"\nImport time for weather_app: {total * 1000:.1f} ms (cumulative, ms)")
+    for seconds, name in modules:
+        print(f"  {name:<28} {seconds * 1000:>8.1f}")
+
+if __name__ == '__main__':
+    main()
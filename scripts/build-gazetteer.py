@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+build-gazetteer.py: Build data/cities.tsv from a GeoNames cities dump.
+
+Usage:
+    scripts/build-gazetteer.py cities15000.txt [admin1CodesASCII.txt] [countryInfo.txt]
+
+Download the inputs from https://download.geonames.org/export/dump/. The
+output is sorted by normalized name so modules/geocoder.py can binary-search
+it in place.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.geocoder import DEFAULT_GAZETTEER, normalize_name
+
+def load_admin1(path):
+    names = {}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                code, name, ascii_name, _ = line.rstrip('\n').split('\t', 3)
+                names[code] = ascii_name or name
+    return names
+
+def load_countries(path):
+    names = {}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                names[fields[0]] = fields[4]
+    return names
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    admin1 = load_admin1(sys.argv[2] if len(sys.argv) > 2 else None)
+    countries = load_countries(sys.argv[3] if len(sys.argv) > 3 else None)
+
+    rows = []
+    with open(sys.argv[1], encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            name, lat, lon = fields[1], fields[4], fields[5]
+            country_code, region_code, population = fields[8], fields[10], fields[14]
+            key = normalize_name(name)
+            if not key:
+                continue
+            region = admin1.get(f"{country_code}.{region_code}", '')
+            country = countries.get(country_code, country_code)
+            rows.append((key, name, region, region_code, country_code, country,
+                         lat, lon, population or '0'))
+
+    rows.sort(key=lambda row: (row[0].encode('ascii'), -int(row[8])))
+
+    os.makedirs(os.path.dirname(DEFAULT_GAZETTEER), exist_ok=True)
+    with open(DEFAULT_GAZETTEER, 'w', encoding='utf-8', newline='\n') as f:
+        for row in rows:
+            f.write('\t'.join(row) + '\n')
+
+    print(f"✅ Wrote {len(rows)} cities to {DEFAULT_GAZETTEER}")
+
+if __name__ == '__main__':
+    main()
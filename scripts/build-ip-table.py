@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+build-ip-table.py: Build data/ip_ranges.bin from a DB-IP "IP to City Lite" CSV.
+
+Usage:
+    scripts/build-ip-table.py dbip-city-lite.csv [output.bin]
+
+Download the CSV from https://db-ip.com/db/download/ip-to-city-lite (CC BY 4.0).
+Columns: ip_start, ip_end, continent, country, stateprov, city, latitude, longitude.
+IPv6 rows are skipped.
+"""
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ip_locator import write_ip_table
+
+def read_ranges(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 8 or ':' in row[0]:
+                continue
+            ip_start, ip_end, _, country, region, city, lat, lon = row[:8]
+            yield ip_start, ip_end, lat, lon, city, region, country
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    output = sys.argv[2] if len(sys.argv) > 2 else None
+    count = write_ip_table(read_ranges(sys.argv[1]), output)
+    print(f"✅ Wrote {count} IPv4 ranges")
+
+if __name__ == '__main__':
+    main()
@@ -47,7 +47,7 @@ def get_api_endpoints(api_path):
     endpoints = set()
     with open(api_path, 'r') as f:
         for line in f:
-            m = re.search(r'@app\.route\(["\'](/api/[^"\']*)', line)
+            m = re.search(r'@(?:app|bp)\.route\(["\'](/api/[^"\']*)', line)
             if m:
                 endpoints.add(m.group(1))
     return endpoints
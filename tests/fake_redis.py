@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Weather app - Fake Redis Server
+In-process stand-in for a Redis-compatible cache server
+
+Speaks enough RESP2 for the remote cache tier (PING, AUTH, SELECT, GET,
+SET with EX/PX/NX, MGET, DEL, PTTL, SCAN, DBSIZE, FLUSHDB, and EVAL of the
+lease release script) on 127.0.0.1,
+keeps keys in a dict with millisecond expiry, and counts commands by name
+so tests can check how many round trips a lookup cost.
+"""
+
+import fnmatch
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+
+from modules.redis_cache import RELEASE_SCRIPT
+
+def encode(reply):
+    """Encode a Python value as a RESP2 reply"""
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+class Server(socketserver.ThreadingTCPServer):
+    """Threaded TCP server with a listen backlog closer to a real server's"""
+    daemon_threads = True
+    request_queue_size = 128
+
+def read_command(reader):
+    """Read one RESP array of bulk strings, or None at end of stream"""
+    line = reader.readline()
+    if not line:
+        return None
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(reader.readline()[1:])
+        args.append(reader.read(length + 2)[:-2])
+    return args
+
+class FakeRedis:
+    """Serves a dict-backed keyspace on a background thread"""
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.expires = {}
+        self.commands = Counter()
+        self.connections = set()
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                fake.connections.add(self.connection)
+
+            def finish(self):
+                fake.connections.discard(self.connection)
+                super().finish()
+
+            def handle(self):
+                authed = fake.password is None
+                while True:
+                    try:
+                        command = read_command(self.rfile)
+                    except (OSError, ValueError):
+                        return
+                    if command is None:
+                        return
+                    name = command[0].decode().upper()
+                    if not authed and name != 'AUTH':
+                        self.wfile.write(b"-NOAUTH Authentication required.\r\n")
+                        continue
+                    if name == 'AUTH':
+                        authed = command[1].decode() == fake.password
+                        reply = 'OK' if authed else Exception('invalid password')
+                    else:
+                        reply = fake.run(name, command[1:])
+                    self.wfile.write(encode(reply))
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _live(self, key):
+        expires = self.expires.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def run(self, name, args):
+        """Execute one command against the keyspace"""
+        with self.lock:
+            self.commands[name] += 1
+            if name == 'PING':
+                return 'PONG'
+            if name == 'SELECT' or name == 'FLUSHDB':
+                if name == 'FLUSHDB':
+                    self.data.clear()
+                    self.expires.clear()
+                return 'OK'
+            if name == 'GET':
+                return self.data[args[0]] if self._live(args[0]) else None
+            if name == 'MGET':
+                return [self.data[key] if self._live(key) else None for key in args]
+            if name == 'SET':
+                key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+                if b'NX' in options and self._live(key):
+                    return None
+                self.data[key] = value
+                self.expires.pop(key, None)
+                for unit, scale in ((b'PX', 1000.0), (b'EX', 1.0)):
+                    if unit in options:
+                        self.expires[key] = time.monotonic() + int(args[2 + options.index(unit) + 1]) / scale
+                return 'OK'
+            if name == 'DEL':
+                removed = [key for key in args if self._live(key)]
+                for key in removed:
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                return len(removed)
+            if name == 'PTTL':
+                if not self._live(args[0]):
+                    return -2
+                expires = self.expires.get(args[0])
+                return -1 if expires is None else int((expires - time.monotonic()) * 1000)
+            if name == 'SCAN':
+                pattern = args[args.index(b'MATCH') + 1].decode() if b'MATCH' in args else '*'
+                keys = [key for key in list(self.data) if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return [b'0', keys]
+            if name == 'EVAL' and args[0].decode() == RELEASE_SCRIPT:
+                key, token = args[2], args[3]
+                if self._live(key) and self.data[key] == token:
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                    return 1
+                return 0
+            if name == 'DBSIZE':
+                return sum(1 for key in list(self.data) if self._live(key))
+            return Exception(f"unknown command '{name}'")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        # Stop listening and drop open connections, like a server going down
+        self.server.shutdown()
+        self.server.server_close()
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
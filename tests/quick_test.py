@@ -6,6 +6,7 @@ Fast development testing for immediate feedback
 
 import sys
 import os
+import time
 import requests
 
 # Add project root to path
@@ -25,6 +26,190 @@ def quick_backend_test():
         print(f"❌ Backend test failed: {e}")
         return False
 
+def quick_provider_test():
+    """Test provider adapters and hedging against local stub servers"""
+    try:
+        from modules.providers import HedgedProvider, OpenMeteoProvider, OpenWeatherMapProvider
+        from tests.stub_servers import open_meteo_stub, openweathermap_stub
+        
+        with openweathermap_stub() as owm, open_meteo_stub() as meteo:
+            primary = OpenWeatherMapProvider('stub', base_url=owm.url, onecall_url=f"{owm.url}/onecall")
+            secondary = OpenMeteoProvider(base_url=f"{meteo.url}/v1/forecast")
+            for provider in (primary, secondary):
+                current = provider.current(45.5017, -73.5673)
+                forecast = provider.forecast(45.5017, -73.5673)
+                bundle = provider.bundle(45.5017, -73.5673)
+                assert 'temperature' in current, current
+                assert forecast['forecasts'], forecast
+                assert set(bundle) == {'current', 'forecast', 'hourly'}, bundle
+            
+            # A primary slower than the hedge delay loses to the secondary
+            owm.delay = 0.5
+            hedged = HedgedProvider(primary, secondary, default_delay=0.05)
+            started = time.perf_counter()
+            current = hedged.current(45.5017, -73.5673)
+            assert 'temperature' in current and current['location'] == '', current
+            assert time.perf_counter() - started < 0.4
+            assert hedged.hedged == 1 and hedged.secondary_wins == 1
+            
+            # A fast primary answers alone
+            owm.delay = 0.0
+            meteo_hits = meteo.hits
+            assert hedged.current(45.5017, -73.5673)['location'] == 'Montreal'
+            assert meteo.hits == meteo_hits
+        
+        print("✅ Providers and hedging working against stub servers")
+        return True
+    except Exception as e:
+        print(f"❌ Provider test failed: {e!r}")
+        return False
+
+def quick_transport_test():
+    """Test recording upstream exchanges from a stub server and replaying them offline"""
+    try:
+        import tempfile
+        from modules.providers import OpenWeatherMapProvider
+        from modules.transport import (RecordingTransport, ReplayTransport, RequestsTransport,
+                                       UpstreamError, set_transport)
+        from tests.stub_servers import openweathermap_stub
+        
+        archive = os.path.join(tempfile.mkdtemp(), 'upstream.jsonl.gz')
+        try:
+            with openweathermap_stub(delay=0.05) as owm:
+                provider = OpenWeatherMapProvider('stub', base_url=owm.url, onecall_url=f"{owm.url}/onecall")
+                recorder = RecordingTransport(RequestsTransport(), archive)
+                set_transport(recorder)
+                live = provider.current(45.5017, -73.5673)
+                provider.forecast(45.5017, -73.5673)
+                assert recorder.flush() == 2 and owm.hits == 2
+            
+            # Stub is gone: everything comes from the archive, credentials never stored
+            replay = ReplayTransport(archive, speed=1.0)
+            assert all('appid' not in exchange['params'] for exchange in replay.exchanges)
+            set_transport(replay)
+            started = time.perf_counter()
+            replayed = provider.current(45.5017, -73.5673)
+            assert time.perf_counter() - started >= 0.05
+            assert {k: v for k, v in replayed.items() if k != 'timestamp'} == \
+                {k: v for k, v in live.items() if k != 'timestamp'}
+            assert provider.forecast(45.52, -73.55)['forecasts']
+            assert replay.stats == {'exact': 1, 'nearest': 1, 'missing': 0}, replay.stats
+            
+            # Scaled speed, and timeouts when a scaled recording is too slow
+            replay.speed = 0
+            started = time.perf_counter()
+            provider.current(45.5017, -73.5673)
+            assert time.perf_counter() - started < 0.05
+            replay.speed = 0.001
+            try:
+                replay.get(f"{owm.url}/weather", {'lat': 45.5017, 'lon': -73.5673}, timeout=0.01)
+                raise AssertionError("slow replay did not time out")
+            except UpstreamError:
+                pass
+        finally:
+            set_transport(None)
+        
+        print("✅ Upstream exchanges recorded and replayed offline")
+        return True
+    except Exception as e:
+        print(f"❌ Transport test failed: {e!r}")
+        return False
+
+def quick_cache_test():
+    """Test the shared remote cache tier against a local fake Redis server"""
+    try:
+        from datetime import date
+        from modules.redis_cache import RedisClient, RemoteCache
+        from modules.weather_cache import TieredCache, WeatherCache
+        from tests.fake_redis import FakeRedis
+        
+        forecast = {'location': 'Montreal', 'forecasts': [
+            {'date': date(2025, 1, day), 'temp_high': 30.5 + day, 'temp_low': 20.0, 'description': 'light snow'}
+            for day in range(1, 6)
+        ]}
+        with FakeRedis() as server:
+            # Two nodes, each with its own local tier, share the remote tier
+            node_a = TieredCache(WeatherCache(), RemoteCache(RedisClient.from_url(server.url)), 'remote')
+            node_b = TieredCache(WeatherCache(), RemoteCache(RedisClient.from_url(server.url)), 'remote')
+            keys = [f"forecast:cell{i}" for i in range(150)]
+            for key in keys:
+                node_a.set(key, forecast, 60)
+            
+            # A batch lookup is one pipelined round trip, whatever the key count
+            server.commands.clear()
+            found = node_b.get_many(keys + ['forecast:missing'])
+            assert len(found) == 150 and found['forecast:cell7'] == forecast, len(found)
+            assert dict(server.commands) == {'MGET': 2}, server.commands
+            
+            # Expired entries stay readable as stale copies
+            node_a.set('current:old', {'temperature': 41.0}, -1)
+            assert node_b.get('current:old') is None
+            assert node_b.get_stale('current:old') == {'temperature': 41.0}
+            
+            # One node at a time holds the refresh lease for a key
+            token = node_a.acquire('current:old', 10)
+            assert token and node_b.acquire('current:old', 10) is None
+            node_b.release('current:old', 'not-the-holder')
+            assert node_b.acquire('current:old', 10) is None
+            node_a.release('current:old', token)
+            assert node_b.acquire('current:old', 10)
+        
+        # With the server gone, reads and writes fall back to the local tier
+        node_b.set('current:local', {'temperature': 50.0}, 60)
+        assert node_b.get('current:local') == {'temperature': 50.0}
+        assert node_b.get_many(keys[:3]) and not node_b.shared.available()
+        
+        print("✅ Remote cache tier working against fake Redis")
+        return True
+    except Exception as e:
+        print(f"❌ Cache test failed: {e!r}")
+        return False
+
+def quick_alert_test():
+    """Test alert evaluation, deduplication and webhook delivery against a local stub"""
+    try:
+        import tempfile
+        from datetime import date
+        from modules.alerts import AlertEngine
+        from tests.stub_servers import webhook_stub
+        
+        with webhook_stub() as hook:
+            engine = AlertEngine(os.path.join(tempfile.mkdtemp(), 'alerts.sqlite'), background=False, webhook_hosts=['127.0.0.1'], allow_private=True)
+            windy = engine.add_rule('f25dvk', 'current', 'wind_speed', '>', 30, f"{hook.url}/hook")
+            rainy = engine.add_rule('f25dvk', 'forecast', 'rain_chance', '>', 70, f"{hook.url}/hook")
+            engine.add_rule('dr5reg', 'current', 'wind_speed', '>', 0, f"{hook.url}/hook")
+            forecast = {'location': 'Montreal', 'forecasts': [
+                {'date': date(2025, 1, 1), 'rain_chance': 90.0},
+                {'date': date(2025, 1, 2), 'rain_chance': 10.0},
+                {'date': date(2025, 1, 3), 'rain_chance': 75.0},
+            ]}
+            
+            # Only the refreshed cell's rules for that endpoint are evaluated
+            assert engine.record('forecast', 'f25dvk', forecast) == 2
+            assert [n['event'] for n in hook.received] == ['2025-01-01', '2025-01-03'], hook.received
+            assert engine.counters['evaluated'] == 1
+            
+            # A refresh with the same conditions does not notify again
+            assert engine.record('forecast', 'f25dvk', forecast) == 0
+            assert engine.record('current', 'f25dvk', {'wind_speed': 35.0}) == 1
+            assert engine.record('current', 'f25dvk', {'wind_speed': 40.0}) == 0
+            
+            # A cleared threshold re-arms
+            assert engine.record('current', 'f25dvk', {'wind_speed': 10.0}) == 0
+            assert engine.record('current', 'f25dvk', {'wind_speed': 31.0}) == 1
+            assert [n['rule']['id'] for n in hook.received] == [rainy['id'], rainy['id'], windy['id'], windy['id']]
+            
+            # A rejecting subscriber is counted as a failed delivery
+            hook.post_status = 410
+            engine.record('current', 'dr5reg', {'wind_speed': 5.0})
+            assert engine.counters['failed'] == 1 and len(hook.received) == 4
+        
+        print("✅ Alerts evaluated, deduplicated and delivered to webhook stub")
+        return True
+    except Exception as e:
+        print(f"❌ Alert test failed: {e!r}")
+        return False
+
 def quick_api_test():
     """Test core API endpoints"""
     base_url = "http://localhost:5000"
@@ -79,6 +264,10 @@ def main():
     
     tests = [
         ("🔬 Testing Backend Functions...", quick_backend_test),
+        ("🛰️ Testing Weather Providers...", quick_provider_test),
+        ("📼 Testing Record/Replay Transport...", quick_transport_test),
+        ("🗄️ Testing Remote Cache...", quick_cache_test),
+        ("🔔 Testing Alerts...", quick_alert_test),
         ("🌐 Testing API Endpoints...", quick_api_test),
         ("🖥️ Testing Frontend Pages...", quick_frontend_test),
     ]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Weather app - Stub Upstream Servers
+Local HTTP stand-ins for the weather providers
+
+Each stub serves the recorded fixtures in tests/fixtures on 127.0.0.1 with
+an adjustable response delay, so provider adapters and hedging can be
+exercised without network access or API keys. POST bodies are recorded, so
+a stub also stands in for an alert webhook receiver.
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_fixture(name):
+    """Read a fixture file as bytes"""
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+class StubServer:
+    """Serves fixture bodies by path suffix on a background thread"""
+
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.hits = 0
+        self.received = []
+        self.post_status = 204
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                path = urlparse(self.path).path
+                body = next((body for suffix, body in stub.routes.items() if path.endswith(suffix)), None)
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if stub.post_status < 400:
+                    stub.received.append(json.loads(body))
+                self.send_response(stub.post_status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+def openweathermap_stub(delay=0.0):
+    """OpenWeatherMap stand-in: /weather, /forecast and /onecall"""
+    return StubServer({
+        '/weather': load_fixture('owm_current.json'),
+        '/forecast': load_fixture('owm_forecast.json'),
+        '/onecall': load_fixture('owm_onecall.json'),
+    }, delay)
+
+def open_meteo_stub(delay=0.0):
+    """Open-Meteo stand-in: /v1/forecast"""
+    return StubServer({'/v1/forecast': load_fixture('openmeteo_forecast.json')}, delay)
+
+def webhook_stub(delay=0.0):
+    """Alert webhook receiver: records each accepted POST body in .received"""
+    return StubServer({}, delay)
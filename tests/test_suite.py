@@ -66,6 +66,1507 @@ BACKEND_TESTS = {
         "module": "modules.utils",
         "function": "save_log",
         "assertions": ["assert callable(result)"]
+    },
+    
+    "snap": {
+        "description": "Test WeatherAPI snaps coordinates to a grid cell",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI().snap",
+        "assertions": [
+            "cell, lat, lon = result(45.5017, -73.5673); assert len(cell) == result.__self__.precision and result(lat, lon) == (cell, lat, lon) and abs(lat - 45.5017) < 0.05 and abs(lon + 73.5673) < 0.05"
+        ]
+    },
+    
+    "_fallback": {
+        "description": "Test WeatherAPI answers a miss from the stale copy without calling upstream",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI()._fallback",
+        "assertions": [
+            "from modules.weather_cache import WeatherCache; api = result.__self__; api.cache = WeatherCache(); "
+            "api.cache.set('forecast:abc', {'list': []}, -1); "
+            "assert result('forecast', 'abc', 0.0, 0.0) == {'list': []} and 'error' in result('current', 'xyz', 0.0, 0.0)"
+        ]
+    },
+    
+    "find_nearby_weather": {
+        "description": "Test WeatherAPI serves the nearest cached observation within range",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI().find_nearby_weather",
+        "assertions": [
+            "from modules.weather_cache import WeatherCache; api = result.__self__; api.cache = WeatherCache(); cell, lat, lon = api.snap(45.5017, -73.5673); api.observations.add(lat, lon); api.cache.set('current:' + cell, {'temperature': 50}, 60); near = result(45.51, -73.56); assert near['temperature'] == 50 and near['cell'] == cell and near['distance_km'] < 5 and 'error' in result(10.0, 10.0)"
+        ]
+    },
+    
+    "encode": {
+        "description": "Test geohash encoding of a known point",
+        "module": "modules.geo_grid",
+        "function": "encode",
+        "assertions": ["assert result(57.64911, 10.40744, 11) == 'u4pruydqqvj'"]
+    },
+    
+    "decode": {
+        "description": "Test geohash decoding returns the cell center",
+        "module": "modules.geo_grid",
+        "function": "decode",
+        "assertions": ["assert abs(result('u4pruydqqvj')[0] - 57.64911) < 0.0001"]
+    },
+    
+    "decode_bounds": {
+        "description": "Test geohash cell bounds contain the cell center",
+        "module": "modules.geo_grid",
+        "function": "decode_bounds",
+        "assertions": ["assert result('u4')[0] < result('u4')[1]"]
+    },
+    
+    "cell_size": {
+        "description": "Test cell size shrinks with precision",
+        "module": "modules.geo_grid",
+        "function": "cell_size",
+        "assertions": ["assert result(6)[0] < result(5)[0]"]
+    },
+    
+    "neighbors": {
+        "description": "Test a mid-latitude cell has 8 neighbors",
+        "module": "modules.geo_grid",
+        "function": "neighbors",
+        "assertions": ["assert len(result('dr5ru7')) == 8"]
+    },
+    
+    "haversine_km": {
+        "description": "Test great-circle distance between two points",
+        "module": "modules.geo_grid",
+        "function": "haversine_km",
+        "assertions": ["assert 340 < result(51.5074, -0.1278, 48.8566, 2.3522) < 350"]
+    },
+    
+    "search_precision": {
+        "description": "Test search precision gets coarser for larger radii",
+        "module": "modules.geo_grid",
+        "function": "search_precision",
+        "assertions": ["assert result(45.0, 50.0) < result(45.0, 1.0)"]
+    },
+    
+    "__len__": {
+        "description": "Test GeoIndex reports its size",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().__len__",
+        "assertions": ["assert result() == 0"]
+    },
+    
+    "add": {
+        "description": "Test GeoIndex add files a point under a cell",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().add",
+        "assertions": [
+            "assert len(result(45.5017, -73.5673)) == 6",
+            "from concurrent.futures import ThreadPoolExecutor; index = result.__self__\nwith ThreadPoolExecutor(8) as pool:\n    cells = list(pool.map(result, [40.0 + i % 5 for i in range(400)], [-70.0] * 400))\n"
+            "assert len(set(cells)) == 5 and len(index) == len(index._cells) == len(set(index._cells)) == 6"
+        ]
+    },
+    
+    "remove": {
+        "description": "Test GeoIndex remove drops a cell once",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().remove",
+        "assertions": ["index = result.__self__; cell = index.add(45.5, -73.5); index.add(45.5, -70.0); result(cell); result(cell); assert len(index) == 1 and index.cells_with_prefix(cell) == []"]
+    },
+    
+    "cells_with_prefix": {
+        "description": "Test GeoIndex prefix range lookup on an empty index",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().cells_with_prefix",
+        "assertions": ["assert result('f2') == []"]
+    },
+    
+    "nearest": {
+        "description": "Test GeoIndex nearest lookup on an empty index",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().nearest",
+        "assertions": ["assert result(45.5, -73.5, 5.0) is None"]
+    },
+    
+    "_lookup": {
+        "description": "Test WeatherCache internal lookup misses on an empty cache",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache()._lookup",
+        "assertions": ["assert result('missing', False) is None"]
+    },
+    
+    "get": {
+        "description": "Test WeatherCache get misses on an empty cache",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().get",
+        "assertions": ["assert result('missing') is None"]
+    },
+    
+    "get_stale": {
+        "description": "Test WeatherCache get_stale misses on an empty cache",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().get_stale",
+        "assertions": ["assert result('missing') is None"]
+    },
+    
+    "get_many": {
+        "description": "Test WeatherCache get_many returns only hits",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().get_many",
+        "assertions": ["assert result(['a', 'b']) == {}"]
+    },
+    
+    "set": {
+        "description": "Test WeatherCache set stores a value until its TTL passes",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache(max_entries=2).set",
+        "assertions": [
+            "cache = result.__self__; result('old', 1, -1); result('a', {'v': 1}, 60); assert cache.get('a') == {'v': 1} and cache.get('old') is None and cache.get_stale('old') == 1",
+            "cache = result.__self__; result('x', 1, 60); result('y', 2, 60); result('z', 3, 60); assert cache.get_stale('x') is None and cache.get('z') == 3 and cache.stats()['size'] == 2"
+        ]
+    },
+    
+    "delete": {
+        "description": "Test WeatherCache delete removes only the given key",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().delete",
+        "assertions": [
+            "cache = result.__self__; cache.set('a', 1, 60); cache.set('b', 2, 60); result('a'); result('missing'); assert cache.get_stale('a') is None and cache.get('b') == 2"
+        ]
+    },
+    
+    "clear": {
+        "description": "Test WeatherCache clear removes every entry",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().clear",
+        "assertions": [
+            "cache = result.__self__; cache.set('a', 1, 60); cache.set('b', 2, -1); result(); assert cache.get_stale('a') is None and cache.get_stale('b') is None and cache.stats()['size'] == 0"
+        ]
+    },
+    
+    "stats": {
+        "description": "Test WeatherCache stats reports hit rate",
+        "module": "modules.weather_cache",
+        "function": "WeatherCache().stats",
+        "assertions": ["assert 'hit_rate' in result()"]
+    },
+    
+    "normalize_name": {
+        "description": "Test place names normalize to accent-free lowercase keys",
+        "module": "modules.geocoder",
+        "function": "normalize_name",
+        "assertions": ["assert result('Montréal, QC') == 'montreal qc'"]
+    },
+    
+    "_key_at": {
+        "description": "Test Gazetteer reads the sort key of the first line",
+        "module": "modules.geocoder",
+        "function": "Gazetteer()._key_at",
+        "assertions": ["assert isinstance(result(0), bytes)"]
+    },
+    
+    "_record_at": {
+        "description": "Test Gazetteer parses a record into a location dict",
+        "module": "modules.geocoder",
+        "function": "Gazetteer()._record_at",
+        "assertions": ["assert 'latitude' in result(0)"]
+    },
+    
+    "_bound": {
+        "description": "Test Gazetteer binary search lower bound",
+        "module": "modules.geocoder",
+        "function": "Gazetteer()._bound",
+        "assertions": ["assert result(b'') == 0"]
+    },
+    
+    "_range": {
+        "description": "Test Gazetteer exact match range for a bundled city",
+        "module": "modules.geocoder",
+        "function": "Gazetteer()._range",
+        "assertions": ["assert result('montreal', True)[1] - result('montreal', True)[0] == 1"]
+    },
+    
+    "lookup": {
+        "description": "Test Gazetteer resolves a qualified city name",
+        "module": "modules.geocoder",
+        "function": "Gazetteer().lookup",
+        "assertions": ["assert result('Rochester, NH')['region'] == 'New Hampshire'"]
+    },
+    
+    "search": {
+        "description": "Test Gazetteer prefix autocomplete",
+        "module": "modules.geocoder",
+        "function": "Gazetteer().search",
+        "assertions": ["assert any(c['city'] == 'Montreal' for c in result('mont'))"]
+    },
+    
+    "get_gazetteer": {
+        "description": "Test shared gazetteer loads the bundled data",
+        "module": "modules.geocoder",
+        "function": "get_gazetteer",
+        "assertions": ["assert len(result) > 0"]
+    },
+    
+    "geocode_city": {
+        "description": "Test city geocoding returns coordinates",
+        "module": "modules.geocoder",
+        "function": "geocode_city",
+        "assertions": ["assert 'latitude' in result('Montreal')"]
+    },
+    
+    "get_server_location": {
+        "description": "Test server location detection always returns coordinates",
+        "module": "modules.weather_api",
+        "function": "get_server_location",
+        "assertions": ["assert 'latitude' in result"]
+    },
+    
+    "ip_to_int": {
+        "description": "Test only public IPv4 addresses map to integers",
+        "module": "modules.ip_locator",
+        "function": "ip_to_int",
+        "assertions": [
+            "assert result('8.8.8.8') == 134744072",
+            "assert result('192.168.1.10') is None",
+            "assert result('::1') is None"
+        ]
+    },
+    
+    "_start_at": {
+        "description": "Test IPRangeTable reads range starts in sorted order",
+        "module": "modules.ip_locator",
+        "function": "IPRangeTable",
+        "assertions": [
+            "import os, tempfile; from modules.ip_locator import write_ip_table; path = os.path.join(tempfile.mkdtemp(), 'ranges.bin'); write_ip_table([('8.8.8.0', '8.8.8.255', 37.4, -122.1, 'Mountain View', 'California', 'US'), ('1.1.1.0', '1.1.1.255', -33.9, 151.2, 'Sydney', 'New South Wales', 'AU')], path); table = result(path); assert [table._start_at(index) for index in range(len(table))] == [0x01010100, 0x08080800]"
+        ]
+    },
+    
+    "write_ip_table": {
+        "description": "Test IP range table writer skips IPv6 rows and round-trips locations",
+        "module": "modules.ip_locator",
+        "function": "write_ip_table",
+        "assertions": [
+            "import os, tempfile; from modules.ip_locator import IPRangeTable; path = os.path.join(tempfile.mkdtemp(), 'ranges.bin'); assert result([('8.8.8.0', '8.8.8.255', 37.4, -122.1, 'Mountain View', 'California', 'US'), ('1.1.1.0', '1.1.1.255', -33.9, 151.2, 'Sydney', 'New South Wales', 'AU'), ('::1', '::2', 0.0, 0.0, 'x', 'y', 'z')], path) == 2; table = IPRangeTable(path); assert table.lookup('8.8.8.8')['city'] == 'Mountain View' and table.lookup('1.1.1.1')['country'] == 'AU' and table.lookup('9.9.9.9') is None"
+        ]
+    },
+    
+    "get_ip_table": {
+        "description": "Test the shared IP range table loads once from IP_LOCATION_DB, or is None when missing",
+        "module": "modules.ip_locator",
+        "function": "get_ip_table",
+        "assertions": [
+            "import os, tempfile; import modules.ip_locator as ip_locator; directory = tempfile.mkdtemp(); path = os.path.join(directory, 'ranges.bin'); ip_locator.write_ip_table([('8.8.8.0', '8.8.8.255', 37.4, -122.1, 'Mountain View', 'California', 'US'), ('1.1.1.0', '1.1.1.255', -33.9, 151.2, 'Sydney', 'New South Wales', 'AU')], path); saved = (ip_locator._table, ip_locator._table_loaded, os.environ.get('IP_LOCATION_DB'))\ntry:\n    os.environ['IP_LOCATION_DB'] = os.path.join(directory, 'missing.bin'); ip_locator._table_loaded = False\n    assert result() is None\n    os.environ['IP_LOCATION_DB'] = path; ip_locator._table_loaded = False\n    table = result()\n    assert table is result() and table.lookup('8.8.8.8')['region'] == 'California'\nfinally:\n    ip_locator._table, ip_locator._table_loaded = saved[0], saved[1]\n    os.environ.pop('IP_LOCATION_DB', None) if saved[2] is None else os.environ.update(IP_LOCATION_DB=saved[2])"
+        ]
+    },
+    
+    "locate_ip": {
+        "description": "Test private addresses are never located",
+        "module": "modules.ip_locator",
+        "function": "locate_ip",
+        "assertions": ["assert result('127.0.0.1') is None"]
+    },
+    
+    "_write": {
+        "description": "Test SQLiteStore writes a batch in one transaction and rolls back on failure",
+        "module": "modules.sqlite_store",
+        "function": "SQLiteStore(__import__('tempfile').mkdtemp() + '/test.sqlite')._write",
+        "assertions": [
+            "store = result.__self__; store._connect().execute('CREATE TABLE t (k TEXT PRIMARY KEY)'); assert result([('INSERT INTO t VALUES (?)', [('a',), ('b',)])], 't')",
+            "store = result.__self__; store._connect().execute('CREATE TABLE u (k TEXT PRIMARY KEY)'); assert not result([('INSERT INTO u VALUES (?)', [('a',)]), ('INSERT INTO u VALUES (?)', [('a',)])], 'u') and store._connect().execute('SELECT COUNT(*) FROM u').fetchone()[0] == 0",
+            "import threading; store = result.__self__; store._connect().execute('CREATE TABLE v (k TEXT)'); writer = threading.Thread(target=result, args=([('INSERT INTO v VALUES (?)', [('a',)])], 'v')); writer.start(); writer.join(); "
+            "assert store._connect().execute('SELECT COUNT(*) FROM v').fetchone()[0] == 1",
+            "from modules.sqlite_store import SQLiteStore\ntry:\n    SQLiteStore(':memory:')\n    rejected = False\nexcept ValueError:\n    rejected = True\nassert rejected"
+        ]
+    },
+    
+    "_connect": {
+        "description": "Test HostCache opens a SQLite connection",
+        "module": "modules.weather_cache",
+        "function": "HostCache(__import__('tempfile').mkdtemp() + '/test.sqlite')._connect",
+        "assertions": ["assert result() is not None"]
+    },
+    
+    "get_entry": {
+        "description": "Test HostCache get_entry misses on an empty cache",
+        "module": "modules.weather_cache",
+        "function": "HostCache(__import__('tempfile').mkdtemp() + '/test.sqlite').get_entry",
+        "assertions": ["assert result('missing') is None"]
+    },
+    
+    "purge_expired": {
+        "description": "Test HostCache purge on an empty cache",
+        "module": "modules.weather_cache",
+        "function": "HostCache(__import__('tempfile').mkdtemp() + '/test.sqlite').purge_expired",
+        "assertions": [
+            "assert result() == 0",
+            "import time; cache = result.__self__; cache.set('old', 1, -7200); cache.set('new', 2, 60); assert result() == 1 and cache.get('new') == 2"
+        ]
+    },
+    
+    "build_cache": {
+        "description": "Test cache factory returns a cache with stats",
+        "module": "modules.weather_cache",
+        "function": "build_cache",
+        "assertions": ["assert hasattr(result, 'stats')"]
+    },
+    
+    "get_hourly_forecast": {
+        "description": "Test WeatherAPI serves the One Call hourly slots as a series",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI(mode='onecall').get_hourly_forecast",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.transport import set_transport; from tests.stub_servers import load_fixture; from modules.providers import OpenWeatherMapProvider; from modules.weather_cache import WeatherCache; api = result.__self__; api.cache = WeatherCache(); api.provider = OpenWeatherMapProvider(api_key='test'); previous = set_transport(SimpleNamespace(get=lambda url, params, timeout: load_fixture('owm_onecall.json')))\ntry:\n    hourly = result(45.5017, -73.5673)\nfinally:\n    set_transport(previous)\nassert hourly['step'] == 3600 and hourly['utc_offset'] == -14400 and len(hourly['series']['time']) == 48"
+        ]
+    },
+    
+    "_fetch_forecast": {
+        "description": "Test forecast fetches cache the slot series separately from the daily payload",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI(provider=type('P', (), {'forecast': lambda self, lat, lon: {'location': 'X', 'forecasts': [], 'series': {'time': [0]}, 'step': 10800}})())._fetch_forecast",
+        "assertions": ["api = result.__self__; assert result('c', 1.0, 2.0) == {'location': 'X', 'forecasts': []} and api.cache.get('slots:c')['series'] == {'time': [0]} and api.cache.get('slots:c')['step'] == 10800"]
+    },
+    
+    "get_weather_bundle": {
+        "description": "Test WeatherAPI fetches the One Call bundle once and fills the per-endpoint keys",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI(mode='onecall').get_weather_bundle",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.transport import set_transport; from tests.stub_servers import load_fixture; from modules.providers import OpenWeatherMapProvider; from modules.weather_cache import WeatherCache; api = result.__self__; api.cache = WeatherCache(); api.provider = OpenWeatherMapProvider(api_key='test'); calls = []; previous = set_transport(SimpleNamespace(get=lambda url, params, timeout: calls.append(url) or load_fixture('owm_onecall.json')))\ntry:\n    bundle = result(45.5017, -73.5673)\n    again = result(45.5017, -73.5673)\nfinally:\n    set_transport(previous)\ncell = api.snap(45.5017, -73.5673)[0]\nassert len(calls) == 1 and again == bundle and bundle['current']['temperature'] == 55.22 and api.cache.get('current:' + cell)['temperature'] == 55.22 and len(api.cache.get('forecast:' + cell)['forecasts']) == 7"
+        ]
+    },
+    
+    "_refresh": {
+        "description": "Test WeatherAPI refresh caches successful fetches only",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI()._refresh",
+        "assertions": [
+            "api = result.__self__; assert result('current:x', lambda: {'temperature': 1.0}, 60) == ({'temperature': 1.0}, True) and api.cache.get('current:x') == {'temperature': 1.0}",
+            "api = result.__self__; assert result('current:y', lambda: {'error': 'down'}, 60) == ({'error': 'down'}, True) and api.cache.get('current:y') is None"
+        ]
+    },
+    
+    "_json_default": {
+        "description": "Test alert payloads serialize dates as ISO strings",
+        "module": "modules.alerts",
+        "function": "_json_default",
+        "assertions": ["from datetime import date; assert result(date(2025, 1, 2)) == '2025-01-02'"]
+    },
+    
+    "send": {
+        "description": "Test LogSink prints a notification",
+        "module": "modules.alerts",
+        "function": "LogSink().send",
+        "assertions": ["assert result({'rule': {'id': 1, 'source': 'current', 'field': 'wind_speed', 'op': '>', 'threshold': 30.0}, 'cell': 'f25dvk', 'value': 35.0, 'event': 'active'}) is None"]
+    },
+    
+    "webhook_error": {
+        "description": "Test webhook URLs need an allowlisted host that resolves to a public address",
+        "module": "modules.alerts",
+        "function": "webhook_error",
+        "assertions": [
+            "assert 'disabled' in result('http://127.0.0.1/hook', []) and 'not allowed' in result('http://10.0.0.1/hook', ['127.0.0.1'])",
+            "assert 'non-public' in result('http://127.0.0.1:9/hook', ['127.0.0.1']) and 'non-public' in result('http://[::ffff:169.254.169.254]/', ['::ffff:169.254.169.254'])",
+            "assert result('http://127.0.0.1:9/hook', ['127.0.0.1'], allow_private=True) is None and 'Unknown sink' in result('ftp://x', ['x'])"
+        ]
+    },
+    
+    "add_rule": {
+        "description": "Test AlertEngine validates and stores rules",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').add_rule",
+        "assertions": [
+            "rule = result('f25dvk', 'forecast', 'rain_chance', '>', 70); assert rule['id'] == 1 and rule['threshold'] == 70.0 and rule['sink'] == 'log' and len(rule['token']) >= 16",
+            "assert 'disabled' in result('f25dvk', 'current', 'wind_speed', '>', 30, 'https://hooks.example.com/x')['error']",
+            "assert 'error' in result('f25dvk', 'current', 'rain_chance', '>', 70) and 'error' in result('f25dvk', 'current', 'wind_speed', '!=', 1) and 'error' in result('f25dvk', 'current', 'wind_speed', '>', 30, 'ftp://x')"
+        ]
+    },
+    
+    "get_rule": {
+        "description": "Test AlertEngine get_rule errors for unknown ids",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').get_rule",
+        "assertions": ["assert 'error' in result(99)"]
+    },
+    
+    "remove_rule": {
+        "description": "Test AlertEngine removes rules once",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').remove_rule",
+        "assertions": ["engine = result.__self__; rule = engine.add_rule('f25dvk', 'current', 'wind_speed', '>', 30); assert result(rule['id'], 'wrong') is False and result(rule['id'], rule['token']) is True and result(rule['id'], rule['token']) is False"]
+    },
+    
+    "rules_for": {
+        "description": "Test AlertEngine lists only the cell's rules",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').rules_for",
+        "assertions": ["engine = result.__self__; engine.add_rule('a', 'current', 'temperature', '<', 32); engine.add_rule('b', 'current', 'temperature', '<', 32); assert [rule['cell'] for rule in result('a')] == ['a']"]
+    },
+    
+    "recent": {
+        "description": "Test AlertEngine recent notifications start empty",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').recent",
+        "assertions": ["assert result() == [] and result('f25dvk') == []"]
+    },
+    
+    "_events": {
+        "description": "Test alert conditions per forecast day, threshold and drop",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite')._events",
+        "assertions": [
+            "rule = {'source': 'forecast', 'field': 'rain_chance', 'op': '>', 'threshold': 70, 'last_value': None}; assert result(rule, {'forecasts': [{'date': 'd1', 'rain_chance': 80}, {'date': 'd2', 'rain_chance': 20}]}) == [('d1', 80)]",
+            "rule = {'source': 'forecast', 'field': 'temp_high', 'op': 'drop', 'threshold': 15, 'last_value': None}; assert result(rule, {'forecasts': [{'date': 'd1', 'temp_high': 70}, {'date': 'd2', 'temp_high': 50}]}) == [('d2', 20)]",
+            "rule = {'source': 'current', 'field': 'temperature', 'op': 'drop', 'threshold': 5, 'last_value': 60.0}; assert result(rule, {'temperature': 52.0, 'observed_at': 't'}) == [('drop:t', 8.0)]"
+        ]
+    },
+    
+    "sink_for": {
+        "description": "Test AlertEngine creates one webhook sink per URL",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite').sink_for",
+        "assertions": ["assert result('http://127.0.0.1:9/hook') is result('http://127.0.0.1:9/hook') and result('log').__class__.__name__ == 'LogSink'"]
+    },
+    
+    "deliver": {
+        "description": "Test AlertEngine counts failed deliveries instead of raising",
+        "module": "modules.alerts",
+        "function": "AlertEngine(__import__('tempfile').mkdtemp() + '/test.sqlite', sinks={'broken': None}).deliver",
+        "assertions": ["engine = result.__self__; assert result('broken', {'rule': {'id': 1}}) is False and engine.counters['failed'] == 1"]
+    },
+    
+    "make_series": {
+        "description": "Test slot columns are packed into typed arrays, dropping unknown fields",
+        "module": "modules.timeline",
+        "function": "make_series",
+        "assertions": ["series = result([0, 10800], {'temperature': [50.5, 48.0], 'condition_id': [800, 500], 'icon': ['01d', '10d']}); assert set(series) == {'time', 'temperature', 'condition_id'} and series['condition_id'].typecode == 'H' and list(series['temperature']) == [50.5, 48.0]"]
+    },
+    
+    "series_from_rows": {
+        "description": "Test hourly rows become columns with epoch-second times",
+        "module": "modules.timeline",
+        "function": "series_from_rows",
+        "assertions": ["from datetime import datetime; series = result([{'time': datetime.fromtimestamp(3600), 'temperature': 50.0, 'description': 'clear'}]); assert list(series['time']) == [3600] and list(series['temperature']) == [50.0] and 'description' not in series"]
+    },
+    
+    "slice_series": {
+        "description": "Test slicing keeps slots starting within the range in every column",
+        "module": "modules.timeline",
+        "function": "slice_series",
+        "assertions": ["from modules.timeline import make_series; series = make_series(range(0, 100, 10), {'temperature': range(10)}); part = result(series, 15, 50); assert list(part['time']) == [20, 30, 40, 50] and list(part['temperature']) == [2.0, 3.0, 4.0, 5.0] and len(result(series)['time']) == 10"]
+    },
+    
+    "lttb": {
+        "description": "Test LTTB keeps the endpoints and the peak of a series",
+        "module": "modules.timeline",
+        "function": "lttb",
+        "assertions": [
+            "values = [0, 1, 0, 0, 9, 0, 0, 1, 0, 0]; kept = result(range(10), values, 4); assert len(kept) == 4 and kept[0] == 0 and kept[-1] == 9 and 4 in kept and kept == sorted(kept)",
+            "assert result(range(3), [1, 2, 3], 5) == [0, 1, 2] and result(range(3), [1, 2, 3], 2) == [0, 2]"
+        ]
+    },
+    
+    "downsample": {
+        "description": "Test downsampling takes the same slots from every column",
+        "module": "modules.timeline",
+        "function": "downsample",
+        "assertions": ["from modules.timeline import make_series; series = make_series(range(0, 400, 10), {'temperature': [(i * 7) % 13 for i in range(40)], 'humidity': range(40)}); small = result(series, 8); assert len(small['time']) == 8 and [int(t) // 10 for t in small['time']] == [int(h) for h in small['humidity']]"]
+    },
+    
+    "local_day": {
+        "description": "Test local day numbers follow the location's UTC offset",
+        "module": "modules.timeline",
+        "function": "local_day",
+        "assertions": ["assert result(86400 + 3600, -7200) == 0 and result(86400 + 3600) == 1 and result(86400 - 3600, 32400) == 1"]
+    },
+    
+    "day_date": {
+        "description": "Test day numbers map to calendar dates",
+        "module": "modules.timeline",
+        "function": "day_date",
+        "assertions": ["from datetime import date; assert result(0) == date(1970, 1, 1) and result(-1) == date(1969, 12, 31) and result(20000) == date(2024, 10, 4)"]
+    },
+    
+    "day_runs": {
+        "description": "Test slots split into local days at local midnight",
+        "module": "modules.timeline",
+        "function": "day_runs",
+        "assertions": [
+            "times = [86400 * 2 + h * 10800 for h in range(8)]; assert result(times) == [(2, 0, 8)] and result(times, 32400) == [(2, 0, 5), (3, 5, 8)] and result(times, -14400) == [(1, 0, 2), (2, 2, 8)]",
+            "assert result([]) == []"
+        ]
+    },
+    
+    "summarize_days": {
+        "description": "Test forecast slots summarize into local-calendar days",
+        "module": "modules.timeline",
+        "function": "summarize_days",
+        "assertions": ["from datetime import date; columns = {'temperature': [50, 60, 40], 'humidity': [70, 80, 90], 'wind_speed': [4.0, 6.0, 2.0], 'rain_chance': [0, 30, 10], 'condition_id': [800, 800, 500], 'description': ['clear', 'clear', 'rain'], 'icon': ['01d', '01d', '10d']}; days = result([0, 10800, 86400], columns); assert [d['date'] for d in days] == [date(1970, 1, 1), date(1970, 1, 2)] and days[0]['temp_high'] == 60 and days[0]['humidity'] == 75 and days[0]['rain_chance'] == 30 and days[0]['description'] == 'clear' and days[1]['temp_low'] == 40 and len(result([0, 10800, 86400], columns, -3600)) == 2 and result([0, 10800, 86400], columns, -3600)[0]['date'] == date(1969, 12, 31)"]
+    },
+    
+    "series_json": {
+        "description": "Test column arrays become JSON lists with floats rounded",
+        "module": "modules.timeline",
+        "function": "series_json",
+        "assertions": ["from array import array; assert result({'time': array('q', [0]), 'temperature': array('f', [50.1])}) == {'time': [0], 'temperature': [50.1]}"]
+    },
+    
+    "tile_bounds": {
+        "description": "Test Web Mercator tile bounds",
+        "module": "modules.tiles",
+        "function": "tile_bounds",
+        "assertions": ["south, west, north, east = result(1, 1, 0); assert (west, east) == (0.0, 180.0) and abs(north - 85.0511) < 1e-3 and abs(south) < 1e-9"]
+    },
+    
+    "project": {
+        "description": "Test points project to global pixels, inverse of unproject_lat",
+        "module": "modules.tiles",
+        "function": "project",
+        "assertions": ["from modules.tiles import unproject_lat; x, y = result(45.5, -73.5, 7); assert abs(x - (106.5 / 360) * 256 * 128) < 1e-6 and abs(unproject_lat(y, 7) - 45.5) < 1e-9 and result(0, 0, 0) == (128.0, 128.0)"]
+    },
+    
+    "unproject_lat": {
+        "description": "Test pixel rows map back to latitudes",
+        "module": "modules.tiles",
+        "function": "unproject_lat",
+        "assertions": ["assert result(128, 0) == 0.0 and abs(result(0, 0) - 85.0511) < 1e-3"]
+    },
+    
+    "idw": {
+        "description": "Test pure-Python IDW honours the radius and reproduces station values",
+        "module": "modules.tiles",
+        "function": "idw",
+        "assertions": ["values = result([0.0, 10.0, 20.0], [(0.0, 0.0, 50.0), (20.0, 0.0, 70.0)], 15.0); assert values[0] == 50.0 and values[2] == 70.0 and abs(values[1] - 60.0) < 1e-9 and values[8] is None and abs(values[4] - 60.0) < 1e-9"]
+    },
+    
+    "idw_numpy": {
+        "description": "Test the NumPy IDW variant matches idw(), and needs NumPy installed",
+        "module": "modules.tiles",
+        "function": "idw_numpy",
+        "assertions": [
+            "from modules.tiles import idw; samples, stations = [0.0, 10.0, 20.0], [(0.0, 0.0, 50.0), (20.0, 0.0, 70.0)]\ntry:\n    import numpy\nexcept ImportError:\n    numpy = None\nif numpy is None:\n    try:\n        result(samples, stations, 15.0)\n    except ImportError:\n        pass\n    else:\n        raise AssertionError('idw_numpy ran without NumPy')\nelse:\n    values, expected = result(samples, stations, 15.0), idw(samples, stations, 15.0)\n    assert [value is None for value in values] == [value is None for value in expected]\n    assert all(abs(value - other) < 1e-6 for value, other in zip(values, expected) if value is not None)"
+        ]
+    },
+    
+    "build_palette": {
+        "description": "Test the palette has one RGBA pixel per degree between the color stops",
+        "module": "modules.tiles",
+        "function": "build_palette",
+        "assertions": ["from modules.tiles import COLOR_STOPS, TILE_ALPHA; low, palette = result(); assert low == -40 and len(palette) == 163 and palette[0] == bytes(COLOR_STOPS[0][1]) + bytes([TILE_ALPHA]) and all(len(pixel) == 4 for pixel in palette)"]
+    },
+    
+    "png_chunk": {
+        "description": "Test PNG chunks carry their length and CRC",
+        "module": "modules.tiles",
+        "function": "png_chunk",
+        "assertions": ["import zlib; chunk = result(b'IEND', b''); assert chunk == b'\\x00\\x00\\x00\\x00IEND' + zlib.crc32(b'IEND').to_bytes(4, 'big')"]
+    },
+    
+    "encode_png": {
+        "description": "Test RGBA scanlines encode as a decodable PNG",
+        "module": "modules.tiles",
+        "function": "encode_png",
+        "assertions": ["import struct, zlib; png = result(2, 1, [bytes([255, 0, 0, 255, 0, 0, 255, 128])]); assert png[:8] == b'\\x89PNG\\r\\n\\x1a\\n' and struct.unpack('>II', png[16:24]) == (2, 1) and zlib.decompress(png[41:png.index(b'IEND') - 8]) == bytes([0, 255, 0, 0, 255, 0, 0, 255, 128])"]
+    },
+    
+    "valid": {
+        "description": "Test tile addresses are checked against the zoom level",
+        "module": "modules.tiles",
+        "function": "TileCache(None, max_zoom=10).valid",
+        "assertions": ["assert result(0, 0, 0) and result(3, 7, 7) and not result(3, 8, 0) and not result(11, 0, 0) and not result(2, -1, 0)"]
+    },
+    
+    "interpolator": {
+        "description": "Test the interpolator falls back to pure Python without NumPy",
+        "module": "modules.tiles",
+        "function": "TileCache(None).interpolator",
+        "assertions": ["from modules.tiles import idw, idw_numpy; assert result() in (idw, idw_numpy) and result() is result()"]
+    },
+    
+    "_unzoom": {
+        "description": "Test zoom level counts are dropped when their last tile goes",
+        "module": "modules.tiles",
+        "function": "TileCache(None)._unzoom",
+        "assertions": ["cache = result.__self__; cache._zooms = {3: 2}; result(3); assert cache._zooms == {3: 1}; result(3); assert cache._zooms == {}"]
+    },
+    
+    "stations": {
+        "description": "Test tiles read only cached observations near them",
+        "module": "modules.tiles",
+        "function": "TileCache",
+        "assertions": ["from modules.weather_api import WeatherAPI; from modules.tiles import project; api = WeatherAPI(); cell = api.observations.add(45.5, -73.5); api.cache.set(f'current:{cell}', {'temperature': 60.0}, 60); api.observations.add(10.0, 10.0); x, y = project(45.5, -73.5, 6); stations = result(api).stations(6, int(x // 256), int(y // 256)); assert len(stations) == 1 and stations[0][2] == 60.0 and 0 <= stations[0][0] <= 256"]
+    },
+    
+    "render": {
+        "description": "Test tiles render as PNGs from cached observations, transparent without any",
+        "module": "modules.tiles",
+        "function": "TileCache",
+        "assertions": ["from modules.weather_api import WeatherAPI; api = WeatherAPI(); cell = api.observations.add(45.5, -73.5); api.cache.set(f'current:{cell}', {'temperature': 60.0}, 60); tiles = result(api); tile = tiles.render(6, 18, 22); empty = tiles.render(6, 0, 0); assert tile.body[:4] == b'\\x89PNG' and tile.stations == 1 and empty.stations == 0 and len(empty.body) < len(tile.body)"]
+    },
+    
+    "within": {
+        "description": "Test GeoIndex bounding-box lookup returns only cells inside the box",
+        "module": "modules.geo_grid",
+        "function": "GeoIndex().within",
+        "assertions": ["index = result.__self__; inside = index.add(45.5, -73.5); index.add(45.5, -70.0); index.add(40.0, -73.5); assert result(45.0, -74.0, 46.0, -73.0) == [inside] and len(result(-90, -180, 90, 180)) == 3"]
+    },
+    
+    "get_batch": {
+        "description": "Test WeatherAPI batch fetch for many points in one pass",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI().get_batch",
+        "assertions": [
+            "assert result([]) == {'current': [], 'forecast': []}",
+            "from unittest.mock import Mock; from modules.weather_cache import WeatherCache; api = result.__self__; "
+            "api.cache = WeatherCache(); api.mode = 'standard'; fetch = Mock(return_value={'temp': 2}); "
+            "api.get_current_weather = fetch; api.get_forecast = fetch; "
+            "api.cache.set('current:' + api.snap(45.5, -73.5)[0], {'temp': 1}, -1); "
+            "out = result([(45.5, -73.5), (10.0, 10.0), (-30.0, 20.0)], ('current',), max_fetches=1); "
+            "assert fetch.call_count == 1 and out['current'][0] == {'temp': 1} and out['current'][1] == {'temp': 2} and 'error' in out['current'][2]"
+        ]
+    },
+    
+    "_normalize_onecall": {
+        "description": "Test OpenWeatherMap One Call payloads normalize to current, daily and hourly data",
+        "module": "modules.providers",
+        "function": "OpenWeatherMapProvider()._normalize_onecall",
+        "assertions": [
+            "import json; from tests.stub_servers import load_fixture; bundle = result(json.loads(load_fixture('owm_onecall.json'))); assert bundle['current']['temperature'] == 55.22 and bundle['current']['description'] == 'light rain' and bundle['current']['utc_offset'] == -14400 and len(bundle['forecast']['forecasts']) == 7 and len(bundle['hourly']['hours']) == 48"
+        ]
+    },
+    
+    "decode_payload": {
+        "description": "Test response bodies decode from bytes",
+        "module": "modules.payload",
+        "function": "decode_payload",
+        "assertions": ["assert result(b'{\"main\": {\"temp\": 55.2}}')['main']['temp'] == 55.2"]
+    },
+    
+    "add_listener": {
+        "description": "Test WeatherAPI listeners all hear about fresh data, even after one fails",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI().add_listener",
+        "assertions": [
+            "api = result.__self__; seen = []; result(lambda kind, cell, data: 1 / 0); result(lambda kind, cell, data: seen.append((kind, cell, data))); api._notify('current', 'f25dy5', {'temperature': 50}); assert seen == [('current', 'f25dy5', {'temperature': 50})]"
+        ]
+    },
+    
+    "_notify": {
+        "description": "Test WeatherAPI notifies with no listeners registered",
+        "module": "modules.weather_api",
+        "function": "WeatherAPI()._notify",
+        "assertions": ["assert result('current', 'f25dy5', {}) is None"]
+    },
+    
+    "to_epoch": {
+        "description": "Test datetimes and numbers convert to epoch seconds",
+        "module": "modules.history_store",
+        "function": "to_epoch",
+        "assertions": ["assert result(1760000000.7) == 1760000000"]
+    },
+    
+    "_cell_dir": {
+        "description": "Test HistoryStore maps a cell to its directory",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._cell_dir",
+        "assertions": ["assert result('f25dy5').name == 'f25dy5'"]
+    },
+    
+    "_locked": {
+        "description": "Test HistoryStore holds the thread and file locks while a cell is appended to",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._locked",
+        "assertions": [
+            "import fcntl; store = result.__self__\nwith result('f25dy5') as directory:\n    assert directory == store._cell_dir('f25dy5') and directory.is_dir() and not store._lock.acquire(blocking=False)\n    with open(directory / '.lock') as other:\n        try:\n            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)\n        except BlockingIOError:\n            pass\n        else:\n            raise AssertionError('cell lock not held')\nassert store._lock.acquire(blocking=False)\nstore._lock.release()"
+        ]
+    },
+    
+    "_base": {
+        "description": "Test HistoryStore reads a cell's base time, or None before the first append",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._base",
+        "assertions": [
+            "store = result.__self__; store.append('c', {'observed_at': 1000, 'temperature': 50}); assert result(store._cell_dir('c')) == 1000 and result(store._cell_dir('missing')) is None"
+        ]
+    },
+    
+    "append": {
+        "description": "Test HistoryStore append writes nothing for a bad value and heals a torn append",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp()).append",
+        "assertions": [
+            "store = result.__self__; assert result('c', {'observed_at': 1000, 'temperature': 50})\ntry:\n    result('c', {'observed_at': 2000, 'temperature': 'hot'})\nexcept ValueError:\n    pass\nassert (store.root / 'c' / 'temperature.f32').stat().st_size == 4",
+            "store = result.__self__; result('d', {'observed_at': 1000, 'temperature': 50}); open(store.root / 'd' / 'temperature.f32', 'ab').write(b'\\0' * 6); assert result('d', {'observed_at': 2000, 'temperature': 60}) and [point['temperature'] for point in store.query('d', 0, 10 ** 10)] == [50.0, 60.0]"
+        ]
+    },
+    
+    "record": {
+        "description": "Test HistoryStore ignores error payloads",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp()).record",
+        "assertions": ["assert result('current', 'f25dy5', {'error': 'x'}) is None"]
+    },
+    
+    "_open_column": {
+        "description": "Test HistoryStore maps stored columns, and skips missing ones",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._open_column",
+        "assertions": [
+            "store = result.__self__; store.append('c', {'observed_at': 1000, 'temperature': 50}); store.append('c', {'observed_at': 1060, 'temperature': 52.5}); directory = store._cell_dir('c'); assert list(result(directory, 'temperature.f32')) == [50.0, 52.5] and result(directory, 'missing.f32') is None"
+        ]
+    },
+    
+    "query": {
+        "description": "Test HistoryStore returns nothing for an unknown cell",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp()).query",
+        "assertions": ["assert result('zzzzzz', 0, 2000000000) == []"]
+    },
+    
+    "_downsample": {
+        "description": "Test HistoryStore buckets points by hour",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._downsample",
+        "assertions": ["assert len(result(0, [0, 60, 3600], {'temperature': [1.0, 3.0, 5.0]}, 3600)) == 2"]
+    },
+    
+    "_summarize": {
+        "description": "Test HistoryStore bucket summary min/max/mean",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp())._summarize",
+        "assertions": ["assert result(0, {'temperature': [1.0, 3.0]})['temperature']['mean'] == 2.0"]
+    },
+    
+    "cells": {
+        "description": "Test HistoryStore lists stored cells",
+        "module": "modules.history_store",
+        "function": "HistoryStore(__import__('tempfile').mkdtemp()).cells",
+        "assertions": ["assert isinstance(result(), list)"]
+    },
+    
+    "period_start": {
+        "description": "Test rollup buckets start on the UTC day, Monday and month",
+        "module": "modules.rollups",
+        "function": "period_start",
+        "assertions": [
+            "assert result(1760000000, 'day') == 1759968000",
+            "assert result(1760000000, 'week') == 1759708800",
+            "assert result(1760000000, 'month') == 1759276800"
+        ]
+    },
+    
+    "ingest": {
+        "description": "Test RollupStore folds observations into day aggregates",
+        "module": "modules.rollups",
+        "function": "RollupStore(__import__('tempfile').mkdtemp() + '/test.sqlite').ingest",
+        "assertions": [
+            "assert result('f25dy5', {'observed_at': 1760000000, 'temperature': 10.0}) is True",
+            "assert result('f25dy5', {'observed_at': 1760000000, 'temperature': 12.0}) is False"
+        ]
+    },
+    
+    "rebuild": {
+        "description": "Test RollupStore replays raw history points",
+        "module": "modules.rollups",
+        "function": "RollupStore(__import__('tempfile').mkdtemp() + '/test.sqlite').rebuild",
+        "assertions": ["assert result('f25dy5', [{'time': 1760000000, 'temperature': 10.0}, {'time': 1760000600, 'temperature': 14.0}]) == 2"]
+    },
+    
+    "local_date": {
+        "description": "Test observation and forecast dates use the location's calendar when known",
+        "module": "modules.accuracy",
+        "function": "local_date",
+        "assertions": ["from datetime import date, datetime; assert result(86400 - 3600, 7200) == date(1970, 1, 2) and result(86400 - 3600, -7200) == date(1970, 1, 1) and result(1700000000, None) == datetime.fromtimestamp(1700000000).date()"]
+    },
+    
+    "snapshot": {
+        "description": "Test AccuracyTracker stores each forecast day with its lead time once",
+        "module": "modules.accuracy",
+        "function": "AccuracyTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').snapshot",
+        "assertions": [
+            "assert result('f25dy5', {'timestamp': 1760000000, 'forecasts': [{'date': '2025-10-10', 'temp_high': 60, 'temp_low': 40}]}) == 1",
+            "assert result('f25dy5', {'timestamp': 1760000600, 'forecasts': [{'date': '2025-10-10', 'temp_high': 65, 'temp_low': 45}]}) == 0"
+        ]
+    },
+    
+    "observe": {
+        "description": "Test AccuracyTracker folds observations into daily extremes",
+        "module": "modules.accuracy",
+        "function": "AccuracyTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').observe",
+        "assertions": ["assert result('f25dy5', {'observed_at': 1760000000, 'temperature': 55.0}) is None"]
+    },
+    
+    "score": {
+        "description": "Test AccuracyTracker scores nothing before any data",
+        "module": "modules.accuracy",
+        "function": "AccuracyTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').score",
+        "assertions": ["assert result() == []", "assert result('f25dy5', per_cell=True) == []"]
+    },
+    
+    "_fetch": {
+        "description": "Test OpenWeatherMap requests carry the key and canonical units",
+        "module": "modules.providers",
+        "function": "OpenWeatherMapProvider(api_key='test')._fetch",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.transport import set_transport; calls = []; previous = set_transport(SimpleNamespace(get=lambda url, params, timeout: calls.append((url, params)) or b'{\"ok\": 1}'))\ntry:\n    data = result('https://example.test/weather', lat=1.0, lon=2.0)\nfinally:\n    set_transport(previous)\nassert data == {'ok': 1} and calls == [('https://example.test/weather', {'lat': 1.0, 'lon': 2.0, 'appid': 'test', 'units': 'imperial'})]"
+        ]
+    },
+    
+    "current": {
+        "description": "Test OpenWeatherMap provider returns an error dict when upstream is unreachable",
+        "module": "modules.providers",
+        "function": "OpenWeatherMapProvider('test', base_url='http://127.0.0.1:9', onecall_url='http://127.0.0.1:9', timeout=1).current",
+        "assertions": ["assert 'error' in result(45.5, -73.6)"]
+    },
+    
+    "forecast": {
+        "description": "Test OpenWeatherMap provider forecast returns an error dict when upstream is unreachable",
+        "module": "modules.providers",
+        "function": "OpenWeatherMapProvider('test', base_url='http://127.0.0.1:9', onecall_url='http://127.0.0.1:9', timeout=1).forecast",
+        "assertions": ["assert 'error' in result(45.5, -73.6)"]
+    },
+    
+    "bundle": {
+        "description": "Test OpenWeatherMap provider bundle returns an error dict when upstream is unreachable",
+        "module": "modules.providers",
+        "function": "OpenWeatherMapProvider('test', base_url='http://127.0.0.1:9', onecall_url='http://127.0.0.1:9', timeout=1).bundle",
+        "assertions": ["assert 'error' in result(45.5, -73.6)"]
+    },
+    
+    "_condition": {
+        "description": "Test WMO weather codes map to OpenWeatherMap conditions and icons",
+        "module": "modules.providers",
+        "function": "OpenMeteoProvider()._condition",
+        "assertions": [
+            "assert result(61, 1) == {'description': 'light rain', 'condition_id': 500, 'icon': '10d'}",
+            "assert result(0, 0)['icon'] == '01n'"
+        ]
+    },
+    
+    "_normalize": {
+        "description": "Test Open-Meteo sections normalize independently",
+        "module": "modules.providers",
+        "function": "OpenMeteoProvider()._normalize",
+        "assertions": ["assert result({'utc_offset_seconds': 0}) == {}"]
+    },
+    
+    "_request": {
+        "description": "Test Open-Meteo requests return one section, or an error dict on failure",
+        "module": "modules.providers",
+        "function": "OpenMeteoProvider()._request",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.transport import set_transport; from tests.stub_servers import load_fixture; from modules.transport import UpstreamError\ndef down(url, params, timeout):\n    raise UpstreamError('connection refused')\nprevious = set_transport(SimpleNamespace(get=lambda url, params, timeout: load_fixture('openmeteo_forecast.json')))\ntry:\n    current = result('current', lat=45.5017, lon=-73.5673)\n    everything = result(None, lat=45.5017, lon=-73.5673)\n    set_transport(SimpleNamespace(get=down))\n    failed = result('current', lat=45.5017, lon=-73.5673)\nfinally:\n    set_transport(previous)\nassert current['temperature'] == everything['current']['temperature'] == 55.4 and 'forecast' in everything and failed['error'].startswith('API request failed')"
+        ]
+    },
+    
+    "_pool": {
+        "description": "Test HedgedProvider builds a per-process thread pool",
+        "module": "modules.providers",
+        "function": "HedgedProvider(OpenWeatherMapProvider(), OpenMeteoProvider())._pool",
+        "assertions": ["assert result() is result()"]
+    },
+    
+    "hedge_delay": {
+        "description": "Test HedgedProvider uses the default delay until it has samples",
+        "module": "modules.providers",
+        "function": "HedgedProvider(OpenWeatherMapProvider(), OpenMeteoProvider(), default_delay=0.5).hedge_delay",
+        "assertions": ["assert result() == 0.5"]
+    },
+    
+    "_timed": {
+        "description": "Test HedgedProvider turns provider exceptions into errors",
+        "module": "modules.providers",
+        "function": "HedgedProvider(OpenWeatherMapProvider(), OpenMeteoProvider())._timed",
+        "assertions": ["assert 'error' in result(result.__self__.secondary, 'missing', 0, 0)"]
+    },
+    
+    "_hedge": {
+        "description": "Test HedgedProvider hedges a slow primary, and skips the hedge when its pool is saturated",
+        "module": "modules.providers",
+        "function": "HedgedProvider(OpenWeatherMapProvider(), OpenMeteoProvider(), default_delay=0.05, max_workers=2)._hedge",
+        "assertions": [
+            "from collections import deque; from types import SimpleNamespace; hedged = result.__self__; "
+            "hedged.primary = SimpleNamespace(name='p', current=lambda lat, lon: __import__('time').sleep(0.3) or {'who': 'p'}); "
+            "hedged.secondary = SimpleNamespace(name='s', current=lambda lat, lon: {'who': 's'}); hedged.latencies = {'p': deque(), 's': deque()}; "
+            "assert result('current', 0, 0) == {'who': 's'} and hedged.hedged == 1 and hedged.secondary_wins == 1",
+            "from types import SimpleNamespace; hedged = result.__self__; [hedged._pool().submit(__import__('time').sleep, 0.5) for _ in range(2)]; "
+            "hedged.primary = SimpleNamespace(name='p', current=lambda lat, lon: {'who': 'p'}); "
+            "assert result('current', 0, 0) == {'who': 'p'} and hedged.hedged == 1"
+        ]
+    },
+    
+    "http_get": {
+        "description": "Test the shared upstream GET goes through the process transport",
+        "module": "modules.providers",
+        "function": "http_get",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.transport import set_transport; calls = []; previous = set_transport(SimpleNamespace(get=lambda url, params, timeout: calls.append((url, params, timeout)) or b'body'))\ntry:\n    body = result('https://example.test/', {'q': 1}, 5)\nfinally:\n    set_transport(previous)\nassert body == b'body' and calls == [('https://example.test/', {'q': 1}, 5)]"
+        ]
+    },
+    
+    "request_key": {
+        "description": "Test requests are matched without credentials and with rounded coordinates",
+        "module": "modules.transport",
+        "function": "request_key",
+        "assertions": [
+            "assert result('u', {'lat': 45.50171, 'lon': -73.5673, 'appid': 'k', 'units': 'imperial'}) == ('u?units=imperial', 'u?units=imperial&@45.5017,-73.5673', (45.5017, -73.5673))",
+            "assert result('u') == ('u?', 'u?', None)"
+        ]
+    },
+    
+    "_add": {
+        "description": "Test RecordingTransport archives each exchange without credentials",
+        "module": "modules.transport",
+        "function": "RecordingTransport",
+        "assertions": [
+            "import os, tempfile; from types import SimpleNamespace; from modules.transport import load_archive; path = os.path.join(tempfile.mkdtemp(), 'upstream.jsonl.gz'); recorder = result(SimpleNamespace(get=lambda url, params, timeout: b'ok'), path); assert recorder.get('u', {'lat': 1, 'appid': 'k'}) == b'ok' and recorder.recorded == 1 and recorder.flush() == 1 and recorder.flush() == 0",
+            "import os, tempfile; from types import SimpleNamespace; from unittest.mock import Mock; from modules.transport import UpstreamError, load_archive; path = os.path.join(tempfile.mkdtemp(), 'upstream.jsonl.gz'); "
+            "recorder = result(SimpleNamespace(get=Mock(side_effect=UpstreamError('401 Client Error for url: https://api.example.com/weather?lat=1&appid=s3cr3t'))), path); "
+            "failed = False\ntry:\n    recorder.get('u', {'lat': 1, 'appid': 's3cr3t'})\nexcept UpstreamError:\n    failed = True\n"
+            "recorder.flush(); entry = load_archive(path)[0]; assert failed and 's3cr3t' not in entry['error'] and 'appid=***' in entry['error']"
+        ]
+    },
+    
+    "_forked": {
+        "description": "Test RecordingTransport drops exchanges inherited from its parent process",
+        "module": "modules.transport",
+        "function": "RecordingTransport",
+        "assertions": [
+            "import os, tempfile; from types import SimpleNamespace; path = os.path.join(tempfile.mkdtemp(), 'upstream.jsonl.gz'); recorder = result(SimpleNamespace(get=lambda url, params, timeout: b'ok'), path); "
+            "recorder.get('u'); recorder._forked(); assert len(recorder._buffer) == 1; recorder._pid = -1; recorder._forked(); "
+            "assert recorder._buffer == [] and recorder._pid == os.getpid() and recorder.flush() == 0 and not os.path.exists(path)"
+        ]
+    },
+    
+    "redact": {
+        "description": "Test credentials are removed from error messages",
+        "module": "modules.transport",
+        "function": "redact",
+        "assertions": [
+            "assert result('failed for url: u?lat=1&appid=abc&units=metric') == 'failed for url: u?lat=1&appid=***&units=metric'",
+            "assert result('bad key a b+c and a+b%2Bc', {'key': 'a b+c', 'lat': 1}) == 'bad key *** and ***' and result('API_KEY=x y') == 'API_KEY=*** y'"
+        ]
+    },
+    
+    "load_archive": {
+        "description": "Test archives of several appended batches read back in order",
+        "module": "modules.transport",
+        "function": "RecordingTransport",
+        "assertions": [
+            "import os, tempfile; from types import SimpleNamespace; from modules.transport import load_archive; path = os.path.join(tempfile.mkdtemp(), 'upstream.jsonl.gz'); recorder = result(SimpleNamespace(get=lambda url, params, timeout: b'ok'), path); recorder.get('u', {'lat': 1, 'appid': 'k'}); recorder.flush(); recorder.get('v'); recorder.flush(); entries = load_archive(path); assert [(e['url'], e['params'], e['body']) for e in entries] == [('u', {'lat': 1}, 'ok'), ('v', {}, 'ok')] and all(e['ms'] >= 0 for e in entries)"
+        ]
+    },
+    
+    "build_transport": {
+        "description": "Test the network transport is the default",
+        "module": "modules.transport",
+        "function": "build_transport",
+        "assertions": ["from modules.transport import RequestsTransport; assert isinstance(result(), RequestsTransport)"]
+    },
+    
+    "get_transport": {
+        "description": "Test the process transport is built once",
+        "module": "modules.transport",
+        "function": "get_transport",
+        "assertions": ["assert result() is result()"]
+    },
+    
+    "set_transport": {
+        "description": "Test the process transport can be swapped and restored",
+        "module": "modules.transport",
+        "function": "set_transport",
+        "assertions": ["from modules.transport import get_transport; marker = object(); previous = result(marker); assert get_transport() is marker and result(previous) is marker"]
+    },
+    
+    "make_provider": {
+        "description": "Test providers are built by name",
+        "module": "modules.providers",
+        "function": "make_provider",
+        "assertions": [
+            "assert result('open-meteo').name == 'open-meteo'",
+            "assert result('openweathermap').name == 'openweathermap'"
+        ]
+    },
+    
+    "build_provider": {
+        "description": "Test the configured provider exposes the provider interface",
+        "module": "modules.providers",
+        "function": "build_provider",
+        "assertions": ["assert all(hasattr(result, m) for m in ('current', 'forecast', 'bundle'))"]
+    },
+    
+    "load_conditions": {
+        "description": "Test the condition table loads descriptions in every language",
+        "module": "modules.localize",
+        "function": "load_conditions",
+        "assertions": [
+            "assert result[800][0] == '01'",
+            "assert result[500][1]['en'] == 'light rain'",
+            "assert all(len(names) == 4 for icon, names in result.values())"
+        ]
+    },
+    
+    "get_conditions": {
+        "description": "Test shared condition table loads the bundled data",
+        "module": "modules.localize",
+        "function": "get_conditions",
+        "assertions": ["assert len(result) > 50 and result[741][1]['es'] == 'niebla'"]
+    },
+    
+    "convert_rows": {
+        "description": "Test rows convert to metric column by column without modifying the input",
+        "module": "modules.localize",
+        "function": "convert_rows",
+        "assertions": [
+            "rows = [{'temp_high': 212, 'temp_low': 32, 'wind_speed': 10}]; converted = result(rows, 'metric'); assert converted == [{'temp_high': 100.0, 'temp_low': 0.0, 'wind_speed': 4.47}] and rows[0]['temp_high'] == 212",
+            "assert result([{'temperature': 50}], 'imperial') == [{'temperature': 50}]"
+        ]
+    },
+    
+    "convert_series": {
+        "description": "Test slot series columns convert to metric without modifying the input",
+        "module": "modules.localize",
+        "function": "convert_series",
+        "assertions": ["from array import array; series = {'time': array('q', [0]), 'temperature': array('f', [212.0]), 'humidity': array('f', [50.0])}; converted = result(series, 'metric'); assert list(converted['temperature']) == [100.0] and converted['humidity'] is series['humidity'] and series['temperature'][0] == 212.0"]
+    },
+    
+    "translate_rows": {
+        "description": "Test condition descriptions translate by condition id",
+        "module": "modules.localize",
+        "function": "translate_rows",
+        "assertions": [
+            "rows = [{'condition_id': 800, 'description': 'clear sky'}, {'description': 'haze'}]; result(rows, 'fr'); assert rows == [{'condition_id': 800, 'description': 'ciel dégagé'}, {'description': 'haze'}]"
+        ]
+    },
+    
+    "localize": {
+        "description": "Test payloads are presented in a unit system and language",
+        "module": "modules.localize",
+        "function": "localize",
+        "assertions": [
+            "assert result({'temperature': 41, 'visibility': 10, 'condition_id': 601, 'description': 'snow'}, 'metric', 'de') == {'temperature': 5.0, 'visibility': 16.09, 'condition_id': 601, 'description': 'Schnee', 'units': {'temperature': '°C', 'wind_speed': 'm/s', 'visibility': 'km', 'pressure': 'hPa', 'precipitation': 'mm'}, 'lang': 'de'}",
+            "assert result({'forecasts': [{'temp_high': 50}]}, 'metric')['forecasts'] == [{'temp_high': 10.0}]",
+            "assert result({'error': 'x'}, 'metric') == {'error': 'x'}"
+        ]
+    },
+    
+    "flush": {
+        "description": "Test AccessLog writes buffered hits in one batch",
+        "module": "modules.warmset",
+        "function": "AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite').flush",
+        "assertions": [
+            "log = result.__self__; log.record('f25dy5', 7200); log.record('f25dy5', 7300); assert result() == 1 and result() == 0"
+        ]
+    },
+    
+    "hot_cells": {
+        "description": "Test AccessLog ranks cells by hits in an hour of the day",
+        "module": "modules.warmset",
+        "function": "AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite').hot_cells",
+        "assertions": [
+            "log = result.__self__; [log.record(cell, 3600 * 26) for cell in ('a', 'b', 'b')]; log.flush(); assert result(2, days=2, now=3600 * 30) == [('b', 1.0), ('a', 0.5)]",
+            "assert result(3, days=2, now=3600 * 30) == []"
+        ]
+    },
+    
+    "_keys": {
+        "description": "Test WarmSet warms the keys of the configured API mode",
+        "module": "modules.warmset",
+        "function": "WarmSet",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.warmset import AccessLog; log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); assert result(SimpleNamespace(mode='standard'), log, interval=0)._keys('f25dy5') == ['current:f25dy5', 'forecast:f25dy5'] and result(SimpleNamespace(mode='onecall'), log, interval=0)._keys('f25dy5') == ['onecall:f25dy5']"
+        ]
+    },
+    
+    "remaining_budget": {
+        "description": "Test WarmSet daily budget resets each day",
+        "module": "modules.warmset",
+        "function": "WarmSet(None, AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'), interval=0, daily_budget=10).remaining_budget",
+        "assertions": [
+            "warm_set = result.__self__; result(0); warm_set.spent = 4; assert result(100) == 6 and result(86400) == 10",
+            "import os, tempfile; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; path = os.path.join(tempfile.mkdtemp(), 'quota.sqlite'); "
+            "QuotaTracker(path).record_warm(7, 100); successor = WarmSet(None, AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'), interval=0, daily_budget=10, tracker=QuotaTracker(path)); "
+            "assert successor.remaining_budget(200) == 3 and successor.remaining_budget(86400) == 10"
+        ]
+    },
+    
+    "plan": {
+        "description": "Test WarmSet plans busiest cells first, skips cached ones and stops at the budget",
+        "module": "modules.warmset",
+        "function": "WarmSet",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.warmset import AccessLog; from modules.weather_cache import WeatherCache; calls = []; api = SimpleNamespace(mode='standard', cache=WeatherCache(), get_current_weather=lambda lat, lon: calls.append('current') or {}, get_forecast=lambda lat, lon: calls.append('forecast') or {}); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * 26) for cell in ['f25dy5'] * 3 + ['f25dy7'] * 2 + ['dr5ru7']]; log.flush(); api.cache.set('current:f25dy5', {}, 60); api.cache.set('forecast:f25dy5', {}, 60); api.cache.set('current:dr5ru7', {}, 60); warm_set = result(api, log, lead=3600 * 20, interval=0, daily_budget=3, days=2); plan = warm_set.plan(3600 * 30); assert plan['hour'] == 2 and [(c['cell'], c['calls']) for c in plan['cells']] == [('f25dy7', 2), ('dr5ru7', 1)] and plan['calls'] == 3 and plan['over_budget'] == 0",
+            "from types import SimpleNamespace; from modules.warmset import AccessLog; from modules.weather_cache import WeatherCache; calls = []; api = SimpleNamespace(mode='standard', cache=WeatherCache(), get_current_weather=lambda lat, lon: calls.append('current') or {}, get_forecast=lambda lat, lon: calls.append('forecast') or {}); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * 26) for cell in ['f25dy5'] * 3 + ['f25dy7'] * 2 + ['dr5ru7']]; log.flush(); api.cache.set('current:f25dy5', {}, 60); api.cache.set('forecast:f25dy5', {}, 60); api.cache.set('current:dr5ru7', {}, 60); warm_set = result(api, log, lead=3600 * 20, interval=0, daily_budget=2, days=2); plan = warm_set.plan(3600 * 30); assert [c['cell'] for c in plan['cells']] == ['f25dy7'] and plan['calls'] == 2 and plan['over_budget'] == 1"
+        ]
+    },
+    
+    "run_once": {
+        "description": "Test WarmSet fetches the planned cells and spends their calls from the budget",
+        "module": "modules.warmset",
+        "function": "WarmSet",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.warmset import AccessLog; from modules.weather_cache import WeatherCache; calls = []; api = SimpleNamespace(mode='standard', cache=WeatherCache(), get_current_weather=lambda lat, lon: calls.append('current') or {}, get_forecast=lambda lat, lon: calls.append('forecast') or {}); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * 26) for cell in ['f25dy5'] * 3 + ['f25dy7'] * 2 + ['dr5ru7']]; log.flush(); api.cache.set('current:f25dy5', {}, 60); api.cache.set('forecast:f25dy5', {}, 60); api.cache.set('current:dr5ru7', {}, 60); warm_set = result(api, log, lead=3600 * 20, interval=0, daily_budget=2, days=2); run = warm_set.run_once(3600 * 30); assert run['warmed'] == 1 and run['calls'] == 2 and calls == ['current', 'forecast'] and warm_set.remaining_budget(3600 * 30) == 0"
+        ]
+    },
+    
+    "coverage": {
+        "description": "Test WarmSet coverage weighs hot cells by their expected requests",
+        "module": "modules.warmset",
+        "function": "WarmSet",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.warmset import AccessLog; from modules.weather_cache import WeatherCache; api = SimpleNamespace(mode='standard', cache=WeatherCache()); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * 26) for cell in ['f25dy5'] * 3 + ['f25dy7'] * 2 + ['dr5ru7']]; log.flush(); api.cache.set('current:f25dy5', {}, 60); api.cache.set('forecast:f25dy5', {}, 60); api.cache.set('current:dr5ru7', {}, 60); report = result(api, log, interval=0, days=2).coverage(3600 * 50); assert report['hour'] == 2 and report['hot_cells'] == 3 and report['warm_cells'] == 1 and report['coverage'] == 0.5 and result(api, log, interval=0, days=2).coverage(3600 * 51)['coverage'] is None"
+        ]
+    },
+    
+    "_loop": {
+        "description": "Test WarmSet scheduler loop takes the lock and survives a failed run",
+        "module": "modules.warmset",
+        "function": "WarmSet(None, AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'), interval=0)._loop",
+        "assertions": [
+            "import fcntl, os, tempfile; warm_set = result.__self__; runs = []\nclass Stop(BaseException):\n    pass\ndef run_once():\n    runs.append(1)\n    raise ValueError('upstream down') if len(runs) == 1 else Stop()\nwarm_set.run_once = run_once; lock_path = os.path.join(tempfile.mkdtemp(), 'warmset.lock')\ntry:\n    result(lock_path)\nexcept Stop:\n    pass\nwith open(lock_path) as other:\n    try:\n        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)\n    except BlockingIOError:\n        held = True\n    else:\n        held = False\nwarm_set._lock_file.close()\nassert runs == [1, 1] and held"
+        ]
+    },
+    
+    "start": {
+        "description": "Test WarmSet scheduler stays off when WARM_INTERVAL is 0",
+        "module": "modules.warmset",
+        "function": "WarmSet(None, AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'), interval=0).start",
+        "assertions": ["assert result() is False"]
+    },
+    
+    "counts": {
+        "description": "Test AccessLog returns hits per cell and hour, merged to a coarser precision",
+        "module": "modules.warmset",
+        "function": "AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite').counts",
+        "assertions": [
+            "log = result.__self__; [log.record(cell, 3600 * 26) for cell in ('f25dy5', 'f25dy7', 'f25dy7')]; log.flush(); assert result(0, 48) == [('f25dy5', 26, 1), ('f25dy7', 26, 2)] and result(0, 48, 5) == [('f25dy', 26, 3)] and result(27, 48) == []"
+        ]
+    },
+    
+    "used": {
+        "description": "Test QuotaTracker counts calls per UTC day, flushed or not",
+        "module": "modules.quota",
+        "function": "QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').used",
+        "assertions": [
+            "tracker = result.__self__; tracker.record(3, 100); assert result(100) == 3 and tracker.flush() == 3 and result(100) == 3 and result(86400) == 0"
+        ]
+    },
+    
+    "record_warm": {
+        "description": "Test QuotaTracker adds up pre-warm calls per UTC day",
+        "module": "modules.quota",
+        "function": "QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').record_warm",
+        "assertions": [
+            "tracker = result.__self__; assert result(2, 100) and result(3, 200) and result(1, 86400); assert tracker.warm_used(300) == 5 and tracker.warm_used(86400) == 1 and tracker.used(300) == 0"
+        ]
+    },
+    
+    "warm_used": {
+        "description": "Test QuotaTracker pre-warm spend starts at zero",
+        "module": "modules.quota",
+        "function": "QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').warm_used",
+        "assertions": ["assert result(0) == 0"]
+    },
+    
+    "history": {
+        "description": "Test QuotaTracker lists daily usage oldest first",
+        "module": "modules.quota",
+        "function": "QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite').history",
+        "assertions": [
+            "result.__self__.record(5, 86400 * 2); assert result(3, now=86400 * 2) == [{'day': 0, 'calls': 0}, {'day': 86400, 'calls': 0}, {'day': 172800, 'calls': 5}]"
+        ]
+    },
+    
+    "replay": {
+        "description": "Test replay counts refetches of one key per cell under recorded traffic",
+        "module": "modules.quota",
+        "function": "replay",
+        "assertions": [
+            "calls = result([('a', 10, 4), ('a', 11, 4), ('b', 10, 1)], 1800); assert calls[10] == 3 and calls[11] == 2 and sum(calls) == 5",
+            "assert sum(result([('a', 10, 4)], 600)) == 4 and sum(result([('a', 10, 4)], 86400)) == 1"
+        ]
+    },
+    
+    "_ttls": {
+        "description": "Test QuotaPlanner counts one bundle key in onecall mode",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); assert planner._ttls(600, 10800) == [600, 10800]; api.mode = 'onecall'; assert planner._ttls(600, 10800) == [600]"
+        ]
+    },
+    
+    "model": {
+        "description": "Test QuotaPlanner closed-form projection",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); projection = planner.model(8640, 1); assert abs(projection['calls'] - (86400 / 610 + 86400 / 10810)) < 0.1 and projection['hit_rate'] > 0.9",
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); assert planner.model(0, 0)['calls'] == 0 and planner.model(0, 0)['hit_rate'] is None"
+        ]
+    },
+    
+    "traffic": {
+        "description": "Test QuotaPlanner loads recorded traffic and the whole days it spans",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); rows, days = planner.traffic(now=86400); assert days == 1 and len(rows) == 24 and rows[0] == ('f25dy5', 8, 20)",
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); rows, days = planner.traffic(4, now=86400); assert {cell for cell, _, _ in rows} == {'f25d'}"
+        ]
+    },
+    
+    "simulate": {
+        "description": "Test QuotaPlanner replays a day of traffic and longer TTLs cost fewer calls",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); day = planner.simulate(now=86400); assert day['requests'] == 480 and day['cells'] == 2 and day['calls'] == sum(day['by_hour']) and 0 < day['hit_rate'] < 1",
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); assert planner.simulate(3600, 43200, now=86400)['calls'] < planner.simulate(now=86400)['calls'] and planner.simulate(precision=4, now=86400)['cells'] == 1"
+        ]
+    },
+    
+    "tune": {
+        "description": "Test QuotaPlanner keeps the configured TTLs in budget and lengthens them when over",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); assert planner.tune(now=86400)['fits'] and (api.current_ttl, api.forecast_ttl) == (600, 10800)",
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); planner.tracker.record(850, 86400); tuned = planner.tune(now=86400); assert tuned['fits'] and api.current_ttl > 600 and tuned['projected'] <= 900"
+        ]
+    },
+    
+    "maybe_tune": {
+        "description": "Test QuotaPlanner retunes at most once per interval",
+        "module": "modules.quota",
+        "function": "QuotaPlanner",
+        "assertions": [
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); planner.tune_interval = 3600; assert planner.maybe_tune(86400) is not None and planner.maybe_tune(86400 + 60) is None and planner.maybe_tune(86400 + 3600) is not None",
+            "from types import SimpleNamespace; from modules.quota import QuotaTracker; from modules.warmset import AccessLog, WarmSet; api = SimpleNamespace(mode='standard', precision=6, current_ttl=600, forecast_ttl=10800); log = AccessLog(__import__('tempfile').mkdtemp() + '/test.sqlite'); [log.record(cell, 3600 * hour) for hour in range(8, 20) for cell in ('f25dy5', 'f25dy7') for _ in range(20)]; planner = result(api, WarmSet(api, log, interval=0), QuotaTracker(__import__('tempfile').mkdtemp() + '/test.sqlite'), limit=1000); planner.tune_interval = 0; assert planner.maybe_tune(86400) is None"
+        ]
+    },
+    
+    "acquire": {
+        "description": "Test Gate sheds once its slots and queue are taken",
+        "module": "modules.admission",
+        "function": "Gate(1, 0).acquire",
+        "assertions": [
+            "assert result(0) is None and result(0) == 'queue_full' and result.__self__.active == 1"
+        ]
+    },
+    
+    "release": {
+        "description": "Test Gate frees a slot on release",
+        "module": "modules.admission",
+        "function": "Gate(1, 1).release",
+        "assertions": [
+            "gate = result.__self__; gate.acquire(0); assert gate.acquire(0) == 'deadline'; result(); assert gate.acquire(0) is None",
+            "import time\nfrom concurrent.futures import ThreadPoolExecutor\nfrom modules.admission import Gate\n"
+            "gate = Gate(1, 1); assert gate.acquire(0) is None\n"
+            "with ThreadPoolExecutor(2) as pool:\n"
+            "    late = pool.submit(gate.acquire, time.monotonic() + 0.05)\n"
+            "    assert late.result(timeout=5) == 'deadline'\n"
+            "    waiter = pool.submit(gate.acquire, time.monotonic() + 5)\n"
+            "    while gate.waiting == 0:\n"
+            "        time.sleep(0.01)\n"
+            "    gate.release()\n"
+            "    assert waiter.result(timeout=5) is None\n"
+            "assert gate.active == 1 and gate.shed['deadline'] == 1 and gate.admitted == 2"
+        ]
+    },
+    
+    "served_stale": {
+        "description": "Test stale answers to shed requests are counted",
+        "module": "modules.admission",
+        "function": "AdmissionController(overrides={}).served_stale",
+        "assertions": ["result('/api/weather'); assert result.__self__.stats()['totals']['stale'] == 1"]
+    },
+    
+    "parse_limits": {
+        "description": "Test per-route admission overrides parse",
+        "module": "modules.admission",
+        "function": "parse_limits",
+        "assertions": [
+            "assert result('/api/weather=32:64, /=8') == {'/api/weather': (32, 64), '/': (8, None)}",
+            "assert result('') == {}"
+        ]
+    },
+    
+    "gate": {
+        "description": "Test routes get their own gates with overrides applied",
+        "module": "modules.admission",
+        "function": "AdmissionController(limit=4, queue=8, overrides={'/': (1, 2)}).gate",
+        "assertions": [
+            "assert (result('/').limit, result('/').queue) == (1, 2)",
+            "assert (result('/api/weather').limit, result('/api/weather').queue) == (4, 8)",
+            "assert result('/') is result('/')"
+        ]
+    },
+    
+    "admit": {
+        "description": "Test the controller sheds past a route's limit and reports the shed rate",
+        "module": "modules.admission",
+        "function": "AdmissionController(limit=1, queue=0, timeout=0, overrides={}).admit",
+        "assertions": [
+            "assert result('/') is None and result('/') == 'queue_full' and result.__self__.stats()['totals']['shed_rate'] == 0.5"
+        ]
+    },
+    
+    "bucket": {
+        "description": "Test PageCache time buckets",
+        "module": "modules.page_cache",
+        "function": "PageCache(bucket=60).bucket",
+        "assertions": [
+            "assert result(119) == 1 and result(120) == 2",
+            "assert result(3600, seconds=600) == 6"
+        ]
+    },
+    
+    "put": {
+        "description": "Test PageCache stores the body, a gzip copy and an ETag",
+        "module": "modules.page_cache",
+        "function": "PageCache().put",
+        "assertions": [
+            "import gzip; page = result(('f25dy5', 'metric', 1), '<p>Montréal</p>'); assert gzip.decompress(page.gzipped) == page.body == '<p>Montréal</p>'.encode() and len(page.etag) == 24",
+            "assert result.__self__.get(('f25dy5', 'metric', 1)) is not None"
+        ]
+    },
+    
+    "_unindex": {
+        "description": "Test PageCache evicts least recently used pages from its cell index",
+        "module": "modules.page_cache",
+        "function": "PageCache(max_entries=1)._unindex",
+        "assertions": [
+            "cache = result.__self__; cache.put(('a', 1), 'x'); cache.put(('b', 1), 'y'); assert cache.get(('a', 1)) is None and cache.stats()['cells'] == 1; "
+            "result(('b', 2)); assert cache._by_cell == {'b': {('b', 1)}}; result(('b', 1)); assert cache._by_cell == {}"
+        ]
+    },
+    
+    "invalidate": {
+        "description": "Test PageCache drops a cell's pages, or only some parts",
+        "module": "modules.page_cache",
+        "function": "PageCache().invalidate",
+        "assertions": [
+            "cache = result.__self__; cache.put(('a', 1), 'x'); cache.put(('a', 2), 'y'); cache.put(('b', 1), 'z'); assert result('a') == 2 and cache.get(('a', 1)) is None and cache.get(('b', 1)) is not None",
+            "cache = result.__self__; cache.put(('c', 'page'), 'x'); cache.put(('c', 'forecast'), 'y'); assert result('c', ('page', 'current')) == 1 and cache.get(('c', 'forecast')) is not None"
+        ]
+    },
+    
+    "get_entries": {
+        "description": "Test HostCache batch lookup returns entries with their expiry",
+        "module": "modules.weather_cache",
+        "function": "HostCache(__import__('tempfile').mkdtemp() + '/test.sqlite').get_entries",
+        "assertions": [
+            "cache = result.__self__; cache.set('a', 1, 60); cache.set('b', 2, 60); entries = result(['a', 'b', 'c']); assert sorted(entries) == ['a', 'b'] and entries['b'][1] == 2",
+            "import pickle; cache = result.__self__; cache._connect().execute('INSERT INTO cache VALUES (?, ?, ?)', ('p', 1e12, pickle.dumps({'x': 1}))); assert result(['p']) == {} and cache.get_entry('p') is None"
+        ]
+    },
+    
+    "from_url": {
+        "description": "Test RedisClient parses host, port, db and password from a URL",
+        "module": "modules.redis_cache",
+        "function": "RedisClient.from_url",
+        "assertions": [
+            "client = result('redis://:secret@cache.local:6380/2'); assert (client.host, client.port, client.db, client.password) == ('cache.local', 6380, 2, 'secret')",
+            "assert result('redis://localhost').port == 6379"
+        ]
+    },
+    
+    "close": {
+        "description": "Test RedisClient close without a connection is a no-op",
+        "module": "modules.redis_cache",
+        "function": "RedisClient(port=1).close",
+        "assertions": ["assert result() is None"]
+    },
+    
+    "pipeline": {
+        "description": "Test RedisClient pipelines commands and keeps replies aligned past an error",
+        "module": "modules.redis_cache",
+        "function": "RedisClient.from_url",
+        "assertions": [
+            "from modules.redis_cache import RedisError; from tests.fake_redis import FakeRedis\nwith FakeRedis() as server:\n    replies = result(server.url).pipeline([('SET', 'k', 'v'), ('GET', 'k'), ('NOPE',), ('GET', 'missing')])\nassert replies[:2] == [b'OK', b'v'] and isinstance(replies[2], RedisError) and replies[3] is None"
+        ]
+    },
+    
+    "execute": {
+        "description": "Test RedisClient runs one command and raises error replies",
+        "module": "modules.redis_cache",
+        "function": "RedisClient.from_url",
+        "assertions": [
+            "from modules.redis_cache import RedisError; from tests.fake_redis import FakeRedis\nwith FakeRedis() as server:\n    client = result(server.url)\n    assert client.execute('SET', 'k', 'v') == b'OK' and client.execute('GET', 'k') == b'v'\n    try:\n        client.execute('NOPE')\n    except RedisError:\n        pass\n    else:\n        raise AssertionError('error reply not raised')"
+        ]
+    },
+    
+    "encode_command": {
+        "description": "Test RESP command encoding",
+        "module": "modules.redis_cache",
+        "function": "encode_command",
+        "assertions": ["assert result(('GET', 'k')) == b'*2\\r\\n$3\\r\\nGET\\r\\n$1\\r\\nk\\r\\n'"]
+    },
+    
+    "read_reply": {
+        "description": "Test RESP reply parsing for bulk, nil, array and error replies",
+        "module": "modules.redis_cache",
+        "function": "read_reply",
+        "assertions": [
+            "import io; assert result(io.BytesIO(b'*3\\r\\n$2\\r\\nhi\\r\\n$-1\\r\\n:7\\r\\n')) == [b'hi', None, 7]",
+            "import io; from modules.redis_cache import RedisError; assert isinstance(result(io.BytesIO(b'-ERR nope\\r\\n')), RedisError)"
+        ]
+    },
+    
+    "_pack_uint": {
+        "description": "Test varint encoding",
+        "module": "modules.redis_cache",
+        "function": "_pack_uint",
+        "assertions": ["out = bytearray(); result(300, out); assert bytes(out) == b'\\xac\\x02'"]
+    },
+    
+    "_unpack_uint": {
+        "description": "Test varint decoding",
+        "module": "modules.redis_cache",
+        "function": "_unpack_uint",
+        "assertions": ["assert result(b'\\xac\\x02', 0) == (300, 2)"]
+    },
+    
+    "_pack": {
+        "description": "Test binary codec writes repeated strings once",
+        "module": "modules.redis_cache",
+        "function": "_pack",
+        "assertions": ["out = bytearray(); result([{'temperature': 1}, {'temperature': 2}], out, {}); assert bytes(out).count(b'temperature') == 1"]
+    },
+    
+    "_unpack": {
+        "description": "Test binary codec decodes a list and returns the next offset",
+        "module": "modules.redis_cache",
+        "function": "_unpack",
+        "assertions": ["assert result(b'l\\x02i\\x05s\\x01a', 0, []) == ([5, 'a'], 7)"]
+    },
+    
+    "encode_value": {
+        "description": "Test cache entries are smaller than their pickle",
+        "module": "modules.redis_cache",
+        "function": "encode_value",
+        "assertions": ["import pickle; rows = [{'temp_high': 50.0 + i, 'temp_low': 40.0, 'description': 'clear sky'} for i in range(5)]; assert len(result(rows, 0.0)) < len(pickle.dumps(rows, pickle.HIGHEST_PROTOCOL))"]
+    },
+    
+    "decode_value": {
+        "description": "Test cache entries round-trip normalized payloads",
+        "module": "modules.redis_cache",
+        "function": "decode_value",
+        "assertions": [
+            "from datetime import date, datetime; value = {'temperature': -3.5, 'humidity': 81, 'rain': None, 'ok': True, 'date': date(2025, 1, 2), 'observed_at': datetime(2025, 1, 2, 3, 4, 5, 6), 'forecasts': [{'description': 'rain'}, {'description': 'rain'}]}; from modules.redis_cache import encode_value; assert result(encode_value(value, 12.5)) == (12.5, value)",
+            "from array import array; from modules.redis_cache import encode_value; value = {'time': array('q', [1, -2]), 'temperature': array('f', [1.5]), 'condition_id': array('H', [800])}; assert result(encode_value(value, 0.0)) == (0.0, value)"
+        ]
+    },
+    
+    "_call": {
+        "description": "Test RemoteCache backs off after a connection failure",
+        "module": "modules.redis_cache",
+        "function": "RemoteCache(RedisClient(port=1, timeout=0.1), retry_interval=60)._call",
+        "assertions": ["cache = result.__self__; assert result([('PING',)]) is None and cache.errors == 1 and result([('PING',)]) is None and cache.errors == 1"]
+    },
+    
+    "available": {
+        "description": "Test RemoteCache reports itself unavailable while backing off",
+        "module": "modules.redis_cache",
+        "function": "RemoteCache(RedisClient(port=1, timeout=0.1), retry_interval=60).available",
+        "assertions": ["cache = result.__self__; assert result() is True and cache.get('k') is None and result() is False"]
     }
 }
 
@@ -81,6 +1582,36 @@ API_TESTS = {
         "expected_fields": ["name", "version", "endpoints"]
     },
     
+    "/api/history": {
+        "endpoint": "/api/history",
+        "expected_fields": ["cell", "resolution", "points"]
+    },
+    
+    "/api/accuracy": {
+        "endpoint": "/api/accuracy",
+        "expected_fields": ["min_samples", "scores", "by_cell"]
+    },
+    
+    "/api/warmset": {
+        "endpoint": "/api/warmset",
+        "expected_fields": ["coverage", "plan", "daily_budget"]
+    },
+    
+    "/api/quota": {
+        "endpoint": "/api/quota",
+        "expected_fields": ["limit", "used_today", "ttls", "projection", "model"]
+    },
+    
+    "/api/admission": {
+        "endpoint": "/api/admission",
+        "expected_fields": ["routes", "totals"]
+    },
+    
+    "/api/alerts": {
+        "endpoint": "/api/alerts",
+        "expected_fields": ["cell", "rules", "recent", "stats"]
+    },
+    
     "/api/location": {
         "endpoint": "/api/location", 
         "expected_fields": ["latitude", "longitude"]
@@ -96,6 +1627,21 @@ API_TESTS = {
         "expected_fields": ["error"]  # Will error without API key, but should return error structure
     },
     
+    "/api/forecast/hourly": {
+        "endpoint": "/api/forecast/hourly",
+        "expected_fields": ["error"]  # Will error without API key, but should return error structure
+    },
+    
+    "/api/weather/nearby": {
+        "endpoint": "/api/weather/nearby",
+        "expected_fields": ["error"]  # Nothing cached without API key
+    },
+    
+    "/api/cities": {
+        "endpoint": "/api/cities?q=mon",
+        "expected_fields": ["query", "cities"]
+    },
+    
     "weather_demo": {
         "endpoint": "/weather/demo",
         "expected_content": "Demo weather unavailable"  # Expected with demo API key
@@ -118,6 +1664,86 @@ CONTRACT_TESTS = {
         }
     },
     
+    "/api/forecast/hourly": {
+        "description": "Hourly forecast API should return consistent error structure without API key",
+        "expected_structure": {
+            "error": "string"
+        }
+    },
+    
+    "/api/weather/nearby": {
+        "description": "Nearby API should return consistent error structure when nothing is cached",
+        "expected_structure": {
+            "error": "string"
+        }
+    },
+    
+    "/api/cities": {
+        "description": "Cities API should return autocomplete suggestions",
+        "expected_structure": {
+            "query": "string",
+            "cities": "array"
+        }
+    },
+    
+    "/api/history": {
+        "description": "History API should return a cell and a list of points",
+        "expected_structure": {
+            "cell": "string",
+            "from": "number",
+            "to": "number",
+            "points": "array"
+        }
+    },
+    
+    "/api/accuracy": {
+        "description": "Accuracy API should return score rows by lead time",
+        "expected_structure": {
+            "min_samples": "number",
+            "scores": "array",
+            "by_cell": "array"
+        }
+    },
+    
+    "/api/warmset": {
+        "description": "Warm-set API should return coverage and the next pre-warm plan",
+        "expected_structure": {
+            "coverage.hot_cells": "number",
+            "plan.cells": "array",
+            "daily_budget": "number"
+        }
+    },
+    
+    "/api/quota": {
+        "description": "Quota API should return today's usage and the projected daily calls",
+        "expected_structure": {
+            "limit": "number",
+            "used_today": "number",
+            "ttls.current": "number",
+            "projection.calls": "number",
+            "projection.by_hour": "array"
+        }
+    },
+    
+    "/api/admission": {
+        "description": "Admission API should return per-route gates and shed totals",
+        "expected_structure": {
+            "totals.admitted": "number",
+            "totals.shed_rate": "number",
+            "retry_after": "number"
+        }
+    },
+    
+    "/api/alerts": {
+        "description": "Alerts API should return rules, recent notifications and engine counters",
+        "expected_structure": {
+            "rules": "array",
+            "recent": "array",
+            "stats.rules": "number",
+            "stats.fired": "number"
+        }
+    },
+    
     "/api/location": {
         "description": "Location API should return coordinate structure",
         "expected_structure": {
@@ -154,6 +1780,79 @@ FRONTEND_TESTS = {
         ]
     },
     
+    "/api/forecast/hourly": {
+        "description": "Hourly forecast API should return JSON error without key",
+        "url": "/api/forecast/hourly",
+        "expected_elements": [
+            "error"
+        ]
+    },
+    
+    "/api/weather/nearby": {
+        "description": "Nearby API should return JSON error when nothing is cached",
+        "url": "/api/weather/nearby",
+        "expected_elements": [
+            "error"
+        ]
+    },
+    
+    "/api/cities": {
+        "description": "Cities API should return matching city names",
+        "url": "/api/cities?q=mon",
+        "expected_elements": [
+            "Montreal"
+        ]
+    },
+    
+    "/api/history": {
+        "description": "History API should return JSON points",
+        "url": "/api/history",
+        "expected_elements": [
+            "points"
+        ]
+    },
+    
+    "/api/accuracy": {
+        "description": "Accuracy API should return JSON scores",
+        "url": "/api/accuracy",
+        "expected_elements": [
+            "scores"
+        ]
+    },
+    
+    "/api/warmset": {
+        "description": "Warm-set API should return JSON coverage",
+        "url": "/api/warmset",
+        "expected_elements": [
+            "coverage"
+        ]
+    },
+    
+    "/api/quota": {
+        "description": "Quota API should return JSON usage and projection",
+        "url": "/api/quota",
+        "expected_elements": [
+            "used_today",
+            "projection"
+        ]
+    },
+    
+    "/api/admission": {
+        "description": "Admission API should return JSON shed metrics",
+        "url": "/api/admission",
+        "expected_elements": [
+            "shed_rate"
+        ]
+    },
+    
+    "/api/alerts": {
+        "description": "Alerts API should return JSON alert state",
+        "url": "/api/alerts",
+        "expected_elements": [
+            "recent"
+        ]
+    },
+    
     "/api/location": {
         "description": "Location API should return coordinates",
         "url": "/api/location",
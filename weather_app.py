@@ -4,12 +4,17 @@ Weather app
 a flask weather app
 
 Entry point for the Weather app application.
+
+create_app() builds the Flask app and its services; routes live on a
+blueprint. Nothing is constructed at import time and requests is only
+imported on the first upstream call, which keeps cold starts short for
+autoscaled workers (see scripts/bench-startup.py).
 """
 
-from flask import Flask, jsonify, request, render_template_string
+from flask import Blueprint, Flask, current_app, g, jsonify, request, render_template
+from jinja2 import ChoiceLoader, DictLoader
 import os
-import sys
-from pathlib import Path
+import re
 from datetime import datetime, timedelta
 
 # Load environment variables from .env file if it exists
@@ -19,27 +24,207 @@ try:
 except ImportError:
     pass  # dotenv not installed, that's ok
 
-# Add modules directory to path
-sys.path.insert(0, str(Path(__file__).parent / "modules"))
+from modules.core import get_status
+from modules.utils import get_timestamp
+from modules.weather_api import WeatherAPI, get_user_location
+from modules.geocoder import geocode_city, get_gazetteer
+from modules.history_store import HistoryStore
+from modules.rollups import PERIODS, RollupStore
+from modules.accuracy import MIN_SAMPLES, AccuracyTracker
+from modules.warmset import WarmSet
+from modules.quota import QuotaPlanner, QuotaTracker
+from modules.admission import AdmissionController
+from modules.page_cache import PageCache
+from modules.alerts import AlertEngine
+from modules.tiles import TileCache
+from modules.localize import CANONICAL_UNITS, LABELS, LANGUAGES, UNIT_SYSTEMS, localize
+from modules.timeline import SERIES_TYPES, downsample, series_json, slice_series
 
-# Import your modules here
-from core import get_status
-from utils import get_timestamp
-from weather_api import WeatherAPI, get_user_location
+bp = Blueprint('weather', __name__)
 
-app = Flask(__name__)
+# Never shed: liveness checks and the shedding metrics themselves
+ADMISSION_EXEMPT = {'/health', '/api/admission'}
 
-# Initialize weather API
-weather_api = WeatherAPI()
+# Shed requests to these routes get a stale cached copy when one exists
+STALE_FALLBACKS = {'/api/weather': 'current', '/api/forecast': 'forecast'}
 
-@app.route('/')
-def home():
-    """Main weather dashboard"""
-    # Get user location
+class Services:
+    """The weather client and the stores fed by its refresh listeners"""
+    
+    def __init__(self, weather_api=None):
+        self.weather_api = weather_api or WeatherAPI()
+        
+        # Record every fresh observation for /api/history
+        self.history_store = HistoryStore()
+        self.weather_api.add_listener(self.history_store.record)
+        
+        # Day/week/month aggregates for long history ranges
+        self.rollup_store = RollupStore()
+        self.weather_api.add_listener(self.rollup_store.record)
+        
+        # Forecast snapshots and observed daily extremes for /api/accuracy
+        self.accuracy_tracker = AccuracyTracker()
+        self.weather_api.add_listener(self.accuracy_tracker.record)
+        
+        # Request history per cell and hour, and the scheduled pre-warmer it drives;
+        # its daily spend is kept with the upstream call counts
+        self.warm_set = WarmSet(self.weather_api, tracker=QuotaTracker())
+        
+        # Daily upstream call count, projected usage and the TTL tuner that keeps it in budget
+        self.quota_planner = QuotaPlanner(self.weather_api, self.warm_set, self.warm_set.tracker)
+        
+        # Per-route concurrency caps and load shedding
+        self.admission = AdmissionController()
+        
+        # Rendered dashboard pages, dropped when their cell's data refreshes
+        self.page_cache = PageCache()
+        self.weather_api.add_listener(self.page_cache.record)
+        
+        # Threshold alerts, evaluated for each refreshed cell's rules only
+        self.alert_engine = AlertEngine()
+        self.weather_api.add_listener(self.alert_engine.record)
+        
+        # Heatmap tiles drawn from cached observations, dropped when a cell they reach refreshes
+        self.tile_cache = TileCache(self.weather_api)
+        self.weather_api.add_listener(self.tile_cache.record)
+
+def create_app(weather_api=None):
+    """
+    Build the Flask app and its services
+    
+    Args:
+        weather_api: WeatherAPI to serve from (default: configured from the environment)
+    
+    Returns:
+        Flask: The application
+    """
+    app = Flask(__name__)
+    # Inline templates are compiled once and reused rather than per request
+    app.jinja_env.loader = ChoiceLoader([DictLoader(TEMPLATES), app.jinja_env.loader])
+    app.extensions['weather'] = Services(weather_api)
+    app.register_blueprint(bp)
+    return app
+
+def services():
+    """Get the current app's Services"""
+    return current_app.extensions['weather']
+
+def warm_up(app):
+    """Prefetch weather for the default location so the first visitors hit a warm cache"""
+    weather_api = app.extensions['weather'].weather_api
     location = get_user_location()
+    current = weather_api.get_current_weather(location["latitude"], location["longitude"])
+    forecast = weather_api.get_forecast(location["latitude"], location["longitude"])
     
-    if "error" in location:
-        return render_template_string("""
+    warmed = [name for name, data in (("current", current), ("forecast", forecast)) if "error" not in data]
+    print(f"🔥 Warmed {', '.join(warmed) or 'nothing'} for {location.get('city', 'default location')}")
+    return warmed
+
+def client_ip():
+    """Get the originating client address, honouring X-Forwarded-For"""
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.remote_addr
+
+def parse_location():
+    """Parse an explicit location, ?lat=&lon= or ?city= via the offline gazetteer, without side effects (None if neither)"""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is not None and lon is not None:
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return {"error": "lat/lon out of range"}
+        return {"latitude": lat, "longitude": lon, "city": "", "region": "", "country": ""}
+    if request.args.get('city', '').strip():
+        return geocode_city(request.args['city'].strip())
+    return None
+
+def resolve_location():
+    """Resolve the request location: ?lat=&lon=, ?city= via the offline gazetteer, else auto-detect"""
+    location = parse_location()
+    if location is None:
+        location = get_user_location(client_ip())
+    
+    # Count the cell in the access log the warm set learns its hot cells from
+    if "error" not in location:
+        cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+        services().warm_set.access_log.record(cell)
+        services().quota_planner.maybe_tune()
+    return location
+
+# Accepted ?from=/?to= range: the epoch up to 2100-01-01
+MAX_EPOCH = 4102444800
+
+def parse_time_arg(name, default):
+    """Parse a ?name= query argument given as epoch seconds or an ISO date/datetime (ValueError if out of range)"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        try:
+            epoch = int(float(value))
+        except ValueError:
+            epoch = int(datetime.fromisoformat(value).timestamp())
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"{name} is out of range") from e
+    if not 0 <= epoch <= MAX_EPOCH:
+        raise ValueError(f"{name} is out of range")
+    return epoch
+
+def display_options():
+    """Resolve units and language: ?units=&lang=, else Accept-Language, else DEFAULT_UNITS/DEFAULT_LANG"""
+    units = request.args.get('units') or os.getenv('DEFAULT_UNITS', CANONICAL_UNITS)
+    if units not in UNIT_SYSTEMS:
+        return {"error": f"units must be one of {list(UNIT_SYSTEMS)}"}
+    
+    lang = (request.args.get('lang') or request.accept_languages.best_match(LANGUAGES)
+            or os.getenv('DEFAULT_LANG', 'en'))
+    if lang not in LANGUAGES:
+        return {"error": f"lang must be one of {list(LANGUAGES)}"}
+    return {"units": units, "lang": lang}
+
+@bp.before_request
+def admit_request():
+    """Admission control: run, queue until the deadline, or shed the request"""
+    rule = request.url_rule.rule if request.url_rule else None
+    if rule is None or rule in ADMISSION_EXEMPT:
+        return None
+    
+    reason = services().admission.admit(rule)
+    if reason is None:
+        g.admitted_route = rule
+        return None
+    return shed_response(rule, reason)
+
+@bp.teardown_request
+def release_request(exc=None):
+    """Free the admission slot taken by admit_request"""
+    route = g.pop('admitted_route', None)
+    if route is not None:
+        services().admission.release(route)
+
+def shed_response(rule, reason):
+    """Answer a shed request with a stale cached copy if there is one, else 503"""
+    prefix = STALE_FALLBACKS.get(rule)
+    if prefix is not None:
+        # No IP lookup or access-log write here: only explicit locations get a stale answer
+        location = parse_location()
+        options = display_options()
+        if location is not None and "error" not in location and "error" not in options:
+            cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+            stale = services().weather_api.cache.get_stale(f"{prefix}:{cell}")
+            if stale is not None:
+                services().admission.served_stale(rule)
+                response = jsonify(localize(stale, **options))
+                response.headers['Warning'] = '110 - "Response is Stale"'
+                return response
+    
+    response = jsonify({"error": "Server busy, try again shortly", "reason": reason})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(services().admission.retry_after)
+    return response
+
+LOCATION_ERROR_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -52,14 +237,9 @@ def home():
             <p><a href="/weather/demo">View Demo Weather</a></p>
         </body>
         </html>
-        """, error=location.get("error", "Unknown error"))
-    
-    # Get current weather and forecast
-    current = weather_api.get_current_weather(location["latitude"], location["longitude"])
-    forecast = weather_api.get_forecast(location["latitude"], location["longitude"])
-    
-    if "error" in current:
-        return render_template_string("""
+        """
+
+WEATHER_ERROR_TEMPLATE = """
         <!DOCTYPE html>
         <html>
         <head>
@@ -73,11 +253,11 @@ def home():
             <p>Get a free API key at: <a href="https://openweathermap.org/api">OpenWeatherMap</a></p>
         </body>
         </html>
-        """, error=current.get("error", "Unknown error"))
-    
-    return render_template_string("""
+        """
+
+DASHBOARD_TEMPLATE = """
     <!DOCTYPE html>
-    <html>
+    <html lang="{{ current.lang }}">
     <head>
         <title>Weather App - {{ location.city }}</title>
         <meta name="viewport" content="width=device-width, initial-scale=1">
@@ -263,19 +443,10 @@ def home():
                 font-weight: 500;
             }
             
-            .footer {
-                text-align: center;
-                margin-top: 30px;
-                color: rgba(255,255,255,0.8);
-                font-size: 0.9em;
-            }
-            
             .update-time {
-                background: rgba(255,255,255,0.1);
-                padding: 10px 20px;
-                border-radius: 25px;
-                display: inline-block;
-                backdrop-filter: blur(10px);
+                margin-top: 25px;
+                color: #636e72;
+                font-size: 0.9em;
             }
             
             .error-message {
@@ -311,76 +482,399 @@ def home():
     <body>
         <div class="container">
             <div class="header">
-                <h1>Personal Weather</h1>
-                <div class="location-info">{{ current.location }}, {{ current.country }}</div>
+                <h1>{{ labels.title }}</h1>
+                <div class="location-info">{{ current.location or location.city }}, {{ current.country or location.country }}</div>
             </div>
             
-            <div class="current-weather">
-                <div class="temp-display">
-                    <div class="weather-icon">🌤️</div>
-                    <div class="main-temp">{{ "%.0f"|format(current.temperature) }}°</div>
-                </div>
-                <div class="description">{{ current.description }}</div>
-                
-                <div class="weather-details">
-                    <div class="detail-card">
-                        <div class="detail-label">Feels Like</div>
-                        <div class="detail-value">{{ "%.0f"|format(current.feels_like) }}°F</div>
-                    </div>
-                    <div class="detail-card">
-                        <div class="detail-label">Humidity</div>
-                        <div class="detail-value">{{ current.humidity }}%</div>
-                    </div>
-                    <div class="detail-card">
-                        <div class="detail-label">Wind Speed</div>
-                        <div class="detail-value">{{ "%.1f"|format(current.wind_speed) }} mph</div>
-                    </div>
-                    <div class="detail-card">
-                        <div class="detail-label">Visibility</div>
-                        <div class="detail-value">{{ "%.1f"|format(current.visibility) }} mi</div>
-                    </div>
-                    <div class="detail-card">
-                        <div class="detail-label">Pressure</div>
-                        <div class="detail-value">{{ current.pressure }} hPa</div>
-                    </div>
-                    <div class="detail-card">
-                        <div class="detail-label">Sunrise</div>
-                        <div class="detail-value">{{ current.sunrise.strftime('%H:%M') }}</div>
-                    </div>
-                </div>
+            <div class="current-weather" data-fragment="{{ fragments.current.url }}" data-refresh="{{ fragments.current.ttl }}">
+                {{ fragments.current.html|safe }}
             </div>
             
-            {% if forecast.forecasts %}
-            <div class="forecast-section">
-                <div class="forecast-title">7-Day Forecast</div>
-                <div class="forecast-grid">
-                    {% for day in forecast.forecasts %}
-                    <div class="forecast-day">
-                        <div class="day-name">{{ day.date.strftime('%a') }}</div>
-                        <div class="day-temps">
-                            <strong>{{ "%.0f"|format(day.temp_high) }}°</strong> / {{ "%.0f"|format(day.temp_low) }}°
-                        </div>
-                        <div class="day-desc">{{ day.description|title }}</div>
-                        {% if day.rain_chance > 0 %}
-                        <div class="rain-chance">{{ "%.0f"|format(day.rain_chance) }}% rain</div>
-                        {% endif %}
-                    </div>
-                    {% endfor %}
-                </div>
+            <div data-fragment="{{ fragments.forecast.url }}" data-refresh="{{ fragments.forecast.ttl }}">
+                {{ fragments.forecast.html|safe }}
             </div>
+        </div>
+        <script>
+            // Each fragment refreshes on its own schedule; unchanged ones revalidate as 304s
+            document.querySelectorAll('[data-fragment]').forEach(function (element) {
+                setInterval(function () {
+                    fetch(element.dataset.fragment).then(function (response) {
+                        if (response.ok) {
+                            return response.text().then(function (html) { element.innerHTML = html; });
+                        }
+                    });
+                }, element.dataset.refresh * 1000);
+            });
+        </script>
+    </body>
+    </html>
+    """
+
+CURRENT_FRAGMENT_TEMPLATE = """
+<div class="temp-display">
+    <div class="weather-icon">🌤️</div>
+    <div class="main-temp">{{ "%.0f"|format(current.temperature) }}°</div>
+</div>
+<div class="description">{{ current.description }}</div>
+
+<div class="weather-details">
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.feels_like }}</div>
+        <div class="detail-value">{{ "%.0f"|format(current.feels_like) }}{{ current.units.temperature }}</div>
+    </div>
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.humidity }}</div>
+        <div class="detail-value">{{ current.humidity }}%</div>
+    </div>
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.wind_speed }}</div>
+        <div class="detail-value">{{ "%.1f"|format(current.wind_speed) }} {{ current.units.wind_speed }}</div>
+    </div>
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.visibility }}</div>
+        <div class="detail-value">{{ "%.1f"|format(current.visibility) }} {{ current.units.visibility }}</div>
+    </div>
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.pressure }}</div>
+        <div class="detail-value">{{ current.pressure }} {{ current.units.pressure }}</div>
+    </div>
+    <div class="detail-card">
+        <div class="detail-label">{{ labels.sunrise }}</div>
+        <div class="detail-value">{{ current.sunrise.strftime('%H:%M') }}</div>
+    </div>
+</div>
+<div class="update-time">
+    {{ labels.updated }}: {{ current.timestamp.strftime('%H:%M') }}
+</div>
+"""
+
+FORECAST_FRAGMENT_TEMPLATE = """
+{% if forecast.forecasts %}
+<div class="forecast-section">
+    <div class="forecast-title">{{ labels.forecast }}</div>
+    <div class="forecast-grid">
+        {% for day in forecast.forecasts %}
+        <div class="forecast-day">
+            <div class="day-name">{{ labels.weekdays[day.date.weekday()] }}</div>
+            <div class="day-temps">
+                <strong>{{ "%.0f"|format(day.temp_high) }}°</strong> / {{ "%.0f"|format(day.temp_low) }}°
+            </div>
+            <div class="day-desc">{{ day.description|title }}</div>
+            {% if day.rain_chance > 0 %}
+            <div class="rain-chance">{{ "%.0f"|format(day.rain_chance) }}% {{ labels.rain }}</div>
             {% endif %}
+        </div>
+        {% endfor %}
+    </div>
+</div>
+{% endif %}
+"""
+
+WALL_TEMPLATE = """
+    <!DOCTYPE html>
+    <html lang="{{ lang }}">
+    <head>
+        <title>Weather App - {{ cards|length }} locations</title>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <meta http-equiv="refresh" content="{{ refresh }}">
+        <style>
+            * {
+                margin: 0;
+                padding: 0;
+                box-sizing: border-box;
+            }
+            
+            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                min-height: 100vh;
+                padding: 20px;
+                color: #333;
+            }
+            
+            .wall {
+                display: grid;
+                grid-template-columns: repeat(auto-fill, minmax(220px, 1fr));
+                gap: 15px;
+            }
+            
+            .card {
+                background: rgba(255,255,255,0.95);
+                padding: 18px;
+                border-radius: 15px;
+                box-shadow: 0 4px 15px rgba(0,0,0,0.1);
+            }
+            
+            .card-name {
+                font-weight: 600;
+                color: #74b9ff;
+                text-transform: uppercase;
+                letter-spacing: 1px;
+                font-size: 0.85em;
+                margin-bottom: 8px;
+            }
+            
+            .card-temp {
+                font-size: 2.4em;
+                font-weight: 200;
+                color: #2d3436;
+            }
+            
+            .card-desc {
+                color: #636e72;
+                text-transform: capitalize;
+                margin-bottom: 8px;
+            }
             
-            <div class="footer">
-                <div class="update-time">
-                    Last updated: {{ current.timestamp.strftime('%H:%M') }}
+            .card-details, .card-days {
+                font-size: 0.85em;
+                color: #636e72;
+            }
+            
+            .card-days {
+                display: flex;
+                justify-content: space-between;
+                margin-top: 10px;
+            }
+            
+            .card-error {
+                color: #e17055;
+                font-size: 0.9em;
+            }
+        </style>
+    </head>
+    <body>
+        <div class="wall">
+            {% for card in cards %}
+            <div class="card">
+                <div class="card-name">{{ card.name }}</div>
+                {% if card.error %}
+                <div class="card-error">{{ card.error }}</div>
+                {% else %}
+                <div class="card-temp">{{ "%.0f"|format(card.current.temperature) }}{{ card.current.units.temperature }}</div>
+                <div class="card-desc">{{ card.current.description }}</div>
+                <div class="card-details">
+                    {{ labels.humidity }} {{ card.current.humidity }}% ·
+                    {{ labels.wind_speed }} {{ "%.1f"|format(card.current.wind_speed) }} {{ card.current.units.wind_speed }}
+                </div>
+                {% if card.forecast.forecasts %}
+                <div class="card-days">
+                    {% for day in card.forecast.forecasts[:4] %}
+                    <div>
+                        {{ labels.weekdays[day.date.weekday()] }}<br>
+                        <strong>{{ "%.0f"|format(day.temp_high) }}°</strong> / {{ "%.0f"|format(day.temp_low) }}°
+                    </div>
+                    {% endfor %}
                 </div>
+                {% endif %}
+                {% endif %}
             </div>
+            {% endfor %}
         </div>
     </body>
     </html>
-    """, current=current, forecast=forecast, location=location)
+    """
+
+TEMPLATES = {
+    'location_error.html': LOCATION_ERROR_TEMPLATE,
+    'weather_error.html': WEATHER_ERROR_TEMPLATE,
+    'dashboard.html': DASHBOARD_TEMPLATE,
+    'current_fragment.html': CURRENT_FRAGMENT_TEMPLATE,
+    'forecast_fragment.html': FORECAST_FRAGMENT_TEMPLATE,
+    'wall.html': WALL_TEMPLATE
+}
+
+# Wall displays: most locations per /dashboard request, and page refresh interval
+DASHBOARD_MAX_LOCATIONS = int(os.getenv('DASHBOARD_MAX_LOCATIONS', 50))
+# Most upstream calls one /dashboard request may make; further misses are served stale or nearby
+DASHBOARD_MAX_FETCHES = int(os.getenv('DASHBOARD_MAX_FETCHES', 10))
+DASHBOARD_REFRESH = int(os.getenv('DASHBOARD_REFRESH', 300))
+
+# Fragment cache lifetimes (seconds), matched to how often their data changes
+FRAGMENT_TTLS = {
+    'current': int(os.getenv('CURRENT_FRAGMENT_TTL', 60)),
+    'forecast': int(os.getenv('FORECAST_FRAGMENT_TTL', 900))
+}
+
+# Browser cache lifetime of map tiles (seconds)
+TILE_MAX_AGE = int(os.getenv('TILE_MAX_AGE', 60))
+
+def send_page(page, max_age=0):
+    """Send a cached page: 304 for a matching ETag, the gzip copy when the client accepts it"""
+    if page.etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    elif request.accept_encodings['gzip']:
+        response = current_app.response_class(page.gzipped, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = current_app.response_class(page.body, mimetype='text/html')
+    response.set_etag(page.etag)
+    response.headers['Vary'] = 'Accept-Encoding, Accept-Language'
+    response.headers['Cache-Control'] = f'max-age={max_age}' if max_age else 'no-cache'
+    return response
+
+def render_fragment(kind, location, options, data=None):
+    """
+    Get the "current" or "forecast" dashboard fragment for a location
+    
+    Served from the page cache when possible; otherwise rendered from the
+    weather data (fetched unless given) and cached for FRAGMENT_TTLS[kind].
+    Returns a Page, or the error dict if the weather data is unavailable.
+    """
+    weather_api = services().weather_api
+    page_cache = services().page_cache
+    cell, lat, lon = weather_api.snap(location["latitude"], location["longitude"])
+    key = (cell, kind, options["units"], options["lang"],
+           page_cache.bucket(seconds=FRAGMENT_TTLS[kind]))
+    page = page_cache.get(key)
+    if page is not None:
+        return page
+    
+    if data is None:
+        fetch = weather_api.get_current_weather if kind == 'current' else weather_api.get_forecast
+        data = localize(fetch(lat, lon), **options)
+    if "error" in data:
+        return data
+    html = render_template(f'{kind}_fragment.html', labels=LABELS[options["lang"]], **{kind: data})
+    return page_cache.put(key, html)
+
+def fragment_url(kind, location, options):
+    """URL that re-fetches a fragment for the location's cell and display options"""
+    _, lat, lon = services().weather_api.snap(location["latitude"], location["longitude"])
+    return f"/fragments/{kind}?lat={lat}&lon={lon}&units={options['units']}&lang={options['lang']}"
+
+@bp.route('/')
+def home():
+    """Main weather dashboard"""
+    # Get user location
+    location = resolve_location()
+    options = display_options()
+    if "error" in options:
+        return jsonify({"error": options["error"]}), 400
+    
+    if "error" in location:
+        return render_template('location_error.html', error=location.get("error", "Unknown error"))
+    
+    # Serve the rendered page for this cell and display variant if it is cached
+    weather_api = services().weather_api
+    page_cache = services().page_cache
+    cell = weather_api.snap(location["latitude"], location["longitude"])[0]
+    key = (cell, 'page', options["units"], options["lang"], location.get("city", ""),
+           location.get("country", ""), page_cache.bucket())
+    page = page_cache.get(key)
+    if page is not None:
+        return send_page(page)
+    
+    # Assemble from the fragment caches; only stale fragments are re-rendered
+    current = localize(weather_api.get_current_weather(location["latitude"], location["longitude"]), **options)
+    if "error" in current:
+        return render_template('weather_error.html', error=current.get("error", "Unknown error"))
+    
+    fragments = {}
+    for kind, data in (('current', current), ('forecast', None)):
+        page = render_fragment(kind, location, options, data)
+        fragments[kind] = {
+            "html": page.body.decode('utf-8') if not isinstance(page, dict) else "",
+            "url": fragment_url(kind, location, options),
+            "ttl": FRAGMENT_TTLS[kind]
+        }
+    
+    html = render_template('dashboard.html', current=current, fragments=fragments,
+                           location=location, labels=LABELS[options["lang"]])
+    return send_page(page_cache.put(key, html))
+
+def send_fragment(kind):
+    """Serve one dashboard fragment with its own cache lifetime and ETag"""
+    location = resolve_location()
+    options = display_options()
+    for failed in (location, options):
+        if "error" in failed:
+            return jsonify({"error": failed["error"]}), 400
+    
+    page = render_fragment(kind, location, options)
+    if isinstance(page, dict):
+        return jsonify(page), 502
+    return send_page(page, max_age=FRAGMENT_TTLS[kind])
+
+@bp.route('/fragments/current')
+def fragment_current():
+    """Current conditions card (same location/units/lang arguments as /)"""
+    return send_fragment('current')
+
+@bp.route('/fragments/forecast')
+def fragment_forecast():
+    """Forecast grid (same location/units/lang arguments as /)"""
+    return send_fragment('forecast')
+
+@bp.route('/tiles/<int:z>/<int:x>/<int:y>.png')
+def map_tile(z, x, y):
+    """Temperature heatmap tile (Web Mercator z/x/y), rendered from cached observations only"""
+    tile_cache = services().tile_cache
+    if not tile_cache.valid(z, x, y):
+        return jsonify({"error": f"No tile {z}/{x}/{y} (zoom 0-{tile_cache.max_zoom})"}), 404
+    
+    tile = tile_cache.get(z, x, y)
+    if tile.etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(tile.body, mimetype='image/png')
+    response.set_etag(tile.etag)
+    response.headers['Cache-Control'] = f'max-age={TILE_MAX_AGE}'
+    return response
 
-@app.route('/health')
+def parse_place(entry):
+    """Resolve one /dashboard location: "lat,lon" or a city name for the offline gazetteer"""
+    match = re.fullmatch(r'\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*', entry)
+    if match is None:
+        return geocode_city(entry.strip())
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return {"error": "lat/lon out of range"}
+    return {"latitude": lat, "longitude": lon, "city": "", "region": "", "country": ""}
+
+@bp.route('/dashboard')
+def dashboard():
+    """Multi-location wall display (?locations=Montreal;Toronto;45.5,-73.6)"""
+    options = display_options()
+    if "error" in options:
+        return jsonify({"error": options["error"]}), 400
+    
+    entries = [entry for entry in re.split(r'[;|]', request.args.get('locations', '')) if entry.strip()]
+    if not entries:
+        return jsonify({"error": "locations is required (e.g. ?locations=Montreal;Toronto;45.5,-73.6)"}), 400
+    if len(entries) > DASHBOARD_MAX_LOCATIONS:
+        return jsonify({"error": f"At most {DASHBOARD_MAX_LOCATIONS} locations per dashboard"}), 400
+    
+    # Resolve everything first, then fetch every location in one batched pass
+    weather_api = services().weather_api
+    places = [parse_place(entry) for entry in entries]
+    points = [(place["latitude"], place["longitude"]) for place in places if "error" not in place]
+    for lat, lon in points:
+        services().warm_set.access_log.record(weather_api.snap(lat, lon)[0])
+    # Cap the upstream fan-out per request, and never past what is left of the daily quota
+    planner = services().quota_planner
+    remaining = planner.limit - planner.tracker.used()
+    batch = weather_api.get_batch(points, max_fetches=max(0, min(DASHBOARD_MAX_FETCHES, remaining)))
+    
+    cards = []
+    results = iter(zip(batch["current"], batch["forecast"]))
+    for entry, place in zip(entries, places):
+        name = place.get("city") or entry.strip()
+        if "error" in place:
+            cards.append({"name": name, "error": place["error"]})
+            continue
+        current, forecast = next(results)
+        cards.append({
+            "name": current.get("location") or name,
+            "error": current.get("error"),
+            "current": localize(current, **options),
+            "forecast": localize(forecast, **options)
+        })
+    
+    return render_template('wall.html', cards=cards, lang=options["lang"],
+                           labels=LABELS[options["lang"]], refresh=DASHBOARD_REFRESH)
+
+@bp.route('/health')
 def health():
     """Health check endpoint"""
     return jsonify({
@@ -389,33 +883,261 @@ def health():
         "timestamp": get_timestamp()
     })
 
-@app.route('/api/weather')
+@bp.route('/api/weather')
 def api_weather():
-    """API endpoint for current weather"""
-    location = get_user_location()
-    if "error" in location:
-        return jsonify({"error": location["error"]}), 400
+    """API endpoint for current weather (optional ?city=)"""
+    location = resolve_location()
+    options = display_options()
+    for failed in (location, options):
+        if "error" in failed:
+            return jsonify({"error": failed["error"]}), 400
     
-    weather = weather_api.get_current_weather(location["latitude"], location["longitude"])
-    return jsonify(weather)
+    weather = services().weather_api.get_current_weather(location["latitude"], location["longitude"])
+    return jsonify(localize(weather, **options))
 
-@app.route('/api/forecast')
+@bp.route('/api/forecast')
 def api_forecast():
-    """API endpoint for weather forecast"""
-    location = get_user_location()
+    """API endpoint for weather forecast (optional ?city=)"""
+    location = resolve_location()
+    options = display_options()
+    for failed in (location, options):
+        if "error" in failed:
+            return jsonify({"error": failed["error"]}), 400
+    
+    forecast = services().weather_api.get_forecast(location["latitude"], location["longitude"])
+    return jsonify(localize(forecast, **options))
+
+@bp.route('/api/forecast/hourly')
+def api_forecast_hourly():
+    """API endpoint for the forecast slot series (optional ?city=, from=, to=, points=, by=, fields=)"""
+    location = resolve_location()
+    options = display_options()
+    for failed in (location, options):
+        if "error" in failed:
+            return jsonify({"error": failed["error"]}), 400
+    
+    try:
+        start = parse_time_arg('from', None)
+        end = parse_time_arg('to', None)
+    except (ValueError, OverflowError):
+        return jsonify({"error": "from/to must be epoch seconds or ISO dates"}), 400
+    
+    points = request.args.get('points', type=int)
+    if 'points' in request.args and (points is None or points < 2):
+        return jsonify({"error": "points must be an integer of at least 2"}), 400
+    by = request.args.get('by', 'temperature')
+    fields = request.args.get('fields')
+    fields = fields.split(',') if fields else list(SERIES_TYPES)
+    unknown = [field for field in fields + [by] if field not in SERIES_TYPES]
+    if unknown:
+        return jsonify({"error": f"Unknown fields {unknown}; choose from {list(SERIES_TYPES)}"}), 400
+    
+    hourly = services().weather_api.get_hourly_forecast(location["latitude"], location["longitude"])
+    if "error" in hourly:
+        return jsonify(hourly)
+    
+    # Slice and downsample before converting units, so only kept slots are touched
+    series = slice_series(hourly["series"], start, end)
+    if points:
+        series = downsample(series, points, by)
+    series = {field: series[field] for field in ['time'] + fields if field in series}
+    result = localize(dict(hourly, series=series), **options)
+    result["series"] = series_json(result["series"])
+    result["slots"] = len(series["time"])
+    return jsonify(result)
+
+@bp.route('/api/weather/nearby')
+def api_weather_nearby():
+    """API endpoint for the closest cached observation (never calls upstream)"""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    max_km = request.args.get('km', default=5.0, type=float)
+    options = display_options()
+    if "error" in options:
+        return jsonify({"error": options["error"]}), 400
+    
+    if lat is None or lon is None:
+        location = get_user_location(client_ip())
+        lat, lon = location["latitude"], location["longitude"]
+    
+    weather = services().weather_api.find_nearby_weather(lat, lon, max_km)
+    return jsonify(localize(weather, **options))
+
+@bp.route('/api/cities')
+def api_cities():
+    """API endpoint for city name autocomplete"""
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', default=10, type=int), 50))
+    
+    try:
+        matches = get_gazetteer().search(query, limit)
+    except OSError as e:
+        return jsonify({"error": f"Gazetteer unavailable: {str(e)}"}), 500
+    
+    return jsonify({"query": query, "cities": matches})
+
+@bp.route('/api/history')
+def api_history():
+    """API endpoint for stored observations (?from=&to=&resolution=raw|hour|day|week|month)"""
+    location = resolve_location()
     if "error" in location:
         return jsonify({"error": location["error"]}), 400
     
-    forecast = weather_api.get_forecast(location["latitude"], location["longitude"])
-    return jsonify(forecast)
+    resolution = request.args.get('resolution', 'raw')
+    resolutions = ["raw", "hour"] + list(PERIODS)
+    if resolution not in resolutions:
+        return jsonify({"error": f"resolution must be one of {resolutions}"}), 400
+    
+    now = int(datetime.now().timestamp())
+    try:
+        start = parse_time_arg('from', now - 86400)
+        end = parse_time_arg('to', now)
+    except (ValueError, OverflowError):
+        return jsonify({"error": "from/to must be epoch seconds or ISO dates"}), 400
+    
+    cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+    if resolution in PERIODS:
+        # Precomputed aggregates: a few rows per month instead of every observation
+        points = services().rollup_store.query(cell, resolution, start, end)
+    else:
+        points = services().history_store.query(cell, start, end, resolution)
+    return jsonify({
+        "cell": cell,
+        "from": start,
+        "to": end,
+        "resolution": resolution,
+        "points": points
+    })
+
+@bp.route('/api/accuracy')
+def api_accuracy():
+    """API endpoint for forecast accuracy by lead time (every location, or ?lat=&lon=|?city=)"""
+    min_samples = request.args.get('min_samples', MIN_SAMPLES, type=int)
+    tracker = services().accuracy_tracker
+    
+    if 'lat' in request.args or 'city' in request.args:
+        location = resolve_location()
+        if "error" in location:
+            return jsonify({"error": location["error"]}), 400
+        cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+        return jsonify({
+            "cell": cell,
+            "min_samples": min_samples,
+            "scores": tracker.score(cell, min_samples=min_samples)
+        })
+    
+    return jsonify({
+        "cell": None,
+        "min_samples": min_samples,
+        "scores": tracker.score(min_samples=min_samples),
+        "by_cell": tracker.score(per_cell=True, min_samples=min_samples)
+    })
+
+@bp.route('/api/warmset')
+def api_warmset():
+    """API endpoint for the pre-warm plan, budget and cache coverage of hot locations"""
+    warm_set = services().warm_set
+    warm_set.access_log.flush()
+    return jsonify({
+        "coverage": warm_set.coverage(),
+        "plan": warm_set.plan(),
+        "daily_budget": warm_set.daily_budget,
+        "last_run": warm_set.last_run
+    })
+
+@bp.route('/api/quota')
+def api_quota():
+    """API endpoint for upstream call usage and its projection (what-if: ?current_ttl=&forecast_ttl=&precision=)"""
+    planner = services().quota_planner
+    weather_api = services().weather_api
+    current_ttl = request.args.get('current_ttl', type=int)
+    forecast_ttl = request.args.get('forecast_ttl', type=int)
+    precision = request.args.get('precision', type=int)
+    if any(value is not None and value <= 0 for value in (current_ttl, forecast_ttl)):
+        return jsonify({"error": "current_ttl and forecast_ttl must be positive seconds"}), 400
+    if precision is not None and not 1 <= precision <= weather_api.precision:
+        return jsonify({"error": f"precision must be between 1 and {weather_api.precision}"}), 400
+    
+    projection = planner.simulate(current_ttl, forecast_ttl, precision)
+    projection["fits"] = projection["total"] <= planner.limit
+    return jsonify({
+        "limit": planner.limit,
+        "used_today": planner.tracker.used(),
+        "history": planner.tracker.history(),
+        "ttls": {
+            "current": weather_api.current_ttl,
+            "forecast": weather_api.forecast_ttl,
+            "configured": {"current": planner.base_ttls[0], "forecast": planner.base_ttls[1]}
+        },
+        "projection": projection,
+        "model": planner.model(projection["requests"], projection["cells"], current_ttl, forecast_ttl),
+        "last_tune": planner.last_tune
+    })
+
+@bp.route('/api/admission')
+def api_admission():
+    """API endpoint for per-route concurrency, queueing and shed-rate metrics"""
+    return jsonify(services().admission.stats())
+
+@bp.route('/api/alerts', methods=['GET', 'POST', 'DELETE'])
+def api_alerts():
+    """API endpoint for alert rules: list (?lat=&lon=|?city=), subscribe (POST JSON), unsubscribe (DELETE ?id=&token=)"""
+    engine = services().alert_engine
+    
+    if request.method == 'DELETE':
+        rule_id = request.args.get('id', type=int)
+        token = request.args.get('token', '')
+        if rule_id is None or not token:
+            return jsonify({"error": "id and token are required"}), 400
+        if not engine.remove_rule(rule_id, token):
+            return jsonify({"error": f"No alert rule {rule_id} with that token"}), 404
+        return jsonify({"deleted": rule_id})
+    
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        location = parse_place(str(body['location'])) if body.get('location') else resolve_location()
+        if "error" in location:
+            return jsonify({"error": location["error"]}), 400
+        try:
+            threshold = float(body.get('threshold'))
+        except (TypeError, ValueError):
+            return jsonify({"error": "threshold must be a number"}), 400
+        cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+        rule = engine.add_rule(cell, str(body.get('source', 'current')), str(body.get('field', '')),
+                               str(body.get('op', '>')), threshold, str(body.get('sink', 'log')),
+                               str(body.get('label', '')))
+        if "error" in rule:
+            return jsonify(rule), 400
+        return jsonify(rule), 201
+    
+    if 'lat' in request.args or 'city' in request.args:
+        location = resolve_location()
+        if "error" in location:
+            return jsonify({"error": location["error"]}), 400
+        cell = services().weather_api.snap(location["latitude"], location["longitude"])[0]
+        return jsonify({
+            "cell": cell,
+            "rules": engine.rules_for(cell),
+            "recent": engine.recent(cell),
+            "stats": engine.stats()
+        })
+    
+    return jsonify({
+        "cell": None,
+        "rules": [],
+        "recent": engine.recent(),
+        "stats": engine.stats()
+    })
 
-@app.route('/api/location')
+@bp.route('/api/location')
 def api_location():
     """API endpoint for detected location"""
-    location = get_user_location()
+    location = get_user_location(client_ip())
     return jsonify(location)
 
-@app.route('/api')
+@bp.route('/api')
 def api_docs():
     """API documentation endpoint"""
     return jsonify({
@@ -424,10 +1146,23 @@ def api_docs():
         "description": "Personal weather app with auto-location and forecasts",
         "endpoints": [
             {"path": "/", "method": "GET", "description": "Main weather dashboard"},
+            {"path": "/dashboard", "method": "GET", "description": "Multi-location wall display (?locations=city;city;lat,lon, up to DASHBOARD_MAX_LOCATIONS; units=, lang=)"},
+            {"path": "/fragments/current", "method": "GET", "description": "Dashboard current-conditions fragment (HTML, ETag, max-age CURRENT_FRAGMENT_TTL)"},
+            {"path": "/fragments/forecast", "method": "GET", "description": "Dashboard forecast fragment (HTML, ETag, max-age FORECAST_FRAGMENT_TTL)"},
+            {"path": "/tiles/<z>/<x>/<y>.png", "method": "GET", "description": "Temperature heatmap map tile from cached observations only (PNG, ETag, max-age TILE_MAX_AGE)"},
             {"path": "/health", "method": "GET", "description": "Health check"},
             {"path": "/api", "method": "GET", "description": "API documentation"},
-            {"path": "/api/weather", "method": "GET", "description": "Current weather data"},
-            {"path": "/api/forecast", "method": "GET", "description": "7-day weather forecast"},
+            {"path": "/api/weather", "method": "GET", "description": "Current weather data (optional ?city=, units=imperial|metric, lang=en|fr|es|de)"},
+            {"path": "/api/forecast", "method": "GET", "description": "7-day weather forecast (optional ?city=, units=, lang=)"},
+            {"path": "/api/forecast/hourly", "method": "GET", "description": "Forecast slots as columns: 3-hourly, or hourly in onecall mode (optional ?city=, from=, to=, points=, by=, fields=, units=)"},
+            {"path": "/api/weather/nearby", "method": "GET", "description": "Closest cached observation within ?km= of ?lat=&lon= (units=, lang=)"},
+            {"path": "/api/cities", "method": "GET", "description": "City name autocomplete (?q=&limit=)"},
+            {"path": "/api/history", "method": "GET", "description": "Stored observations (?lat=&lon=|?city=, from=, to=, resolution=raw|hour|day|week|month)"},
+            {"path": "/api/accuracy", "method": "GET", "description": "Forecast error by lead time (all locations, or ?lat=&lon=|?city=; min_samples=)"},
+            {"path": "/api/warmset", "method": "GET", "description": "Hot locations: pre-warm plan for the next hour, budget and cache coverage"},
+            {"path": "/api/quota", "method": "GET", "description": "Upstream calls used today, projected daily calls and hit rate from recorded traffic, and the tuned cache TTLs (what-if: ?current_ttl=&forecast_ttl=&precision=)"},
+            {"path": "/api/alerts", "method": "GET, POST, DELETE", "description": "Alert rules for ?lat=&lon=|?city= and recent notifications; POST {location, source, field, op, threshold, sink} to subscribe (returns the rule's token), DELETE ?id=&token= to unsubscribe"},
+            {"path": "/api/admission", "method": "GET", "description": "Per-route admission control: limits, queue depth, shed counts and rates"},
             {"path": "/api/location", "method": "GET", "description": "Detected user location"},
             {"path": "/weather/demo", "method": "GET", "description": "Demo weather page"}
         ]
@@ -440,5 +1175,8 @@ if __name__ == '__main__':
     print(f"🚀 Starting Weather app on port {port}")
     print(f"🌐 Server: http://localhost:5000")
     print(f"🔍 Health check: http://localhost:5000/health")
+    print(f"💡 Production: ./manage.sh start-prod (gunicorn, see gunicorn.conf.py)")
     
+    app = create_app()
+    app.extensions['weather'].warm_set.start()
     app.run(host='0.0.0.0', port=port, debug=debug)